@@ -0,0 +1,56 @@
+"""Synthetic documentation and config files for the benchmarks."""
+
+
+def generate_markdown(headings: int) -> str:
+    """Generate a documentation file with the given number of headings.
+
+    Each setting has 3 nested headings: `## SETTING_{i}`, `### SETTING_{i}.OPTIONS`
+    and `#### TIMEOUT_{i}`, with single line and `>>>` blockquotes.
+    """
+    out = ["# Generated settings", "", "Ignored part", "", "<!-- doc-start -->", ""]
+    for i in range((headings + 2) // 3):
+        out += [
+            f"## SETTING_{i} = {i}",
+            f"> Documentation for SETTING_{i}",
+            "> spanning two lines",
+            "",
+            f"### SETTING_{i}.OPTIONS",
+            ">>>",
+            f"Options for SETTING_{i}",
+            "```py",
+            f"SETTING_{i} = {{'OPTIONS': {{'TIMEOUT': 30}}}}",
+            "```",
+            ">>>",
+            "",
+            f"#### TIMEOUT_{i}",
+            "> Time out in seconds",
+            "",
+            "Extra text ignored by the parser",
+            "",
+        ]
+    out += ["<!-- doc-end -->", "", "Trailing content"]
+    return "\n".join(out)
+
+
+def generate_python(settings: int) -> str:
+    """Generate a settings module for the documentation of `generate_markdown`."""
+    return "\n".join(
+        f"SETTING_{i} = {{'OPTIONS': {{'TIMEOUT_{i}': 30}}}}" for i in range(settings)
+    )
+
+
+def generate_yaml(lines: int) -> str:
+    """Generate a YAML config file with roughly the given number of lines."""
+    out = []
+    i = 0
+    while len(out) < lines:
+        out += [
+            f"service_{i}:",
+            f"  name: service-{i}",
+            f"  port: {8000 + i % 1000}",
+            "  options:",
+            "    timeout: 30",
+            "    retries: 3",
+        ]
+        i += 1
+    return "\n".join(out)
@@ -0,0 +1,334 @@
+"""Benchmark suite for the parser and the LSP request latency.
+
+Each benchmark runs on synthetic files of 1k, 10k and 100k headings (lines for
+the config file ones), see `generators.py`, and reports the best time per call:
+
+- parser: `parse_header_tree`, `parse_document` (of the text, streamed from
+  a file and lazy), `reparse_document` of an edit,
+  `Document.get_variable`, `Document.complete` and `Document.resolve`.
+- lines: hover/completion word lookup, `apply_change` and the key resolver on
+  a YAML config file.
+- lsp: hover and completion requests to a `doc-lsp` server through a
+  pytest-lsp client, the first hover includes parsing the documentation.
+
+`--save` stores the results as the baseline (merged with the stored ones, so
+`--filter` runs update only their benchmarks), later runs show the change
+against it and `--check` exits with an error when a benchmark is slower than
+the baseline by more than `--threshold`. Baselines only compare runs on the
+same machine, they are not committed.
+
+Usage:
+
+    uv run python benchmarks/run.py --save
+    uv run python benchmarks/run.py --check --threshold 0.25
+    uv run python benchmarks/run.py --sizes 1k,10k --filter lsp
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+from typing import Callable, Iterator
+
+from lsprotocol import types
+from pygls.workspace import PositionCodec
+
+from doc_lsp import get_prefix_at_position, get_word_at_position
+from doc_lsp.lines import apply_change, split_lines
+from doc_lsp.parser import (
+    parse_document,
+    parse_document_file,
+    parse_document_lazy,
+    parse_header_tree,
+    reparse_document,
+)
+from doc_lsp.resolvers import YamlResolver
+from generators import generate_markdown, generate_python, generate_yaml
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+
+Benchmark = tuple[str, Callable[[], object]]
+
+
+def measure(func: Callable[[], object], repeat: int) -> float:
+    """Best time per call in seconds, calls are looped to run at least 0.2s."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+async def measure_async(func, repeat: int, number: int = 20) -> float:
+    """Best time per call in seconds of the coroutine function `func`."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            await func()
+        timings.append((time.perf_counter() - start) / number)
+    return min(timings)
+
+
+def parser_benchmarks(headings: int) -> Iterator[Benchmark]:
+    markdown = generate_markdown(headings)
+    document = parse_document(markdown)
+    settings = len(document.entries) // 3
+    middle = settings // 2
+
+    yield "parse_header_tree", lambda: parse_header_tree(markdown)
+    yield "parse_document", lambda: parse_document(markdown)
+    data = markdown.encode("utf-8")
+    yield "parse_document_file", lambda: parse_document_file(io.BytesIO(data))
+    yield "parse_document_lazy", lambda: parse_document_lazy(data)
+
+    # Edit one blockquote line in the middle of the file
+    lines = markdown.split("\n")
+    line = len(lines) // 2
+    while not lines[line].startswith("> "):
+        line += 1
+    lines[line] = "> Edited documentation"
+    edited = "\n".join(lines)
+    edited_document = parse_document(markdown)
+    yield (
+        "reparse_document",
+        lambda: reparse_document(edited_document, edited, line, line, line),
+    )
+
+    path = f"SETTING_{middle}__OPTIONS__TIMEOUT_{middle}"
+    yield "get_variable", lambda: document.get_variable(path)
+    yield "get_variable_name", lambda: document.get_variable(f"TIMEOUT_{middle}")
+    key_path = [f"SETTING_{middle}", "OPTIONS", f"TIMEOUT_{middle}"]
+    yield "resolve", lambda: document.resolve(key_path)
+    yield "complete", lambda: document.complete("SETTING_1")
+    yield "complete_limit", lambda: document.complete("SETTING_1", limit=50)
+
+
+def lines_benchmarks(count: int) -> Iterator[Benchmark]:
+    text = generate_yaml(count)
+    lines = split_lines(text)
+
+    # A position in the middle of the file, on "timeout"
+    line = len(lines) // 2
+    while not lines[line].startswith("    timeout"):
+        line += 1
+
+    def split_per_request():
+        get_word_at_position(text, line, 6)
+        get_prefix_at_position(text, line, 6)
+
+    def open_lines():
+        get_word_at_position(lines, line, 6)
+        get_prefix_at_position(lines, line, 6)
+
+    yield "split_per_request", split_per_request
+    yield "open_lines", open_lines
+
+    # Typing over the first character of "timeout", the lines stay the same
+    codec = PositionCodec()
+    change = types.TextDocumentContentChangePartial(
+        range=types.Range(
+            start=types.Position(line=line, character=4),
+            end=types.Position(line=line, character=5),
+        ),
+        text="t",
+    )
+    yield "apply_change", lambda: apply_change(lines, change, codec)
+
+    yield "resolver_warm_up", lambda: YamlResolver(lines).warm_up(len(lines))
+    resolver = YamlResolver(lines)
+    resolver.warm_up(len(lines))
+    yield "key_path", lambda: resolver.resolve(line, 6)
+
+    # Resolving again after typing on the line above
+    def key_path_after_edit():
+        resolver.changed(line - 1, line - 1, line - 1)
+        resolver.resolve(line, 6)
+
+    yield "key_path_after_edit", key_path_after_edit
+
+
+async def lsp_benchmarks(headings: int, repeat: int) -> dict[str, float]:
+    """Time hover and completion requests to a server on a temporary workspace."""
+    from pytest_lsp import ClientServerConfig, client_capabilities
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = (headings + 2) // 3
+        middle = settings // 2
+        doc_file = Path(tmp) / "settings.py.md"
+        doc_file.write_text(generate_markdown(headings), encoding="utf-8")
+        py_file = Path(tmp) / "settings.py"
+        py_file.write_text(generate_python(settings), encoding="utf-8")
+
+        config = ClientServerConfig(
+            server_command=[
+                sys.executable,
+                "-c",
+                "from doc_lsp import main; main()",
+                "--no-index",
+                # pygls logs each message at INFO, big completion results
+                # would be timed too and overflow the stderr forwarding
+                "--log-level",
+                "WARNING",
+            ]
+        )
+        client = await config.start()
+
+        @client.feature(types.CLIENT_REGISTER_CAPABILITY)
+        def register_capability(params: types.RegistrationParams):
+            pass
+
+        await client.initialize_session(
+            types.InitializeParams(
+                capabilities=client_capabilities("visual-studio-code"),
+                root_uri=Path(tmp).as_uri(),
+            )
+        )
+        uri = py_file.as_uri()
+        client.text_document_did_open(
+            types.DidOpenTextDocumentParams(
+                text_document=types.TextDocumentItem(
+                    uri=uri,
+                    language_id="python",
+                    version=1,
+                    text=py_file.read_text(encoding="utf-8"),
+                )
+            )
+        )
+        document = types.TextDocumentIdentifier(uri=uri)
+
+        def hover_at(character: int):
+            position = types.Position(line=middle, character=character)
+            params = types.HoverParams(text_document=document, position=position)
+            return lambda: client.text_document_hover_async(params)
+
+        # Parses the documentation file
+        start = time.perf_counter()
+        result = await hover_at(0)()
+        results["hover_first"] = time.perf_counter() - start
+        assert result is not None, "the first hover found no documentation"
+
+        results["hover"] = await measure_async(hover_at(0), repeat)
+        nested = len(f"SETTING_{middle} = {{'OPTIONS': {{'") + 1
+        results["hover_nested"] = await measure_async(hover_at(nested), repeat)
+
+        # Completion of "SETTING_" followed by the first digit
+        completion = types.CompletionParams(
+            text_document=document,
+            position=types.Position(line=middle, character=len("SETTING_") + 1),
+        )
+        results["completion"] = await measure_async(
+            lambda: client.text_document_completion_async(completion), repeat
+        )
+
+        await client.shutdown_session()
+    return results
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(SIZES),
+        help=f"comma separated sizes to run, of {', '.join(SIZES)} (default: all)",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--filter",
+        default="",
+        metavar="TEXT",
+        help="only run the benchmarks whose name contains TEXT, e.g. `lsp` or `parse_`",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=DEFAULT_BASELINE,
+        help=f"baseline file (default: {DEFAULT_BASELINE.name} next to this script)",
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="save the results as the baseline"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="exit with an error if a benchmark regressed against the baseline",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="slowdown over the baseline considered a regression (default: 0.25, i.e. 25%%)",
+    )
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline.exists():
+        stored = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if stored.get("python") != platform.python_version():
+            print(f"Baseline from Python {stored.get('python')}, comparing anyway")
+        baseline = stored["results"]
+    elif args.check:
+        parser.error(f"no baseline at {args.baseline}, run with --save first")
+
+    results = {}
+    regressions = []
+
+    def report(name: str, elapsed: float) -> None:
+        results[name] = elapsed
+        line = f"{name:<36} {format_time(elapsed):>10}"
+        if name in baseline:
+            change = elapsed / baseline[name] - 1
+            line += f" {format_time(baseline[name]):>10} {change:+8.1%}"
+            if change > args.threshold:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line, flush=True)
+
+    for label in args.sizes.split(","):
+        size = SIZES[label]
+        for group, benchmarks in (
+            ("parser", parser_benchmarks),
+            ("lines", lines_benchmarks),
+        ):
+            for name, func in benchmarks(size):
+                name = f"{group}.{name}[{label}]"
+                if args.filter in name:
+                    report(name, measure(func, args.repeat))
+
+        names = ("hover_first", "hover", "hover_nested", "completion")
+        if any(args.filter in f"lsp.{name}[{label}]" for name in names):
+            for name, elapsed in asyncio.run(lsp_benchmarks(size, args.repeat)).items():
+                name = f"lsp.{name}[{label}]"
+                if args.filter in name:
+                    report(name, elapsed)
+
+    if args.save:
+        stored = {
+            "python": platform.python_version(),
+            "results": {**baseline, **results},
+        }
+        args.baseline.write_text(json.dumps(stored, indent=2) + "\n", encoding="utf-8")
+        print(f"Saved {len(results)} results to {args.baseline}")
+
+    if args.check and regressions:
+        print(
+            f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Startup time of the `doc-lsp` modules and command.
+
+Each mode imports a module in a fresh interpreter with `-X importtime` and
+reports its cumulative import time, with the modules that took the longest
+themselves:
+
+- package: `import doc_lsp`, must stay cheap, the parse workers import it.
+- parser: `import doc_lsp.parser`, the library API, no pygls nor lsprotocol.
+- pool: `import doc_lsp.pool`, what a parse worker imports.
+- server: `import doc_lsp.lsp`, lsprotocol alone is most of it.
+- version: wall time of `doc-lsp --version`, the command without the server.
+
+`--check` exits with an error when a mode is over its budget in `BUDGETS_MS`.
+The budgets leave room for slower machines, they catch a heavy import added
+to the wrong module rather than small changes.
+
+Usage:
+
+    uv run python benchmarks/startup.py
+    uv run python benchmarks/startup.py --check --repeat 5
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+import time
+
+MODES = {
+    "package": "doc_lsp",
+    "parser": "doc_lsp.parser",
+    "pool": "doc_lsp.pool",
+    "server": "doc_lsp.lsp",
+}
+
+# Per mode budget, in milliseconds
+BUDGETS_MS = {
+    "package": 20,
+    "parser": 80,
+    "pool": 150,
+    "server": 2500,
+    "version": 600,
+}
+
+IMPORT_TIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def import_times(module: str) -> tuple[float, list[tuple[float, str]]]:
+    """Cumulative import time of `module` in seconds, and (self time, name) of
+    the modules it imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_RE.match(line)
+        if match is not None:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((int(self_us), int(cumulative_us), len(indent), name))
+
+    # A module is listed after its imports, which are indented under it, the
+    # top level entries before them are the interpreter startup
+    end = next(
+        i for i, entry in enumerate(entries) if entry[2] == 0 and entry[3] == module
+    )
+    start = end
+    while start > 0 and entries[start - 1][2] > 0:
+        start -= 1
+    modules = [
+        (self_us / 1e6, name) for self_us, _, _, name in entries[start : end + 1]
+    ]
+    return entries[end][1] / 1e6, modules
+
+
+def version_time() -> float:
+    """Wall time of `doc-lsp --version` in seconds."""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", "from doc_lsp import main; main()", "--version"],
+        capture_output=True,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="runs per mode, the best is kept (default: 3)",
+    )
+    parser.add_argument(
+        "--top", type=int, default=5, help="slowest modules shown per mode (default: 5)"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="exit with an error if a mode is over its budget",
+    )
+    args = parser.parse_args()
+
+    over = []
+
+    def report(mode: str, seconds: float) -> None:
+        budget = BUDGETS_MS[mode]
+        line = f"{mode:<10} {seconds * 1000:>8.1f} ms  (budget {budget} ms)"
+        if seconds * 1000 > budget:
+            line += "  OVER BUDGET"
+            over.append(mode)
+        print(line, flush=True)
+
+    for mode, module in MODES.items():
+        runs = [import_times(module) for _ in range(args.repeat)]
+        total, modules = min(runs, key=lambda run: run[0])
+        report(mode, total)
+        for seconds, name in sorted(modules, reverse=True)[: args.top]:
+            print(f"    {seconds * 1000:>8.1f} ms  {name}")
+
+    report("version", min(version_time() for _ in range(args.repeat)))
+
+    if args.check and over:
+        print(f"{len(over)} mode(s) over budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
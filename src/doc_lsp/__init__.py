@@ -1,324 +1,38 @@
-import argparse
-import logging
-import os
-from pathlib import Path
-from typing import Optional
-from urllib.parse import unquote, urlparse
+"""
+doc-lsp, a language server showing the documentation of config files from
+companion markdown files (`settings.py` -> `settings.py.md`).
 
-from lsprotocol import types
-from pygls.lsp.server import LanguageServer
+Importing the package is cheap, the language server lives in `doc_lsp.lsp`
+and is imported by `main()` or on first access to its names from here
+(e.g. `doc_lsp.hover`, `doc_lsp.server` the LanguageServer). Parse workers and API consumers of `doc_lsp.parser`
+do not load pygls and lsprotocol.
+"""
 
-from .parser import parse_document
 
-# Version information
-try:
-    from importlib.metadata import version
-
-    __version__ = version("doc-lsp")
-except Exception:
-    __version__ = "0.1.0"  # Fallback version
-
-
-def uri_to_path(uri: str) -> Path:
-    """Convert a file URI to a Path object, handling Windows paths correctly."""
-    parsed = urlparse(uri)
-    path_str = unquote(parsed.path)
-
-    # Handle Windows paths (remove leading slash if it's a Windows drive path)
-    if (
-        os.name == "nt"
-        and path_str.startswith("/")
-        and len(path_str) > 2
-        and path_str[2] == ":"
-    ):
-        path_str = path_str[1:]
-
-    return Path(path_str)
-
-
-server = LanguageServer("doc-lsp", "v1")
-
-# Cache for parsed markdown documents
-_doc_cache = {}
-
-# Supported file extensions
-SUPPORTED_EXTENSIONS = {
-    ".py",
-    ".json",
-    ".yaml",
-    ".yml",
-    ".toml",
-    ".ini",
-    ".conf",
-    ".properties",
-}
-
-
-def get_word_at_position(text: str, line: int, character: int) -> Optional[str]:
-    """Extract the word/variable at the given position."""
-    lines = text.split("\n")
-    if line >= len(lines):
-        return None
-
-    line_text = lines[line]
-    if character > len(line_text):
-        return None
-
-    # Find word boundaries (alphanumeric and underscore)
-    # Also include dots for nested variables like DATABASES.default.NAME
-    start = character
-    end = character
-
-    # Find start of word
-    while start > 0 and (
-        line_text[start - 1].isalnum() or line_text[start - 1] in "_."
-    ):
-        start -= 1
-
-    # Find end of word
-    while end < len(line_text) and (line_text[end].isalnum() or line_text[end] in "_."):
-        end += 1
-
-    word = line_text[start:end].strip()
-
-    # Remove leading/trailing dots
-    word = word.strip(".")
-
-    return word if word else None
-
-
-def get_prefix_at_position(text: str, line: int, character: int) -> Optional[str]:
-    """Extract the partial word/variable prefix at the given position for completion."""
-    lines = text.split("\n")
-    if line >= len(lines):
-        return None
-
-    line_text = lines[line]
-    if character > len(line_text):
-        return None
-
-    # Find start of current word being typed
-    start = character
-
-    # Move back to find the start of the current word
-    while start > 0 and (
-        line_text[start - 1].isalnum() or line_text[start - 1] in "_."
-    ):
-        start -= 1
-
-    # Get the prefix from start to current position
-    prefix = line_text[start:character].strip()
-
-    # Remove leading/trailing dots
-    prefix = prefix.strip(".")
-
-    return prefix if prefix else None
-
-
-def get_doc_file_path(file_uri: str) -> Optional[Path]:
-    """Get the corresponding .md documentation file path."""
-    file_path = uri_to_path(file_uri)
-
-    # Check if file extension is supported
-    if file_path.suffix not in SUPPORTED_EXTENSIONS:
-        # Check if it's a plain text file (no extension or .txt)
-        if file_path.suffix not in ("", ".txt"):
-            return None
+def main():
+    """Entry point of the `doc-lsp` command, see `doc_lsp.cli`."""
+    from .cli import main
 
-    # Construct the markdown file path
-    doc_file = file_path.parent / f"{file_path.name}.md"
+    main()
 
-    if doc_file.exists():
-        return doc_file
 
-    return None
+def __getattr__(name: str):
+    if name == "__version__":
+        try:
+            from importlib.metadata import version
 
+            return version("doc-lsp")
+        except Exception:
+            return "0.1.0"  # Fallback version
+    if name.startswith("__"):
+        raise AttributeError(name)
 
-def load_documentation(doc_file: Path) -> Optional[dict]:
-    """Load and parse the documentation file."""
-    # Check cache first
-    file_key = str(doc_file)
-    mtime = doc_file.stat().st_mtime
+    # The server names used to live here
+    from importlib import import_module
 
-    if file_key in _doc_cache:
-        cached_mtime, cached_doc = _doc_cache[file_key]
-        if cached_mtime == mtime:
-            return cached_doc
+    lsp = import_module(".lsp", __name__)
 
-    # Parse the markdown file
     try:
-        content = doc_file.read_text(encoding="utf-8")
-        document = parse_document(content)
-
-        # Cache the parsed document
-        _doc_cache[file_key] = (mtime, document)
-
-        return document
-    except Exception as e:
-        logging.error(f"Error parsing {doc_file}: {e}")
-        return None
-
-
-@server.feature(types.INITIALIZE)
-def initialize(ls: LanguageServer, params: types.InitializeParams):
-    """Initialize the server with capabilities."""
-    pass  # The server will automatically handle capabilities
-
-
-@server.feature(types.TEXT_DOCUMENT_HOVER)
-def hover(ls: LanguageServer, params: types.HoverParams):
-    """Handle hover requests."""
-    pos = params.position
-    document_uri = params.text_document.uri
-    document = ls.workspace.get_text_document(document_uri)
-
-    # Get the word at the cursor position
-    word = get_word_at_position(document.source, pos.line, pos.character)
-
-    if not word:
-        return None
-
-    # Get the documentation file path
-    doc_file = get_doc_file_path(document_uri)
-
-    if not doc_file:
-        return None
-
-    # Load the documentation
-    doc = load_documentation(doc_file)
-
-    if not doc:
-        return None
-
-    # Look up the variable in the documentation
-    variable = doc.get_variable(word)
-
-    if not variable:
-        return None
-
-    # Format the hover content
-    hover_content = (
-        f"## {variable.name}\n\n{variable.doc}"
-        if variable.doc
-        else f"## {variable.name}"
-    )
-
-    return types.Hover(
-        contents=types.MarkupContent(
-            kind=types.MarkupKind.Markdown,
-            value=hover_content,
-        ),
-        range=types.Range(
-            start=types.Position(line=pos.line, character=0),
-            end=types.Position(line=pos.line + 1, character=0),
-        ),
-    )
-
-
-@server.feature(types.TEXT_DOCUMENT_COMPLETION)
-def completion(ls: LanguageServer, params: types.CompletionParams):
-    """Handle completion requests."""
-    pos = params.position
-    document_uri = params.text_document.uri
-    document = ls.workspace.get_text_document(document_uri)
-
-    # Get the prefix being typed at the cursor position
-    prefix = get_prefix_at_position(document.source, pos.line, pos.character)
-
-    if not prefix:
-        return []
-
-    # Get the documentation file path
-    doc_file = get_doc_file_path(document_uri)
-
-    if not doc_file:
-        return []
-
-    # Load the documentation
-    doc = load_documentation(doc_file)
-
-    if not doc:
-        return []
-
-    # Find all variables that start with the prefix
-    completion_items = []
-    prefix_lower = prefix.lower()
-
-    for var_name, variable in doc.variables.items():
-        # Check if variable name starts with the prefix (case insensitive)
-        if var_name.lower().startswith(prefix_lower):
-            # Avoid duplicate entries (variables are stored with both full path and name)
-            if any(item.label == variable.name for item in completion_items):
-                continue
-
-            # Create completion item with data for resolve
-            completion_item = types.CompletionItem(
-                label=variable.name,
-                kind=types.CompletionItemKind.Variable,
-                detail=f"Variable: {variable.name}",
-                insert_text=variable.name,
-                documentation=types.MarkupContent(
-                    kind=types.MarkupKind.Markdown,
-                    value=f"## {variable.name}\n\n{variable.doc}",
-                ),
-                # Store data needed for resolve
-                data={
-                    "variable_name": variable.name,
-                    "doc_file": str(doc_file),
-                },
-            )
-            completion_items.append(completion_item)
-
-    return completion_items
-
-
-@server.feature(types.WORKSPACE_DID_CHANGE_WATCHED_FILES)
-def did_change_watched_files(
-    ls: LanguageServer, params: types.DidChangeWatchedFilesParams
-):
-    """Handle file change notifications to invalidate cache."""
-    for change in params.changes:
-        file_path = uri_to_path(change.uri)
-
-        # If it's a markdown file, invalidate its cache
-        if file_path.suffix == ".md":
-            file_key = str(file_path)
-            if file_key in _doc_cache:
-                del _doc_cache[file_key]
-                logging.info(f"Cache invalidated for {file_path.name}")
-
-
-def main():
-    """Main entry point for doc-lsp server."""
-    # Set up argument parser
-    parser = argparse.ArgumentParser(
-        prog="doc-lsp",
-        description="Language Server Protocol implementation for loading documentation from separate markdown files",
-    )
-    parser.add_argument(
-        "--version",
-        action="version",
-        version=f"doc-lsp {__version__}",
-        help="show version and exit",
-    )
-    parser.add_argument(
-        "--log-level",
-        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
-        default="INFO",
-        help="set logging level (default: INFO)",
-    )
-    parser.add_argument(
-        "--stdio",
-        action="store_true",
-        help="use stdio for communication (default: False)",
-    )
-
-    # Parse arguments
-    args = parser.parse_args()
-
-    # Set up logging
-    log_level = getattr(logging, args.log_level)
-    logging.basicConfig(level=log_level, format="%(message)s")
-
-    # Start the server
-    server.start_io()
+        return getattr(lsp, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
@@ -0,0 +1,203 @@
+"""
+Caches for the documentation files.
+
+`DocCache` keeps the parsed documentation files, entries are evicted in LRU
+order when the number of entries or their approximate size in memory goes
+over the configured limits. Before Python 3.13 each lazy document keeps the
+file descriptor of its mapping open (see `doc_lsp.pool`), they are capped
+at `DEFAULT_MAX_MAPPED` so the server stays under the open files limit.
+
+`StatCache` keeps the stat() of the documentation files (or that they do not
+exist) so requests do not stat the file system every time.
+"""
+
+import os
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from .parser import Document
+
+# Approximate memory used by each variable besides its strings:
+# the Variable and Header nodes and the index dict slots.
+ENTRY_OVERHEAD = 600
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_MAPPED = 128 if sys.version_info < (3, 13) else None
+
+# Seconds a stat() result is trusted when the client is not watching files
+DEFAULT_STAT_INTERVAL = 1.0
+
+
+def estimate_size(document: Document) -> int:
+    """Approximate the memory used by a parsed document, in bytes."""
+    # The doc is kept on both the Header and the Variable, lazy documents
+    # have no headers, their docs are counted as if they were all loaded
+    copies = 2 if document.tree is not None else 1
+    size = 0
+    for var in document.entries:
+        size += copies * var.doc_size + 2 * len(var.path) + len(var.name)
+    return size + ENTRY_OVERHEAD * len(document.entries)
+
+
+class DocCache:
+    """LRU cache of parsed documents keyed by file path.
+
+    Each entry stores the file mtime it was parsed from, `get` only returns
+    documents whose mtime matches. `None` limits mean unlimited, `max_mapped`
+    limits the documents reading their docs from a mapped file.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = DEFAULT_MAX_ENTRIES,
+        max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+        max_mapped: Optional[int] = DEFAULT_MAX_MAPPED,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_mapped = max_mapped
+        self._entries: OrderedDict[str, tuple[float, Document, int]] = OrderedDict()
+        self.size = 0  # approximate bytes of all the entries
+        self.mapped = 0  # entries with a `source`
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def configure(
+        self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None
+    ) -> None:
+        """Change the limits, evicting entries if needed."""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def get(self, key: str, mtime: float) -> Optional[Document]:
+        """Get the document if cached for this mtime, marking it as recently used."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != mtime:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, mtime: float, document: Document) -> None:
+        """Cache the document parsed from the file at this mtime."""
+        self.invalidate(key)
+        size = estimate_size(document)
+        self._entries[key] = (mtime, document, size)
+        self.size += size
+        if document.source is not None:
+            self.mapped += 1
+        self._evict()
+
+    def invalidate(self, key: str) -> bool:
+        """Remove the document from the cache, return True if it was cached."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._removed(entry)
+        return True
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+        self.mapped = 0
+
+    def stats(self) -> dict[str, int]:
+        """Counters and usage of the cache."""
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "mapped": self.mapped,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _evict(self) -> None:
+        """Drop the least recently used entries until the limits are respected.
+
+        The most recent entry is always kept, even if it is bigger than `max_bytes`.
+        """
+        while len(self._entries) > 1 and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self.size > self.max_bytes)
+        ):
+            _, entry = self._entries.popitem(last=False)
+            self._removed(entry)
+            self.evictions += 1
+
+        if self.max_mapped is not None and self.mapped > self.max_mapped:
+            # The least recently used mapped documents, not the other entries
+            mapped = [
+                key
+                for key, entry in self._entries.items()
+                if entry[1].source is not None
+            ]
+            for key in mapped:
+                if self.mapped <= self.max_mapped:
+                    break
+                self._removed(self._entries.pop(key))
+                self.evictions += 1
+
+    def _removed(self, entry: tuple[float, Document, int]) -> None:
+        self.size -= entry[2]
+        if entry[1].source is not None:
+            self.mapped -= 1
+
+
+class StatCache:
+    """Remember the stat() of files, None for files that do not exist.
+
+    When the client watches the files (`watching`) a result is trusted until
+    `invalidate` is called from `workspace/didChangeWatchedFiles`, otherwise
+    files are polled with stat() at most once every `interval` seconds.
+    """
+
+    def __init__(self, interval: float = DEFAULT_STAT_INTERVAL):
+        self.interval = interval
+        self.watching = False
+        self._stats: dict[str, tuple[float, Optional[os.stat_result]]] = {}
+        self.hits = 0
+        self.misses = 0  # stat() calls
+
+    def stat(self, path: Path) -> Optional[os.stat_result]:
+        """Get the stat() of the file, None if it does not exist."""
+        key = str(path)
+        now = time.monotonic()
+        entry = self._stats.get(key)
+        if entry is not None and (self.watching or now - entry[0] < self.interval):
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        try:
+            stat = path.stat()
+        except OSError:
+            stat = None
+
+        self._stats[key] = (now, stat)
+        return stat
+
+    def invalidate(self, key: str) -> None:
+        """Forget the file, it is checked again on the next request."""
+        self._stats.pop(key, None)
+
+    def clear(self) -> None:
+        self._stats.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Counters and usage of the cache."""
+        return {"entries": len(self._stats), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,97 @@
+"""
+Documentation coverage of the config files of a tree, `doc-lsp check`.
+
+The config file of each companion doc under the directories (`settings.py`
+for `settings.py.md`) is checked on all the cores for:
+
+- undocumented keys: keys with no documentation, looked up as hover does,
+  by the full path of the key (see `doc_lsp.resolvers`) then by its name.
+  Parents of documented keys are documented, see `Document.documents`.
+  Languages without a resolver are read as `key = value` lines.
+- orphaned headings: variables of the documentation that no key resolves to,
+  e.g. a key that was renamed or removed.
+
+Problems are printed as they are found, one per line as
+`path:line:column: message`, for CI and editors to parse:
+
+    app/settings.py:12:1: undocumented key CACHES.default.TIMEOUT
+    app/settings.py.md:40:1: heading DEBUG_TOOLBAR documents no key of settings.py
+"""
+
+import functools
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .docfiles import SUPPORTED_EXTENSIONS, find_doc_files
+from .parser import Document
+from .pool import map_files, read_documentation
+from .resolvers import RESOLVERS, IniResolver, KeyResolver
+
+# (file, line, column, message), lines and columns count from 1
+Problem = tuple[str, int, int, str]
+
+
+def key_resolver(config_file: Path, lines: list[str]) -> KeyResolver:
+    """The resolver of the config file language, `key = value` lines by default."""
+    return RESOLVERS.get(config_file.suffix, IniResolver)(lines)
+
+
+def check_document(
+    config_file: Path, lines: list[str], document: Document, orphans: bool = True
+) -> list[Problem]:
+    """Problems of the config file `lines` documented by `document`."""
+    problems = []
+    documented = set()
+    for line, column, path in key_resolver(config_file, lines).keys():
+        variable = document.resolve(path)
+        if variable is not None:
+            documented.add(id(variable))
+        elif not document.documents(path):
+            message = f"undocumented key {'.'.join(path)}"
+            problems.append((str(config_file), line + 1, column + 1, message))
+
+    if orphans:
+        doc_file = f"{config_file}.md"
+        for variable in document.entries:
+            if id(variable) not in documented:
+                message = (
+                    f"heading {variable.pattern} documents no key of {config_file.name}"
+                )
+                problems.append((doc_file, variable.line + 1, 1, message))
+    return problems
+
+
+def check_file(doc_file: str, orphans: bool = True) -> list[Problem]:
+    """Run on a worker process, the problems of the config file documented by `doc_file`."""
+    doc_path = Path(doc_file)
+    # settings.py.md documents settings.py
+    config_file = doc_path.with_suffix("")
+    try:
+        text = config_file.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return [(doc_file, 1, 1, f"no {config_file.name} to document")]
+    document = read_documentation(doc_path, doc_path.stat())
+    return check_document(config_file, text.split("\n"), document, orphans)
+
+
+def check_tree(
+    roots: Iterable[Path], workers: Optional[int] = None, orphans: bool = True
+) -> Iterator[Problem]:
+    """Yield the problems of the documented config files under `roots`, checked
+    on `workers` processes (all the cores by default), in the order of the files.
+
+    A file that can not be read is a problem too.
+    """
+    doc_files = find_doc_files(roots, SUPPORTED_EXTENSIONS)
+    check = functools.partial(check_file, orphans=orphans)
+    for doc_file, result in map_files(check, doc_files, workers or os.cpu_count() or 1):
+        if isinstance(result, Exception):
+            yield str(doc_file), 1, 1, f"could not be checked: {result}"
+        else:
+            yield from result
+
+
+def format_problem(problem: Problem) -> str:
+    path, line, column, message = problem
+    return f"{path}:{line}:{column}: {message}"
@@ -0,0 +1,287 @@
+"""
+Command line of `doc-lsp`.
+
+Parsing the arguments only imports the standard library and the parser
+modules, the language server (pygls and lsprotocol, most of the startup time)
+is imported once the options are known, so `--help` and `--version` answer
+right away. `doc-lsp index` builds an index file for `--index-file` and
+`doc-lsp check` reports the keys without documentation, without starting
+the server, see `doc_lsp.prebuilt` and `doc_lsp.check`.
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+from .cache import DEFAULT_MAX_BYTES, DEFAULT_MAX_ENTRIES, DEFAULT_STAT_INTERVAL
+from .disk_cache import default_cache_dir
+from .prebuilt import DEFAULT_INDEX_FILE
+
+
+class VersionAction(argparse.Action):
+    """`--version`, looking up the installed version only when asked."""
+
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, help=None):
+        super().__init__(
+            option_strings, dest, default=argparse.SUPPRESS, nargs=0, help=help
+        )
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        from . import __version__
+
+        parser.exit(message=f"doc-lsp {__version__}\n")
+
+
+def index_command(args: argparse.Namespace) -> int:
+    """Run `doc-lsp index`, return the exit status: 1 if a file could not be read."""
+    from .prebuilt import write_index
+
+    start = time.perf_counter()
+    count, errors = write_index(args.dirs, args.output, args.workers or None)
+    logging.info(
+        f"Indexed {count} documentation files to {args.output} "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+    if errors:
+        logging.error(f"{len(errors)} documentation files could not be read")
+        return 1
+    return 0
+
+
+def check_command(args: argparse.Namespace) -> int:
+    """Run `doc-lsp check`, return the exit status: 1 if a problem was found."""
+    from .check import check_tree, format_problem
+
+    problems = 0
+    for problem in check_tree(
+        args.dirs, args.workers or None, orphans=not args.no_orphans
+    ):
+        print(format_problem(problem), flush=True)
+        problems += 1
+    if problems:
+        logging.error(f"Found {problems} problems")
+        return 1
+    return 0
+
+
+def main():
+    """Entry point of the `doc-lsp` command."""
+    # Set up argument parser
+    parser = argparse.ArgumentParser(
+        prog="doc-lsp",
+        description=(
+            "Language Server Protocol implementation for loading documentation from "
+            "separate markdown files"
+        ),
+    )
+    parser.add_argument(
+        "--version",
+        action=VersionAction,
+        help="show version and exit",
+    )
+    parser.add_argument(
+        "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        default="INFO",
+        help="set logging level (default: INFO)",
+    )
+    parser.add_argument(
+        "--stdio",
+        action="store_true",
+        help="use stdio for communication (default: False)",
+    )
+    parser.add_argument(
+        "--max-completion-items",
+        type=int,
+        default=None,
+        metavar="N",
+        help="cap the number of completion items returned (default: unlimited)",
+    )
+    parser.add_argument(
+        "--stat-interval",
+        type=float,
+        default=DEFAULT_STAT_INTERVAL,
+        metavar="SECONDS",
+        help=(
+            "how long a documentation file is not checked for changes when the editor "
+            "is not watching files, 0 to check on every request (default: "
+            f"{DEFAULT_STAT_INTERVAL})"
+        ),
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        metavar="N",
+        help=(
+            "parse documentation files on N worker processes, 0 parses on the server "
+            "thread (default: 0)"
+        ),
+    )
+    parser.add_argument(
+        "--lazy-docs",
+        action="store_true",
+        help=(
+            "map the documentation files in memory and read each doc when first "
+            "shown, for big files (not with --cache-dir or --parse-workers, not on "
+            "Windows)"
+        ),
+    )
+    parser.add_argument(
+        "--diagnostics",
+        action="store_true",
+        help="warn about the keys of the open config files that have no documentation",
+    )
+    parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help="do not parse the documentation files of the workspace in the background",
+    )
+    parser.add_argument(
+        "--index-file",
+        type=Path,
+        metavar="FILE",
+        help=(
+            "serve the documentation files indexed on FILE by `doc-lsp index` without "
+            "parsing them"
+        ),
+    )
+    parser.add_argument(
+        "--cache-dir",
+        nargs="?",
+        const=default_cache_dir(),
+        type=Path,
+        metavar="DIR",
+        help=(
+            "persist parsed documentation files on DIR for a fast start (default DIR: "
+            f"{default_cache_dir()})"
+        ),
+    )
+    parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=DEFAULT_MAX_ENTRIES,
+        metavar="N",
+        help=(
+            "max number of parsed documentation files kept in memory, 0 for unlimited "
+            f"(default: {DEFAULT_MAX_ENTRIES})"
+        ),
+    )
+    parser.add_argument(
+        "--cache-max-bytes",
+        type=int,
+        default=DEFAULT_MAX_BYTES,
+        metavar="N",
+        help=(
+            "approximate max memory used by parsed documentation files, 0 for "
+            f"unlimited (default: {DEFAULT_MAX_BYTES})"
+        ),
+    )
+    parser.add_argument(
+        "--stats-interval",
+        type=float,
+        default=0.0,
+        metavar="SECONDS",
+        help=(
+            "log the latency and cache stats at DEBUG level every SECONDS, 0 to "
+            "disable (default: 0)"
+        ),
+    )
+    parser.add_argument(
+        "--profile-out",
+        type=Path,
+        metavar="FILE",
+        help=(
+            "run under cProfile and write the stats to FILE on shutdown or on "
+            "docLsp/dumpProfile"
+        ),
+    )
+    parser.add_argument(
+        "--trace-memory",
+        type=Path,
+        metavar="FILE",
+        help=(
+            "trace memory allocations and write a tracemalloc snapshot to FILE on "
+            "shutdown or on docLsp/dumpProfile"
+        ),
+    )
+
+    # Arguments of the batch commands
+    batch_parser = argparse.ArgumentParser(add_help=False)
+    batch_parser.add_argument(
+        "dirs",
+        nargs="*",
+        type=Path,
+        default=[Path(".")],
+        metavar="DIR",
+        help=(
+            "directories searched for documentation files (default: the current "
+            "directory)"
+        ),
+    )
+    batch_parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=0,
+        metavar="N",
+        help="run on N processes, 0 for one per core (default: 0)",
+    )
+
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    index_parser = subparsers.add_parser(
+        "index",
+        parents=[batch_parser],
+        help=(
+            "parse the documentation files of a tree into an index file for "
+            "--index-file"
+        ),
+        description=(
+            "Parse the documentation files under the directories on all the cores and "
+            "write them to an index file, served by `doc-lsp --index-file FILE` "
+            "without parsing them"
+        ),
+    )
+    index_parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=Path(DEFAULT_INDEX_FILE),
+        metavar="FILE",
+        help=f"index file written (default: {DEFAULT_INDEX_FILE})",
+    )
+    check_parser = subparsers.add_parser(
+        "check",
+        parents=[batch_parser],
+        help="report the undocumented keys of the config files of a tree",
+        description=(
+            "Check the config files documented under the directories on all the cores,"
+            " print the keys without documentation and the headings documenting no key"
+            " as `path:line:column: message`, exit with 1 if there is any"
+        ),
+    )
+    check_parser.add_argument(
+        "--no-orphans",
+        action="store_true",
+        help="do not report the headings documenting no key",
+    )
+
+    # Parse arguments
+    args = parser.parse_args()
+
+    # Set up logging
+    log_level = getattr(logging, args.log_level)
+    logging.basicConfig(level=log_level, format="%(message)s")
+
+    if args.command is not None:
+        for directory in args.dirs:
+            if not directory.is_dir():
+                parser.error(f"not a directory: {directory}")
+        commands = {"index": index_command, "check": check_command}
+        sys.exit(commands[args.command](args))
+
+    from .lsp import serve
+
+    serve(args)
@@ -0,0 +1,156 @@
+"""
+Warnings for the keys of the open config files that have no documentation.
+
+Checking a whole file on each keystroke would resolve every key again, so
+`KeyDiagnostics` keeps the keys of each line together with the line they
+depend on (see `KeyResolver.enclosing`). `changed` forgets the edited lines
+and `update` only resolves the lines edited since the last update, or whose
+enclosing line changed or was resolved again, e.g. the keys nested under a
+renamed one. Past the last edited line the update stops at the first line
+that keeps its keys and `settles` (see `KeyResolver.settles`), the lines
+after it keep theirs: an edit costs the lines up to where the structure of
+the file is the same as before it, not the rest of the file. Whether a key
+is documented is tested on the cached `Document` (see `Document.documents`)
+once per path, the keys of the lines that did not change are tested again
+only when the document changed, either replaced or patched in place by an
+edit of its buffer (see `Document.revision`).
+
+The server publishes the warnings after `DEBOUNCE_DELAY` seconds without
+changes, see `doc_lsp.live`.
+"""
+
+from typing import Optional
+
+from .parser import Document
+from .resolvers import KeyResolver
+
+# (line, start, end, path) of an undocumented key, end is exclusive
+Problem = tuple[int, int, int, tuple[str, ...]]
+
+
+class _Line:
+    """Keys of a line, as (start, end, path), and the `enclosing` they were resolved with."""
+
+    __slots__ = ("keys", "enclosing", "problems")
+
+    def __init__(self, keys: list[tuple[int, int, tuple[str, ...]]], enclosing):
+        self.keys = keys
+        self.enclosing = enclosing
+        self.problems: Optional[list[Problem]] = None  # None until tested
+
+
+class KeyDiagnostics:
+    """Undocumented keys of a text document, kept up to date line by line.
+
+    The resolver is the one of the document, `changed` must be called with
+    each edit applied to its lines, after `resolver.changed`.
+    """
+
+    def __init__(self, resolver: KeyResolver):
+        self.resolver = resolver
+        self._lines: list[Optional[_Line]] = [None] * len(resolver.lines)
+        self._first_changed = 0  # lines before it are up to date
+        self._last_changed = (
+            len(self._lines) - 1
+        )  # lines after it may be kept, -1 if none
+        self._document: Optional[tuple[Document, int]] = None  # and its revision
+        self._documented: dict[tuple[str, ...], bool] = {}
+        self.resolved = 0  # lines resolved, reset by `check`
+
+    def changed(self, start_line: int, end_line: int, new_end_line: int) -> None:
+        """Forget the keys of the edited lines."""
+        self._lines[start_line : end_line + 1] = [None] * (
+            new_end_line - start_line + 1
+        )
+        self._first_changed = min(self._first_changed, start_line)
+        if self._last_changed > end_line:
+            self._last_changed += new_end_line - end_line
+        self._last_changed = max(self._last_changed, new_end_line)
+
+    def update(self, document: Document, count: Optional[int] = None) -> bool:
+        """Resolve and test the next `count` lines that may have changed, all of
+        them by default, return True when all the lines are up to date.
+
+        Big files are updated a few lines at a time, edits in between are fine.
+        """
+        lines = self._lines
+        if (
+            self._document is None
+            or document is not self._document[0]
+            or document.revision != self._document[1]
+        ):
+            self._document = (document, document.revision)
+            self._documented = {}
+            for entry in lines:
+                if entry is not None:
+                    entry.problems = None
+            self._first_changed = 0
+            self._last_changed = len(lines) - 1  # each line is tested again
+
+        resolver = self.resolver
+        stop = (
+            len(lines)
+            if count is None
+            else min(self._first_changed + count, len(lines))
+        )
+        for index in range(self._first_changed, stop):
+            entry = lines[index]
+            enclosing = resolver.enclosing(index)
+            # Identity of the enclosing line entry, a new one was resolved again
+            if enclosing is not None:
+                enclosing = (lines[enclosing[0]], enclosing[1])
+            if entry is None or entry.enclosing != enclosing:
+                entry = lines[index] = _Line(self._resolve(index), enclosing)
+                self.resolved += 1
+            elif index > self._last_changed and resolver.settles(index):
+                # The lines after it are the same as before the edits
+                stop = len(lines)
+                break
+            if entry.problems is None:
+                entry.problems = [
+                    (index, start, end, path)
+                    for start, end, path in entry.keys
+                    if not self._documents(path)
+                ]
+        self._first_changed = stop
+        if stop == len(lines):
+            self._last_changed = -1
+        else:
+            # The lines after `stop` are not updated yet, from before the edits
+            self._last_changed = max(self._last_changed, stop - 1)
+        return stop == len(lines)
+
+    def problems(self) -> list[Problem]:
+        """The undocumented keys found by `update`, in order."""
+        problems = []
+        for index, entry in enumerate(self._lines[: self._first_changed]):
+            if entry.problems:
+                if entry.problems[0][0] != index:
+                    # The line moved
+                    entry.problems = [
+                        (index, *problem[1:]) for problem in entry.problems
+                    ]
+                problems.extend(entry.problems)
+        return problems
+
+    def check(self, document: Document) -> list[Problem]:
+        """Update all the lines and return the undocumented keys."""
+        self.resolved = 0
+        self.update(document)
+        return self.problems()
+
+    def _resolve(self, index: int) -> list[tuple[int, int, tuple[str, ...]]]:
+        text = self.resolver.lines[index]
+        keys = []
+        for start, path in self.resolver.line_keys(index):
+            end = start + len(path[-1])
+            if text[start : start + 1] in ("'", '"'):
+                end += 2
+            keys.append((start, end, tuple(path)))
+        return keys
+
+    def _documents(self, path: tuple[str, ...]) -> bool:
+        documented = self._documented.get(path)
+        if documented is None:
+            documented = self._documented[path] = self._document[0].documents(path)
+        return documented
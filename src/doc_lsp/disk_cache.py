@@ -0,0 +1,155 @@
+"""
+Persistent cache of parsed documentation files.
+
+A fresh `doc-lsp` process can serve the first hover from the parse stored by
+a previous one, without parsing the documentation file again.
+
+Each documentation file is stored on its own file under the cache dir, named
+after the hash of its path. Entries are marshaled tuples (no code is executed
+when loading them) with the variables in columns:
+
+    (FORMAT, path, size, mtime, content_hash, names, docs, paths, lines, patterns)
+
+An entry is used when the size and mtime of the file match, or when only the
+mtime changed but the content hash is the same (e.g. a fresh checkout).
+Changes to `PARSER_VERSION`, this format or the Python version (marshal is
+version specific) discard all the entries.
+"""
+
+import hashlib
+import logging
+import marshal
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+
+from .parser import PARSER_VERSION, Document, Variable
+
+FORMAT = ("doc-lsp", 3, PARSER_VERSION, sys.version_info[:2])
+
+
+def default_cache_dir() -> Path:
+    """The user cache dir for doc-lsp, following the platform conventions."""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+        return Path(base) / "doc-lsp" / "Cache"
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "doc-lsp"
+
+
+def content_hash(content: str) -> bytes:
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).digest()
+
+
+def file_hash(doc_file: Path) -> bytes:
+    """`content_hash` of the file, read in chunks (line ends are not translated)."""
+    with open(doc_file, "rb") as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).digest()
+
+
+def dump_document(document: Document) -> tuple:
+    """Columns of the document variables, see `load_document`."""
+    entries = document.entries
+    return (
+        [var.name for var in entries],
+        [var.doc for var in entries],
+        [var.path for var in entries],
+        [var.line for var in entries],
+        [var.pattern for var in entries],
+    )
+
+
+def load_document(columns: tuple) -> Document:
+    """Create the document from the columns made by `dump_document`."""
+    names, docs, paths, lines, patterns = columns
+    return Document(
+        [
+            Variable(name=name, doc=doc, path=path, line=line, pattern=pattern)
+            for name, doc, path, line, pattern in zip(
+                names, docs, paths, lines, patterns
+            )
+        ]
+    )
+
+
+class DiskCache:
+    """Parsed documents stored under `cache_dir`, keyed by file path."""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+
+    def _entry_path(self, doc_file: Path) -> Path:
+        name = hashlib.blake2b(str(doc_file).encode(), digest_size=16).hexdigest()
+        return self.cache_dir / f"{name}.bin"
+
+    def load(self, doc_file: Path, stat: os.stat_result) -> Optional[Document]:
+        """Get the stored document if it was parsed from the same file content."""
+        entry_path = self._entry_path(doc_file)
+        try:
+            entry = marshal.loads(entry_path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.debug(f"Ignoring cache entry {entry_path}: {e}")
+            return None
+
+        if (
+            not isinstance(entry, tuple)
+            or len(entry) != 10
+            or entry[0] != FORMAT
+            or entry[1] != str(doc_file)
+            or entry[2] != stat.st_size
+        ):
+            return None
+
+        if entry[3] != stat.st_mtime:
+            # Same size, check if the content changed
+            try:
+                if file_hash(doc_file) != entry[4]:
+                    return None
+            except OSError:
+                return None
+            self._write(entry_path, (*entry[:3], stat.st_mtime, *entry[4:]))
+
+        return load_document(entry[5:])
+
+    def store(
+        self,
+        doc_file: Path,
+        stat: os.stat_result,
+        content: Optional[str],
+        document: Document,
+    ) -> None:
+        """Store the document parsed from `content`, the file had this stat().
+
+        `content` is None when the document was streamed from the file, which
+        is then read again to hash it.
+        """
+        try:
+            digest = (
+                content_hash(content) if content is not None else file_hash(doc_file)
+            )
+        except OSError as e:
+            logging.debug(f"Not caching {doc_file}: {e}")
+            return
+        entry = (
+            FORMAT,
+            str(doc_file),
+            stat.st_size,
+            stat.st_mtime,
+            digest,
+            *dump_document(document),
+        )
+        self._write(self._entry_path(doc_file), entry)
+
+    def _write(self, entry_path: Path, entry: tuple) -> None:
+        # Write to a temporary file and rename, so readers never see half an entry
+        tmp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(marshal.dumps(entry))
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            logging.debug(f"Could not write cache entry {entry_path}: {e}")
+            tmp_path.unlink(missing_ok=True)
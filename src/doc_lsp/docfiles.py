@@ -0,0 +1,56 @@
+"""
+Locating the companion docs (`<file>.<ext>.md`) of the supported files.
+
+Shared by the server and the batch commands, it only needs the standard
+library so the commands do not import the language server.
+"""
+
+import os
+from pathlib import Path
+from typing import Iterable
+
+# Supported file extensions
+SUPPORTED_EXTENSIONS = {
+    ".py",
+    ".json",
+    ".yaml",
+    ".yml",
+    ".toml",
+    ".ini",
+    ".conf",
+    ".properties",
+}
+
+# Directories never searched for documentation files, besides hidden ones
+SKIP_DIRS = {"node_modules", "__pycache__", "venv"}
+
+
+def canonical_path(path: Path) -> Path:
+    """The absolute path with the symlinks and `..` of its directory resolved.
+
+    The file keeps its name, companion docs are next to the name the config
+    file is opened with and may not exist yet.
+    """
+    return Path(os.path.realpath(path.parent)) / path.name
+
+
+def find_doc_files(roots: Iterable[Path], extensions: Iterable[str]) -> list[Path]:
+    """Find the companion docs of files with the given extensions under `roots`."""
+    suffixes = tuple(f"{ext}.md" for ext in extensions)
+    doc_files = []
+    seen = set()
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [
+                name
+                for name in dirnames
+                if not name.startswith(".") and name not in SKIP_DIRS
+            ]
+            for filename in filenames:
+                # A bare ".py.md" documents nothing
+                if filename.endswith(suffixes) and not filename.startswith(suffixes):
+                    doc_file = Path(dirpath) / filename
+                    if doc_file not in seen:
+                        seen.add(doc_file)
+                        doc_files.append(doc_file)
+    return doc_files
@@ -0,0 +1,159 @@
+"""
+Background indexing of the documentation files of the workspace.
+
+After `initialized` the workspace folders are searched for companion docs
+(`<file>.<ext>.md`) and they are parsed one by one on a background thread,
+so the first hover on each file finds its documentation already cached.
+The roots are resolved like the paths of the requests (see
+`docfiles.canonical_path`), the documents are cached under the keys hover
+looks them up with, and the files a request is parsing are skipped.
+Progress is reported with `$/progress` when the client supports it.
+
+Indexing stops when the cache is full, parsing more files would only evict
+the ones indexed before.
+"""
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Container, Iterable, Optional
+
+from lsprotocol import types
+from pygls.capabilities import get_capability
+from pygls.lsp.server import LanguageServer
+
+from .cache import DocCache
+from .docfiles import find_doc_files
+from .parser import Document
+
+PROGRESS_TOKEN = "doc-lsp-index"
+
+
+class WorkspaceIndexer:
+    """Parse the documentation files of the workspace into `cache`.
+
+    `read` runs on the background thread, it returns the mtime and the parsed
+    document of a file, or None if it can not be read. The files in `pending`
+    are being parsed for a request, they are not read again.
+    """
+
+    def __init__(
+        self,
+        cache: DocCache,
+        read: Callable[[Path], Optional[tuple[float, Document]]],
+        pending: Container[str] = (),
+    ):
+        self.cache = cache
+        self.read = read
+        self.pending = pending
+        self.task: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="doc-lsp-index"
+        )
+
+    def start(
+        self, ls: LanguageServer, roots: list[Path], extensions: Iterable[str]
+    ) -> None:
+        """Index the workspace in the background, replacing a running indexing."""
+        self.stop()
+        self.task = asyncio.get_running_loop().create_task(
+            self.run(ls, roots, extensions)
+        )
+        self.task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"Error indexing the workspace: {task.exception()}")
+
+    def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def run(
+        self, ls: LanguageServer, roots: list[Path], extensions: Iterable[str]
+    ) -> int:
+        """Index the workspace, return the number of files parsed."""
+        loop = asyncio.get_running_loop()
+        # Symlinks and `..` resolved like `canonical_path`, the directory of each file
+        roots = [Path(os.path.realpath(root)) for root in roots]
+        doc_files = await loop.run_in_executor(
+            self._executor, find_doc_files, roots, list(extensions)
+        )
+        if not doc_files:
+            return 0
+
+        progress = await self._begin(ls, len(doc_files))
+        indexed = percentage = 0
+        evictions = self.cache.evictions
+        try:
+            for count, doc_file in enumerate(doc_files, 1):
+                if (
+                    progress
+                    and ls.work_done_progress.tokens[PROGRESS_TOKEN].cancelled()
+                ):
+                    logging.info("Indexing cancelled by the client")
+                    break
+
+                # A request may have parsed it already, or be parsing it
+                key = str(doc_file)
+                if key not in self.cache and key not in self.pending:
+                    result = await loop.run_in_executor(
+                        self._executor, self.read, doc_file
+                    )
+                    if result is not None:
+                        self.cache.put(key, *result)
+                        indexed += 1
+                        if self.cache.evictions != evictions:
+                            logging.info(
+                                f"Cache full, indexed {count} of {len(doc_files)} files"
+                            )
+                            break
+
+                # One report per percent, huge workspaces would flood the client
+                if progress and count * 100 // len(doc_files) != percentage:
+                    percentage = count * 100 // len(doc_files)
+                    ls.work_done_progress.report(
+                        PROGRESS_TOKEN,
+                        types.WorkDoneProgressReport(
+                            message=f"{count}/{len(doc_files)} {doc_file.name}",
+                            percentage=percentage,
+                        ),
+                    )
+        finally:
+            if progress:
+                ls.work_done_progress.end(
+                    PROGRESS_TOKEN, types.WorkDoneProgressEnd(message="Done")
+                )
+                ls.work_done_progress.tokens.pop(PROGRESS_TOKEN, None)
+
+        logging.info(
+            f"Indexed {indexed} documentation files, cache: {self.cache.stats()}"
+        )
+        return indexed
+
+    async def _begin(self, ls: LanguageServer, total: int) -> bool:
+        """Start reporting progress, return False if the client does not support it."""
+        if not get_capability(
+            ls.client_capabilities, "window.work_done_progress", False
+        ):
+            return False
+
+        try:
+            await ls.work_done_progress.create_async(PROGRESS_TOKEN)
+        except Exception as e:
+            logging.debug(f"Progress not available: {e}")
+            return False
+
+        ls.work_done_progress.begin(
+            PROGRESS_TOKEN,
+            types.WorkDoneProgressBegin(
+                title="Indexing documentation",
+                message=f"{total} files",
+                percentage=0,
+                cancellable=True,
+            ),
+        )
+        return True
@@ -0,0 +1,43 @@
+"""
+Lines of the text documents open on the editor.
+
+Hover and completion only need the line under the cursor, splitting the
+whole config file on every request is slow for big files. The lines are
+split once on `didOpen` and each `didChange` only replaces the changed ones.
+"""
+
+from lsprotocol import types
+from pygls.workspace import PositionCodec
+
+
+def split_lines(text: str) -> list[str]:
+    return text.split("\n")
+
+
+def apply_change(
+    lines: list[str],
+    change: types.TextDocumentContentChangeEvent,
+    codec: PositionCodec,
+) -> tuple[int, int, int]:
+    """Apply a `didChange` content change to the lines, in place.
+
+    Return the changed lines as (start_line, end_line, new_end_line),
+    `end_line` before the change and `new_end_line` after it.
+    """
+    change_range = getattr(change, "range", None)
+    if change_range is None:
+        end_line = len(lines) - 1
+        lines[:] = split_lines(change.text)
+        return 0, end_line, len(lines) - 1
+
+    # Convert the client units (usually UTF-16) to str indexes
+    change_range = codec.range_from_client_units(lines, change_range)
+    start, end = change_range.start, change_range.end
+    text = (
+        lines[start.line][: start.character]
+        + change.text
+        + lines[end.line][end.character :]
+    )
+    new_lines = split_lines(text)
+    lines[start.line : end.line + 1] = new_lines
+    return start.line, end.line, start.line + len(new_lines) - 1
@@ -0,0 +1,159 @@
+"""
+Documentation parsed from the `.md` buffers open on the editor.
+
+When the user edits a documentation file the hover on the config file must
+reflect the buffer without waiting for the file to be saved.
+Each `didChange` only records the changed line range, after `DEBOUNCE_DELAY`
+seconds without changes the buffer is re-parsed:
+
+- incrementally on the event loop when the edit allows (see `reparse_document`),
+  this takes a few milliseconds even on huge files.
+- with a full parse on a background thread otherwise, requests keep being
+  served with the previous document until it finishes.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from lsprotocol import types
+
+from .parser import Document, parse_document, reparse_document
+
+# Seconds without changes before the buffer is parsed again
+DEBOUNCE_DELAY = 0.3
+
+# Line range (start_line, end_line, new_end_line) changed since the last parse,
+# FULL_EDIT when the whole buffer was replaced
+Edit = tuple[int, int, int]
+FULL_EDIT = (-1, -1, -1)
+
+
+def merge_edits(edit: Optional[Edit], change: Edit) -> Edit:
+    """Merge a change, in the lines after `edit`, into a single edit."""
+    if edit is None:
+        return change
+    if edit == FULL_EDIT or change == FULL_EDIT:
+        return FULL_EDIT
+
+    start, end, new_end = edit
+    change_start, change_end, change_new_end = change
+    # Map the end of the change back to the lines before `edit`
+    end = max(end, change_end - (new_end - end))
+    if new_end > change_end:
+        new_end += change_new_end - change_end
+    else:
+        new_end = change_new_end
+    return min(start, change_start), end, new_end
+
+
+def change_edit(change: types.TextDocumentContentChangeEvent) -> Edit:
+    """Get the changed line range of a `didChange` content change."""
+    change_range = getattr(change, "range", None)
+    if change_range is None:
+        return FULL_EDIT
+    start_line = change_range.start.line
+    return start_line, change_range.end.line, start_line + change.text.count("\n")
+
+
+class LiveDocument:
+    """State of an open documentation buffer."""
+
+    __slots__ = ("source", "document", "edit", "timer", "parsing")
+
+    def __init__(self, source: Callable[[], str]):
+        self.source = source  # returns the current text of the buffer
+        self.document: Optional[Document] = None
+        self.edit: Optional[Edit] = FULL_EDIT  # pending edit, None if up to date
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.parsing = False  # True while a full parse runs in the background
+
+
+class LiveDocuments:
+    """Parsed documentation of the open `.md` buffers, keyed by file path."""
+
+    def __init__(self, debounce: float = DEBOUNCE_DELAY):
+        self.debounce = debounce
+        self._docs: dict[str, LiveDocument] = {}
+        # Called with the key of a buffer when its document was parsed again
+        self.on_update: Optional[Callable[[str], None]] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="doc-lsp")
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._docs
+
+    def get(self, key: str) -> Optional[Document]:
+        """Get the last parsed document of the buffer, None if not parsed yet."""
+        live = self._docs.get(key)
+        return live.document if live is not None else None
+
+    def open(self, key: str, source: Callable[[], str]) -> None:
+        """Start tracking a buffer, it is parsed right away in the background."""
+        self.close(key)
+        live = self._docs[key] = LiveDocument(source)
+        self._flush(key, live)
+
+    def change(
+        self, key: str, changes: list[types.TextDocumentContentChangeEvent]
+    ) -> None:
+        """Record the changes of the buffer and schedule a parse."""
+        live = self._docs.get(key)
+        if live is None:
+            return
+
+        for change in changes:
+            live.edit = merge_edits(live.edit, change_edit(change))
+
+        if live.timer is not None:
+            live.timer.cancel()
+        live.timer = asyncio.get_running_loop().call_later(
+            self.debounce, self._flush, key, live
+        )
+
+    def close(self, key: str) -> None:
+        """Stop tracking a buffer, the file on disk is used again."""
+        live = self._docs.pop(key, None)
+        if live is not None and live.timer is not None:
+            live.timer.cancel()
+
+    def _flush(self, key: str, live: LiveDocument) -> None:
+        """Parse the pending edit of the buffer."""
+        live.timer = None
+        if live.edit is None or live.parsing or self._docs.get(key) is not live:
+            return
+
+        edit, live.edit = live.edit, None
+        text = live.source()
+
+        if live.document is not None and edit != FULL_EDIT:
+            document = reparse_document(live.document, text, *edit, full_parse=False)
+            if document is not None:
+                live.document = document
+                self._updated(key)
+                return
+
+        live.parsing = True
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, parse_document, text
+        )
+        future.add_done_callback(lambda future: self._parsed(key, live, future))
+
+    def _parsed(self, key: str, live: LiveDocument, future: asyncio.Future) -> None:
+        """Store the result of a background parse."""
+        live.parsing = False
+        try:
+            live.document = future.result()
+        except Exception as e:
+            logging.error(f"Error parsing {key}: {e}")
+            live.edit = FULL_EDIT
+            return
+        self._updated(key)
+
+        # Changes that arrived while parsing were not flushed yet
+        if live.edit is not None and live.timer is None:
+            self._flush(key, live)
+
+    def _updated(self, key: str) -> None:
+        if self.on_update is not None and self._docs.get(key) is not None:
+            self.on_update(key)
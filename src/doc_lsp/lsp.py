@@ -0,0 +1,901 @@
+"""
+The language server: the LSP features, the caches they share and `serve`,
+started by the `doc-lsp` command (see `doc_lsp.cli`).
+"""
+
+import argparse
+import asyncio
+import contextvars
+import functools
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Sequence, Union
+from urllib.parse import unquote, urlparse
+
+from lsprotocol import types
+from pygls.capabilities import get_capability
+from pygls.lsp.server import LanguageServer
+
+from .cache import DocCache, StatCache
+from .check import key_resolver
+from .diagnostics import KeyDiagnostics
+from .disk_cache import DiskCache
+from .docfiles import SUPPORTED_EXTENSIONS, canonical_path
+from .indexer import WorkspaceIndexer
+from .lines import apply_change, split_lines
+from .live import DEBOUNCE_DELAY, LiveDocuments
+from .parser import Document, Variable
+from .pool import ParsePool, read_documentation
+from .prebuilt import PrebuiltIndex
+from .profiling import Profiler
+from .resolvers import RESOLVERS, KeyPath, KeyResolver
+from .stats import Timings, log_stats
+
+
+def uri_to_path(uri: str) -> Path:
+    """Convert a file URI to a Path object, handling Windows paths correctly.
+
+    The directory is resolved (see `canonical_path`), the same file opened
+    through a symlink or found by the indexer has the same cache keys.
+    """
+    parsed = urlparse(uri)
+    path_str = unquote(parsed.path)
+
+    # Handle Windows paths (remove leading slash if it's a Windows drive path)
+    if (
+        os.name == "nt"
+        and path_str.startswith("/")
+        and len(path_str) > 2
+        and path_str[2] == ":"
+    ):
+        path_str = path_str[1:]
+
+    return canonical_path(Path(path_str))
+
+
+server = LanguageServer("doc-lsp", "v1")
+
+# Cache for parsed markdown documents, bounded and evicted in LRU order
+_doc_cache = DocCache()
+
+# mtime of the documentation files, or None for "no companion doc"
+_stat_cache = StatCache()
+
+# Parsed documents persisted across server runs, enabled with --cache-dir
+_disk_cache: Optional[DiskCache] = None
+
+# Documentation files parsed by `doc-lsp index`, enabled with --index-file
+_prebuilt_index: Optional[PrebuiltIndex] = None
+
+# Process pool parsing the documentation files, None parses on the server thread
+_parse_pool: Optional[ParsePool] = None
+
+# Parses of documentation files when there is no process pool
+_parse_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="doc-lsp-parse")
+
+# Parses running in the background, so concurrent requests wait for the same one
+_pending_parses: dict[str, asyncio.Task] = {}
+
+# Id of the latest request of each (feature, document), see `coalesce`
+_latest_requests: dict[tuple[str, str], int] = {}
+_request_ids = itertools.count()
+_current_request: contextvars.ContextVar[tuple[tuple[str, str], int]] = (
+    contextvars.ContextVar("doc_lsp_request")
+)
+
+# Lines of the open text documents, keyed by uri
+_open_lines: dict[str, list[str]] = {}
+
+# Key path resolvers of the open documents, keyed by uri
+_resolvers: dict[str, KeyResolver] = {}
+
+# Lines resolved per step when warming up the resolver of an opened document
+WARM_UP_LINES = 2000
+
+# Documentation parsed from the .md buffers open on the editor
+_live_docs = LiveDocuments()
+
+# Undocumented keys of the open config files, keyed by uri, see `publish_diagnostics`
+_diagnostics: dict[str, KeyDiagnostics] = {}
+_diagnostics_timers: dict[str, asyncio.TimerHandle] = {}
+
+# Lines checked per step when publishing the diagnostics of a document
+DIAGNOSTICS_LINES = 1000
+
+# Latency histograms of the requests and the steps they go through
+_timings = Timings()
+
+# Seconds between logging the stats at DEBUG level, 0 to disable
+stats_interval = 0.0
+_stats_task: Optional[asyncio.Task] = None
+
+# Custom request returning `stats_snapshot()`
+STATS_REQUEST = "docLsp/stats"
+
+# cProfile and tracemalloc, enabled with --profile-out and --trace-memory
+_profiler = Profiler()
+
+# Custom request writing the profile files, see `doc_lsp.profiling`
+DUMP_PROFILE_REQUEST = "docLsp/dumpProfile"
+
+# Parse the documentation files of the workspace in the background
+index_workspace = True
+
+# Parse only the headings of the documentation files, the docs are read when shown
+lazy_docs = False
+
+# Warn about the keys of the open config files that have no documentation
+key_diagnostics = False
+
+# Maximum number of completion items returned, None means unlimited
+max_completion_items: Optional[int] = None
+
+
+def get_word_at_position(
+    text: Union[str, Sequence[str]], line: int, character: int
+) -> Optional[str]:
+    """Extract the word/variable at the given position.
+
+    `text` is the document or its lines, the server passes the lines it
+    keeps for each open document instead of splitting it on each request.
+    """
+    lines = split_lines(text) if isinstance(text, str) else text
+    if line >= len(lines):
+        return None
+
+    line_text = lines[line]
+    if character > len(line_text):
+        return None
+
+    # Find word boundaries (alphanumeric and underscore)
+    # Also include dots for nested variables like DATABASES.default.NAME
+    start = character
+    end = character
+
+    # Find start of word
+    while start > 0 and (
+        line_text[start - 1].isalnum() or line_text[start - 1] in "_."
+    ):
+        start -= 1
+
+    # Find end of word
+    while end < len(line_text) and (line_text[end].isalnum() or line_text[end] in "_."):
+        end += 1
+
+    word = line_text[start:end].strip()
+
+    # Remove leading/trailing dots
+    word = word.strip(".")
+
+    return word if word else None
+
+
+def get_prefix_at_position(
+    text: Union[str, Sequence[str]], line: int, character: int
+) -> Optional[str]:
+    """Extract the partial word/variable prefix at the given position for completion.
+
+    `text` is the document or its lines, see `get_word_at_position`.
+    """
+    lines = split_lines(text) if isinstance(text, str) else text
+    if line >= len(lines):
+        return None
+
+    line_text = lines[line]
+    if character > len(line_text):
+        return None
+
+    # Find start of current word being typed
+    start = character
+
+    # Move back to find the start of the current word
+    while start > 0 and (
+        line_text[start - 1].isalnum() or line_text[start - 1] in "_."
+    ):
+        start -= 1
+
+    # Get the prefix from start to current position
+    prefix = line_text[start:character].strip()
+
+    # Remove leading/trailing dots
+    prefix = prefix.strip(".")
+
+    return prefix if prefix else None
+
+
+@_timings.timed("get_doc_file_path")
+def get_doc_file_path(file_uri: str) -> Optional[Path]:
+    """Get the corresponding .md documentation file path."""
+    file_path = uri_to_path(file_uri)
+
+    # Check if file extension is supported
+    if file_path.suffix not in SUPPORTED_EXTENSIONS:
+        # Check if it's a plain text file (no extension or .txt)
+        if file_path.suffix not in ("", ".txt"):
+            return None
+
+    # Construct the markdown file path
+    doc_file = file_path.parent / f"{file_path.name}.md"
+
+    if str(doc_file) in _live_docs or _stat_cache.stat(doc_file) is not None:
+        return doc_file
+
+    return None
+
+
+@_timings.timed("load_documentation")
+async def load_documentation(doc_file: Path) -> Optional[Document]:
+    """Load the documentation file, parsing it in the background if needed.
+
+    The file is parsed on the process pool if enabled, on a thread otherwise,
+    the event loop keeps serving other requests meanwhile.
+    """
+    file_key = str(doc_file)
+
+    # Open buffers have the most recent documentation, even if not saved
+    document = _live_docs.get(file_key)
+    if document is not None:
+        return document
+
+    # Check cache first
+    stat = _stat_cache.stat(doc_file)
+    if stat is None:
+        return None
+
+    document = _doc_cache.get(file_key, stat.st_mtime)
+    if document is not None:
+        return document
+
+    task = _pending_parses.get(file_key)
+    if task is None:
+        task = _pending_parses[file_key] = asyncio.ensure_future(
+            _parse_in_background(doc_file)
+        )
+        task.add_done_callback(lambda _: _pending_parses.pop(file_key, None))
+
+    # A cancelled request must not cancel the parse other requests wait for
+    return await asyncio.shield(task)
+
+
+async def reload_documentation(doc_file: Path) -> Optional[Document]:
+    """Load the documentation file again, e.g. its lazy docs can not be read
+    because it was modified in place since it was mapped."""
+    file_key = str(doc_file)
+    logging.debug(f"Reloading {doc_file.name}")
+    _stat_cache.invalidate(file_key)
+    _doc_cache.invalidate(file_key)
+    return await load_documentation(doc_file)
+
+
+async def _parse_in_background(doc_file: Path) -> Optional[Document]:
+    loop = asyncio.get_running_loop()
+    result = None
+    if _prebuilt_index is not None and _parse_pool is not None:
+        # Checked on the thread, only the files not indexed go to the pool
+        result = await loop.run_in_executor(_parse_executor, _read_prebuilt, doc_file)
+
+    if result is None and _parse_pool is not None:
+        start = time.perf_counter()
+        try:
+            result = await _parse_pool.read_async(doc_file, _disk_cache)
+        except Exception as e:
+            logging.error(f"Error parsing {doc_file}: {e}")
+            return None
+        finally:
+            _timings.record("parse_document", time.perf_counter() - start)
+    elif result is None:
+        result = await loop.run_in_executor(_parse_executor, _read_file, doc_file)
+        if result is None:
+            return None
+
+    mtime, document = result
+    _doc_cache.put(str(doc_file), mtime, document)
+    logging.debug(f"Parsed {doc_file.name}, cache: {_doc_cache.stats()}")
+    return document
+
+
+@_timings.timed("load_prebuilt")
+def _read_prebuilt(doc_file: Path) -> Optional[tuple[float, Document]]:
+    """The mtime and document of the file from the prebuilt index, if it is indexed."""
+    try:
+        stat = doc_file.stat()
+    except OSError:
+        return None
+    document = _prebuilt_index.load(doc_file, stat)
+    return (stat.st_mtime, document) if document is not None else None
+
+
+@_timings.timed("parse_document")
+def _read_file(doc_file: Path) -> Optional[tuple[float, Document]]:
+    """Read a documentation file off the event loop, return its mtime and document."""
+    if _prebuilt_index is not None:
+        result = _read_prebuilt(doc_file)
+        if result is not None:
+            return result
+    try:
+        if _parse_pool is not None:
+            return _parse_pool.read(doc_file, _disk_cache)
+        stat = doc_file.stat()
+        return stat.st_mtime, read_documentation(doc_file, stat, _disk_cache, lazy_docs)
+    except Exception as e:
+        logging.error(f"Error parsing {doc_file}: {e}")
+        return None
+
+
+_indexer = WorkspaceIndexer(_doc_cache, _read_file, _pending_parses)
+
+
+def workspace_roots(ls: LanguageServer) -> list[Path]:
+    """Directories of the workspace folders, or the root path of older clients."""
+    roots = [uri_to_path(folder.uri) for folder in ls.workspace.folders.values()]
+    if not roots and ls.workspace.root_path:
+        roots.append(Path(ls.workspace.root_path))
+    return roots
+
+
+@server.feature(types.INITIALIZE)
+def initialize(ls: LanguageServer, params: types.InitializeParams):
+    """Initialize the server with capabilities."""
+    # The server will automatically handle capabilities
+    configure(params.initialization_options)
+
+
+def configure(options: Optional[dict]):
+    """Apply the settings sent by the client as initializationOptions.
+
+    Settings not sent keep the value given on the command line.
+
+    ```json
+    {"maxCompletionItems": 100, "cacheMaxEntries": 64, "cacheMaxBytes": 67108864,
+     "statInterval": 5, "cacheDir": "~/.cache/doc-lsp", "indexWorkspace": true,
+     "parseWorkers": 4, "statsInterval": 60, "lazyDocs": true,
+     "indexFile": "doc-lsp-index.jsonl", "diagnostics": true}
+    ```
+    """
+    if not isinstance(options, dict):
+        return
+
+    global max_completion_items
+    if "maxCompletionItems" in options:
+        max_completion_items = options["maxCompletionItems"] or None
+
+    global index_workspace
+    if "indexWorkspace" in options:
+        index_workspace = bool(options["indexWorkspace"])
+
+    if "statInterval" in options:
+        _stat_cache.interval = options["statInterval"]
+
+    global _disk_cache
+    if options.get("cacheDir"):
+        _disk_cache = DiskCache(Path(options["cacheDir"]).expanduser())
+
+    if "parseWorkers" in options:
+        set_parse_workers(options["parseWorkers"] or 0)
+
+    if options.get("indexFile"):
+        set_index_file(Path(options["indexFile"]).expanduser())
+
+    global lazy_docs
+    if "lazyDocs" in options:
+        lazy_docs = bool(options["lazyDocs"])
+
+    global key_diagnostics
+    if "diagnostics" in options:
+        key_diagnostics = bool(options["diagnostics"])
+
+    global stats_interval
+    if "statsInterval" in options:
+        stats_interval = options["statsInterval"] or 0.0
+
+    # 0 or null means unlimited
+    _doc_cache.configure(
+        max_entries=options.get("cacheMaxEntries", _doc_cache.max_entries) or None,
+        max_bytes=options.get("cacheMaxBytes", _doc_cache.max_bytes) or None,
+    )
+
+
+def set_parse_workers(workers: int) -> None:
+    """Parse on a pool of `workers` processes, 0 parses on the server thread."""
+    global _parse_pool
+    if _parse_pool is not None:
+        if _parse_pool.workers == workers:
+            return
+        _parse_pool.shutdown()
+        _parse_pool = None
+    if workers > 0:
+        _parse_pool = ParsePool(workers)
+
+
+def set_index_file(index_file: Path) -> None:
+    """Serve the documentation files indexed on `index_file`, see `doc_lsp.prebuilt`."""
+    global _prebuilt_index
+    try:
+        index = PrebuiltIndex(index_file)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Not using the index file {index_file}: {e}")
+        return
+    if _prebuilt_index is not None:
+        _prebuilt_index.close()
+    _prebuilt_index = index
+    logging.info(
+        f"Loaded the index of {len(index)} documentation files from {index_file}"
+    )
+
+
+@server.feature(types.INITIALIZED)
+async def initialized(ls: LanguageServer, params: types.InitializedParams):
+    """Index the workspace and ask the client to watch the documentation files."""
+    if index_workspace:
+        _indexer.start(ls, workspace_roots(ls), SUPPORTED_EXTENSIONS)
+
+    global _stats_task
+    if stats_interval > 0:
+        _stats_task = asyncio.ensure_future(log_stats(stats_interval, stats_snapshot))
+
+    if not get_capability(
+        ls.client_capabilities,
+        "workspace.did_change_watched_files.dynamic_registration",
+        False,
+    ):
+        return
+
+    try:
+        await ls.client_register_capability_async(
+            types.RegistrationParams(
+                registrations=[
+                    types.Registration(
+                        id="doc-lsp-watch-md",
+                        method=types.WORKSPACE_DID_CHANGE_WATCHED_FILES,
+                        register_options=types.DidChangeWatchedFilesRegistrationOptions(
+                            watchers=[types.FileSystemWatcher(glob_pattern="**/*.md")]
+                        ),
+                    )
+                ]
+            )
+        )
+    except Exception as e:
+        logging.info(f"Watching files not available, polling instead: {e}")
+        return
+
+    # From now on the file events tell when documentation files change
+    _stat_cache.watching = True
+    _stat_cache.clear()
+    logging.info("Watching **/*.md for changes")
+
+
+@server.feature(types.SHUTDOWN)
+def shutdown(ls: LanguageServer, params):
+    """Stop the background work before exiting."""
+    _indexer.stop()
+    if _stats_task is not None:
+        _stats_task.cancel()
+    _profiler.stop()
+    set_parse_workers(0)
+    _parse_executor.shutdown(wait=False, cancel_futures=True)
+
+
+@server.feature(types.TEXT_DOCUMENT_DID_OPEN)
+def did_open(ls: LanguageServer, params: types.DidOpenTextDocumentParams):
+    """Split the lines of the document, and track documentation buffers."""
+    uri = params.text_document.uri
+    file_path = uri_to_path(uri)
+    lines = _open_lines[uri] = split_lines(params.text_document.text)
+    _resolvers.pop(uri, None)
+    resolver_class = RESOLVERS.get(file_path.suffix)
+    if resolver_class is not None:
+        resolver = _resolvers[uri] = resolver_class(lines)
+        _warm_up_resolver(uri, resolver)
+
+    if file_path.suffix == ".md":
+        _live_docs.open(
+            str(file_path), lambda: ls.workspace.get_text_document(uri).source
+        )
+    elif key_diagnostics and file_path.suffix in SUPPORTED_EXTENSIONS:
+        # Languages without a resolver for hover are read as `key = value` lines
+        resolver = _resolvers.get(uri) or key_resolver(file_path, lines)
+        _diagnostics[uri] = KeyDiagnostics(resolver)
+        schedule_diagnostics(ls, uri)
+
+
+@server.feature(types.TEXT_DOCUMENT_DID_CHANGE)
+def did_change(ls: LanguageServer, params: types.DidChangeTextDocumentParams):
+    """Update the lines of the document, and schedule a parse of documentation buffers."""
+    uri = params.text_document.uri
+    file_path = uri_to_path(uri)
+
+    lines = _open_lines.get(uri)
+    resolver = _resolvers.get(uri)
+    diagnostics = _diagnostics.get(uri)
+    if lines is not None:
+        # A warm up still running will continue from the edited lines
+        warm_up = resolver is not None and resolver.warm
+        for change in params.content_changes:
+            edit = apply_change(lines, change, ls.workspace.position_codec)
+            if resolver is not None:
+                resolver.changed(*edit)
+            if diagnostics is not None:
+                if diagnostics.resolver is not resolver:
+                    diagnostics.resolver.changed(*edit)
+                diagnostics.changed(*edit)
+        if warm_up:
+            asyncio.get_running_loop().call_later(
+                DEBOUNCE_DELAY, _warm_up_resolver, uri, resolver
+            )
+        if diagnostics is not None:
+            schedule_diagnostics(ls, uri)
+
+    if file_path.suffix == ".md":
+        _live_docs.change(str(file_path), params.content_changes)
+
+
+@server.feature(types.TEXT_DOCUMENT_DID_CLOSE)
+def did_close(ls: LanguageServer, params: types.DidCloseTextDocumentParams):
+    """Forget the closed document, for documentation the file on disk is used."""
+    uri = params.text_document.uri
+    file_path = uri_to_path(uri)
+    _open_lines.pop(uri, None)
+    _resolvers.pop(uri, None)
+
+    if file_path.suffix == ".md":
+        _live_docs.close(str(file_path))
+        documentation_changed(str(file_path))
+    elif _diagnostics.pop(uri, None) is not None:
+        timer = _diagnostics_timers.pop(uri, None)
+        if timer is not None:
+            timer.cancel()
+        # The warnings of a closed file are cleared
+        ls.text_document_publish_diagnostics(
+            types.PublishDiagnosticsParams(uri=uri, diagnostics=[])
+        )
+
+
+def schedule_diagnostics(ls: LanguageServer, uri: str) -> None:
+    """Publish the diagnostics of the document after `DEBOUNCE_DELAY` seconds
+    without changes."""
+    timer = _diagnostics_timers.pop(uri, None)
+    if timer is not None:
+        timer.cancel()
+    _diagnostics_timers[uri] = asyncio.get_running_loop().call_later(
+        DEBOUNCE_DELAY, lambda: asyncio.ensure_future(publish_diagnostics(ls, uri))
+    )
+
+
+def documentation_changed(doc_key: str) -> None:
+    """Publish again the diagnostics of the open config files documented by `doc_key`."""
+    for uri in list(_diagnostics):
+        if f"{uri_to_path(uri)}.md" == doc_key:
+            schedule_diagnostics(server, uri)
+
+
+_live_docs.on_update = documentation_changed
+
+
+@_timings.timed("diagnostics")
+async def publish_diagnostics(ls: LanguageServer, uri: str) -> None:
+    """Warn about the keys of the document without documentation, see `doc_lsp.diagnostics`."""
+    _diagnostics_timers.pop(uri, None)
+    diagnostics = _diagnostics.get(uri)
+    if diagnostics is None:
+        return
+
+    doc_file = get_doc_file_path(uri)
+    document = await load_documentation(doc_file) if doc_file is not None else None
+    # Closed while loading the documentation
+    if _diagnostics.get(uri) is not diagnostics:
+        return
+
+    problems = []
+    if document is not None:
+        # A few lines at a time, requests are served in between on big files
+        while not diagnostics.update(document, DIAGNOSTICS_LINES):
+            await asyncio.sleep(0)
+            # A newer publish was scheduled meanwhile or the file was closed
+            if uri in _diagnostics_timers or _diagnostics.get(uri) is not diagnostics:
+                return
+        problems = diagnostics.problems()
+    lines = diagnostics.resolver.lines
+    codec = ls.workspace.position_codec
+    ls.text_document_publish_diagnostics(
+        types.PublishDiagnosticsParams(
+            uri=uri,
+            diagnostics=[
+                types.Diagnostic(
+                    range=codec.range_to_client_units(
+                        lines,
+                        types.Range(
+                            start=types.Position(line=line, character=start),
+                            end=types.Position(line=line, character=end),
+                        ),
+                    ),
+                    message=f"Undocumented key {'.'.join(path)}",
+                    severity=types.DiagnosticSeverity.Warning,
+                    source="doc-lsp",
+                )
+                for line, start, end, path in problems
+            ],
+        )
+    )
+
+
+def text_lines(ls: LanguageServer, uri: str) -> list[str]:
+    """Lines of the text document, split once when it is open on the editor."""
+    lines = _open_lines.get(uri)
+    if lines is None:
+        lines = split_lines(ls.workspace.get_text_document(uri).source)
+    return lines
+
+
+def _warm_up_resolver(uri: str, resolver: KeyResolver) -> None:
+    """Resolve the lines of an open document a few at a time, between requests."""
+    if _resolvers.get(uri) is resolver and not resolver.warm_up(WARM_UP_LINES):
+        asyncio.get_running_loop().call_soon(_warm_up_resolver, uri, resolver)
+
+
+def key_path_at(
+    ls: LanguageServer, uri: str, line: int, character: int
+) -> Optional[KeyPath]:
+    """Full path of the key at the position, None if unknown for the language."""
+    resolver = _resolvers.get(uri)
+    if resolver is None:
+        resolver_class = RESOLVERS.get(uri_to_path(uri).suffix)
+        if resolver_class is None:
+            return None
+        resolver = resolver_class(text_lines(ls, uri))
+        if uri in _open_lines:
+            _resolvers[uri] = resolver
+
+    if line >= len(resolver.lines):
+        return None
+    return resolver.resolve(line, character)
+
+
+def coalesce(handler):
+    """Drop the requests superseded by a newer request on the same document.
+
+    When the cursor moves quickly only the latest position matters, older
+    requests still waiting for the documentation return None without
+    computing their result. Handlers check with `superseded()` after awaiting.
+    """
+
+    @functools.wraps(handler)
+    async def wrapper(ls: LanguageServer, params):
+        key = (handler.__name__, params.text_document.uri)
+        request_id = _latest_requests[key] = next(_request_ids)
+        token = _current_request.set((key, request_id))
+        try:
+            result = await handler(ls, params)
+            return None if superseded() else result
+        finally:
+            _current_request.reset(token)
+            if _latest_requests.get(key) == request_id:
+                del _latest_requests[key]
+
+    return wrapper
+
+
+def superseded() -> bool:
+    """True if a newer request for the same feature and document arrived."""
+    current = _current_request.get(None)
+    if current is None:
+        return False
+    key, request_id = current
+    latest = _latest_requests.get(key)
+    return latest is not None and latest != request_id
+
+
+@_timings.timed("get_variable")
+def lookup_variable(
+    doc: Document, key_path: Optional[KeyPath], word: str
+) -> Optional[Variable]:
+    """The variable of the key under the cursor, by its full path when known."""
+    return (key_path and doc.resolve(key_path)) or doc.get_variable(word)
+
+
+@server.feature(types.TEXT_DOCUMENT_HOVER)
+@_timings.timed("hover")
+@coalesce
+async def hover(ls: LanguageServer, params: types.HoverParams):
+    """Handle hover requests."""
+    pos = params.position
+    document_uri = params.text_document.uri
+    # Get the word at the cursor position
+    word = get_word_at_position(text_lines(ls, document_uri), pos.line, pos.character)
+
+    if not word:
+        return None
+
+    # Get the documentation file path
+    doc_file = get_doc_file_path(document_uri)
+
+    if not doc_file:
+        return None
+
+    # Load the documentation
+    doc = await load_documentation(doc_file)
+
+    if not doc or superseded():
+        return None
+
+    # Look up the variable in the documentation
+    key_path = key_path_at(ls, document_uri, pos.line, pos.character)
+    variable = lookup_variable(doc, key_path, word)
+
+    if not variable:
+        return None
+
+    try:
+        doc_text = variable.doc
+    except OSError:
+        doc = await reload_documentation(doc_file)
+        variable = doc and lookup_variable(doc, key_path, word)
+        if not variable:
+            return None
+        doc_text = variable.doc
+
+    # Format the hover content
+    hover_content = (
+        f"## {variable.name}\n\n{doc_text}" if doc_text else f"## {variable.name}"
+    )
+
+    return types.Hover(
+        contents=types.MarkupContent(
+            kind=types.MarkupKind.Markdown,
+            value=hover_content,
+        ),
+        range=types.Range(
+            start=types.Position(line=pos.line, character=0),
+            end=types.Position(line=pos.line + 1, character=0),
+        ),
+    )
+
+
+@server.feature(types.TEXT_DOCUMENT_COMPLETION)
+@_timings.timed("completion")
+@coalesce
+async def completion(ls: LanguageServer, params: types.CompletionParams):
+    """Handle completion requests."""
+    pos = params.position
+    document_uri = params.text_document.uri
+    # Get the prefix being typed at the cursor position
+    prefix = get_prefix_at_position(
+        text_lines(ls, document_uri), pos.line, pos.character
+    )
+
+    if not prefix:
+        return []
+
+    # Get the documentation file path
+    doc_file = get_doc_file_path(document_uri)
+
+    if not doc_file:
+        return []
+
+    # Load the documentation
+    doc = await load_documentation(doc_file)
+
+    if not doc or superseded():
+        return []
+
+    try:
+        return completion_items(doc, doc_file, prefix)
+    except OSError:
+        doc = await reload_documentation(doc_file)
+        return completion_items(doc, doc_file, prefix) if doc else []
+
+
+def completion_items(
+    doc: Document, doc_file: Path, prefix: str
+) -> types.CompletionList | list[types.CompletionItem]:
+    """The completion items of the variables starting with `prefix`."""
+    # Find all variables that start with the prefix, one extra to detect truncation
+    limit = max_completion_items
+    variables = doc.complete(prefix, limit=limit + 1 if limit else None)
+
+    items = []
+    for variable in variables[:limit]:
+        # Create completion item with data for resolve
+        completion_item = types.CompletionItem(
+            label=variable.name,
+            kind=types.CompletionItemKind.Variable,
+            detail=f"Variable: {variable.name}",
+            insert_text=variable.name,
+            documentation=types.MarkupContent(
+                kind=types.MarkupKind.Markdown,
+                value=f"## {variable.name}\n\n{variable.doc}",
+            ),
+            # Store data needed for resolve
+            data={
+                "variable_name": variable.name,
+                "doc_file": str(doc_file),
+            },
+        )
+        items.append(completion_item)
+
+    # Let the client ask again as the user types when the result was capped
+    if limit and len(variables) > limit:
+        return types.CompletionList(is_incomplete=True, items=items)
+
+    return items
+
+
+@server.feature(types.WORKSPACE_DID_CHANGE_WATCHED_FILES)
+def did_change_watched_files(
+    ls: LanguageServer, params: types.DidChangeWatchedFilesParams
+):
+    """Handle file change notifications to invalidate cache."""
+    for change in params.changes:
+        file_path = uri_to_path(change.uri)
+
+        # If it's a markdown file, invalidate its cache
+        if file_path.suffix == ".md":
+            file_key = str(file_path)
+            _stat_cache.invalidate(file_key)
+            if _doc_cache.invalidate(file_key):
+                logging.info(f"Cache invalidated for {file_path.name}")
+            documentation_changed(file_key)
+
+
+def stats_snapshot() -> dict:
+    """Latency histograms and cache counters, see `doc_lsp.stats`."""
+    return {
+        "timings": _timings.snapshot(),
+        "doc_cache": _doc_cache.stats(),
+        "stat_cache": _stat_cache.stats(),
+        "open_documents": len(_open_lines),
+        "diagnostics_documents": len(_diagnostics),
+        "pending_parses": len(_pending_parses),
+        "prebuilt_index": _prebuilt_index.stats()
+        if _prebuilt_index is not None
+        else None,
+    }
+
+
+@server.feature(STATS_REQUEST)
+def stats(ls: LanguageServer, params):
+    """Handle `docLsp/stats`, `{"reset": true}` clears the histograms after reading."""
+    snapshot = stats_snapshot()
+    if getattr(params, "reset", False):
+        _timings.clear()
+    return snapshot
+
+
+@server.feature(DUMP_PROFILE_REQUEST)
+def dump_profile(ls: LanguageServer, params):
+    """Handle `docLsp/dumpProfile`, return the files written (None when not profiling)."""
+    return _profiler.dump()
+
+
+def serve(args: argparse.Namespace) -> None:
+    """Apply the command line options (see `doc_lsp.cli`) and serve on stdio."""
+    global max_completion_items
+    max_completion_items = args.max_completion_items
+    _stat_cache.interval = args.stat_interval
+    global index_workspace
+    index_workspace = not args.no_index
+    global _disk_cache
+    if args.cache_dir is not None:
+        _disk_cache = DiskCache(args.cache_dir)
+    set_parse_workers(args.parse_workers)
+    if args.index_file is not None:
+        set_index_file(args.index_file)
+    global lazy_docs
+    lazy_docs = args.lazy_docs
+    global key_diagnostics
+    key_diagnostics = args.diagnostics
+    _doc_cache.configure(
+        max_entries=args.cache_max_entries or None,
+        max_bytes=args.cache_max_bytes or None,
+    )
+    global stats_interval
+    stats_interval = args.stats_interval
+    _profiler.profile_out = args.profile_out
+    _profiler.trace_memory = args.trace_memory
+    _profiler.start()
+
+    # Start the server
+    server.start_io()
@@ -0,0 +1,81 @@
+"""
+Pydantic models of the parsed documentation.
+
+The parser works with lightweight slotted nodes (see `doc_lsp.parser`),
+these models are an export view for API consumers that want validation,
+`model_dump` or JSON serialization.
+
+```python
+from doc_lsp.models import DocumentModel
+from doc_lsp.parser import parse_document
+
+model = DocumentModel.from_document(parse_document(markdown))
+print(model.model_dump_json())
+```
+"""
+
+from pydantic import BaseModel
+
+from .parser import Document, Header, HeaderTree, Variable, lookup_path
+
+
+class VariableModel(BaseModel):
+    """
+    The variable model, this is the model for a variable.
+    """
+
+    name: str
+    doc: str
+
+    @classmethod
+    def from_variable(cls, variable: Variable) -> "VariableModel":
+        return cls(name=variable.name, doc=variable.doc)
+
+
+class DocumentModel(BaseModel):
+    variables: dict[lookup_path, VariableModel]
+
+    @classmethod
+    def from_document(cls, document: Document) -> "DocumentModel":
+        return cls(
+            variables={
+                key: VariableModel.from_variable(var)
+                for key, var in document.variables.items()
+            }
+        )
+
+
+class HeaderModel(BaseModel):
+    """
+    The block model, this is the model for a block.
+    """
+
+    level: int
+    title: str
+    content: str
+    children: list["HeaderModel"] = []
+
+    @classmethod
+    def from_header(cls, header: Header) -> "HeaderModel":
+        return cls(
+            level=header.level,
+            title=header.title,
+            content=header.content,
+            children=[cls.from_header(child) for child in header.children],
+        )
+
+
+class HeaderTreeModel(BaseModel):
+    """The header tree, only the top level headers, nested ones are on `children`."""
+
+    headers: list[HeaderModel] = []
+
+    @classmethod
+    def from_header_tree(cls, tree: HeaderTree) -> "HeaderTreeModel":
+        return cls(
+            headers=[
+                HeaderModel.from_header(header)
+                for header in tree.headers
+                if header.parent is None
+            ]
+        )
@@ -1,18 +1,19 @@
 """
 parses the markdown file and returns the Documentation for the document variables.
-It uses pydantic to structure the documentation object that will be used by the LSP.
+It uses small slotted classes to structure the documentation object that will be used by the LSP,
+pydantic models of the same structure are available in `doc_lsp.models` for API consumers.
 
 
 The parser will take a markdown like this:
 
 ```markdown
-# Title 
+# Title
 
-Ignored part 
+Ignored part
 
 
 Optional doc-start marker, if not found it will assume the first `##` is the doc start.
-<!-- doc-start -->  
+<!-- doc-start -->
 
 ## Variable
 
@@ -25,9 +26,9 @@ Optional doc-start marker, if not found it will assume the first `##` is the doc
 > Documentation for the nested nested variable
 
 ##### Nested
-> Documentation for the Variable.Nested.Nested.Nested variable 
+> Documentation for the Variable.Nested.Nested.Nested variable
 
-What defines nesting is actually the heading level, so the parser will look for the first heading level that 
+What defines nesting is actually the heading level, so the parser will look for the first heading level that
 is lower than the current one.
 
 ## another_variable = 123
@@ -72,14 +73,14 @@ DATABASES = {
 > if it is sqlite it must be the filename
 > if it is a DBMS it must be a full connection string
 
-This one is actualy `DATABASES.default.NAME` or `DATABASES__default__NAME` or `{key}.NAME` or `{key}__NAME`  
+This one is actualy `DATABASES.default.NAME` or `DATABASES__default__NAME` or `{key}.NAME` or `{key}__NAME`
 
-The parser only cares about the last fragment on variable name, so `DATABASES.default.NAME` 
+The parser only cares about the last fragment on variable name, so `DATABASES.default.NAME`
 is the same as `DATABASES__default__NAME` or `{key}.NAME` or `{key}__NAME`
 
 The parser will split the variable and assume the last fragment as the target.
 
-if the `NAME = "default"` then the parser will first remove everything after the `=` 
+if the `NAME = "default"` then the parser will first remove everything after the `=`
 then will replace `__` with `.`
 and then will split the variable name into `[DATABASES, default, NAME]`
 and will take the last element `NAME` as the target
@@ -90,7 +91,7 @@ The placeholders `{key}` and `[item]` can be used to declare dynamic variable na
 #### {key}.OPTIONS
 > Arbitrary options passed directly to the DBMS driver as a key:value pair.
 
-As you can see you can use the `PARENT.KEY` or `PARENT__KEY` spec optionally, this one is actually the same 
+As you can see you can use the `PARENT.KEY` or `PARENT__KEY` spec optionally, this one is actually the same
 as simply `OPTIONS` as the heading level already defines the parent.
 
 ##### TLS_VERIFICATION
@@ -120,7 +121,7 @@ AUTHORS = [
         "avatar": "https://john.doe.com/avatar.png",
         "bio": "John Doe is a software engineer at Example Inc."
     }
-]   
+]
 ```
 
 The `name` is the author's name, the `email` is the author's email, the `url` is the author's URL, the `avatar` is the author's avatar, the `bio` is the author's bio.
@@ -153,33 +154,387 @@ Extra content that is ignored by the parser.
 """
 
 import re
-from typing import Optional
-from pydantic import BaseModel
+from bisect import bisect_left, insort
+from itertools import chain, islice
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Callable,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from mmap import mmap
 
 
 lookup_path = str  # AST path of the variable
 
+# Bump when the parsed result changes, so persisted parses are discarded
+PARSER_VERSION = 2
 
-class Variable(BaseModel):
+
+def _line(node) -> int:
+    """Sort key for nodes ordered by their line in the markdown file."""
+    return node.line
+
+
+class LazyDoc:
+    """The span of a blockquote in a mapped documentation file, see `parse_document_lazy`.
+
+    `source` is sliced to read the bytes of the span, only when the text is needed.
+    """
+
+    __slots__ = ("source", "start", "end", "fenced")
+
+    def __init__(self, source, start: int, end: int, fenced: bool):
+        self.source = source
+        self.start = start
+        self.end = end  # exclusive, before the line end of the last line
+        self.fenced = fenced  # `>>>` blockquote, else `>` lines
+
+    def __len__(self) -> int:
+        return max(self.end - self.start, 0)
+
+    def text(self) -> str:
+        """The blockquote text, the same as `Header.content` of the eager parse."""
+        if self.end <= self.start:
+            return ""
+        text = self.source[self.start : self.end].decode("utf-8")
+        if "\r" in text:
+            text = text.replace("\r\n", "\n")
+        if self.fenced:
+            return text.strip()
+        return "\n".join(line[1:].strip() for line in text.split("\n"))
+
+
+class Variable:
     """
-    The variable model, this is the model for a variable.
+    The variable node, this is the node for a variable.
     """
 
-    name: str
-    doc: str
+    __slots__ = ("name", "_doc", "path", "pattern", "line", "parent", "children")
+
     # can optionally take more fields
-    # full_name: str
     # type: type (str, dict, list, bool, int, float) taken from default value or header (NAME<type> = 10)
     # default: default value (taken from after the `=` on the header)
     # required: taken from the presence of * on the header (NAME * = 10)
     # choices: taken from the [enum] on the header (NAME [option1, option2, option3] = option1)
     # deprecated: taken from the presence of `DEPRECATED` after name on the header (NAME DEPRECATED = 10)
-    parent: Optional["Variable"] = None
-    children: list["Variable"] = []
 
+    def __init__(
+        self,
+        name: str,
+        doc: Union[str, LazyDoc],
+        parent: Optional["Variable"] = None,
+        children: Optional[list["Variable"]] = None,
+        path: Optional[lookup_path] = None,
+        line: int = 0,
+        pattern: Optional[str] = None,
+    ):
+        self.name = name
+        self._doc = doc
+        self.path = path if path is not None else name  # full path e.g. DATABASES.NAME
+        # full path keeping the placeholders e.g. DATABASES.{key}.NAME
+        self.pattern = pattern if pattern is not None else self.path
+        self.line = line  # line of the heading in the markdown file
+        self.parent = parent
+        self.children = children if children is not None else []
+
+    def __repr__(self) -> str:
+        return f"Variable(path={self.path!r}, doc={self.doc!r})"
+
+    @property
+    def doc(self) -> str:
+        """The documentation, read from the mapped file on first access for lazy
+        docs. Raises OSError if the file was modified since it was mapped."""
+        doc = self._doc
+        if doc.__class__ is not str:
+            doc = self._doc = doc.text()
+        return doc
+
+    @doc.setter
+    def doc(self, doc: str) -> None:
+        self._doc = doc
+
+    @property
+    def doc_size(self) -> int:
+        """Length of the doc, without reading it when it is not loaded yet."""
+        return len(self._doc)
+
+
+def normalize_path(path: str) -> str:
+    """Normalize a lookup path so `SERVER__HOST` and `server.host` are the same key."""
+    return path.replace("__", ".").lower()
+
+
+# Segments of a path, `{key}` and `[item]` placeholders are segments on their own
+PATH_SEGMENT_RE = re.compile(r"\{[^}]*\}|\[[^\]]*\]|[^.\[{]+")
+KEY = "{key}"  # wildcard for any dict key
+ITEM = "[item]"  # wildcard for a list item
+
+
+def _canonical_segment(segment: str) -> str:
+    """Placeholders become KEY or ITEM, whatever their name, other segments are kept."""
+    if segment[0] == "{":
+        return KEY
+    if segment[0] == "[":
+        return ITEM
+    return segment
+
+
+def pattern_segments(pattern: str) -> list[str]:
+    """Split a variable pattern in normalized segments, e.g. `DATABASES.{db}.NAME`
+    gives `["databases", "{key}", "name"]`."""
+    pattern = normalize_path(pattern)
+    if "{" not in pattern and "[" not in pattern:
+        return pattern.split(".")
+    return [
+        _canonical_segment(segment.strip())
+        for segment in PATH_SEGMENT_RE.findall(pattern)
+        if segment.strip()
+    ]
+
+
+class PathNode:
+    """Node of the path trie, one per segment of the variable patterns.
+
+    Placeholders are the KEY and ITEM children, matching any key of the config
+    file. `variables` are the ones whose pattern ends on this node, ordered by line.
+    """
+
+    __slots__ = ("children", "variables")
+
+    def __init__(self):
+        self.children: dict[str, "PathNode"] = {}
+        self.variables: list[Variable] = []
+
+    def insert(self, segments: list[str], var: Variable) -> None:
+        node = self
+        for segment in segments:
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = PathNode()
+            node = child
+        found = node.variables
+        if not found or found[-1].line <= var.line:
+            found.append(var)
+        else:
+            insort(found, var, key=_line)
+
+    def remove(self, segments: list[str], var: Variable) -> None:
+        """Remove the variable, dropping the nodes left empty."""
+        nodes = [self]
+        for segment in segments:
+            nodes.append(nodes[-1].children[segment])
+        nodes[-1].variables.remove(var)
+        for i in range(len(segments), 0, -1):
+            node = nodes[i]
+            if node.variables or node.children:
+                break
+            del nodes[i - 1].children[segments[i - 1]]
+
+    def match(
+        self, keys: list[str], i: int = 0, below: bool = False
+    ) -> Optional[list[Variable]]:
+        """The variables documenting `keys[i:]`, walking down from this node.
+
+        A key matches its own node first, then KEY, then ITEM. ITEM also matches
+        nothing, as the key path of a list item may not include its index.
+        With `below`, a path with no variables of its own matches the variables
+        of a pattern going through it.
+        """
+        children = self.children
+        if i == len(keys):
+            if self.variables:
+                return self.variables
+            if below and children:
+                # Empty nodes are dropped, there are variables further down
+                node = self
+                while not node.variables:
+                    node = next(iter(node.children.values()))
+                return node.variables
+        else:
+            key = keys[i]
+            for child_key in (key, KEY) if key != KEY else (KEY,):
+                child = children.get(child_key)
+                if child is not None:
+                    found = child.match(keys, i + 1, below)
+                    if found:
+                        return found
+        child = children.get(ITEM)
+        if child is None:
+            return None
+        if i < len(keys) and keys[i].isdigit():
+            found = child.match(keys, i + 1, below)
+            if found:
+                return found
+        return child.match(keys, i, below)
+
+
+# Value of the Document indexes: the variable when the key is unique, else the
+# variables with that key ordered by line, the last one wins
+Indexed = Union[Variable, list[Variable]]
+
+
+def _last(found: Indexed) -> Variable:
+    return found[-1] if found.__class__ is list else found
+
+
+def _add(index: dict[str, Indexed], key: str, var: Variable) -> bool:
+    """Index the variable under `key`, return True if the key is new."""
+    found = index.get(key)
+    if found is None:
+        index[key] = var
+        return True
+    if found.__class__ is not list:
+        found = index[key] = [found]
+    if found[-1].line <= var.line:
+        found.append(var)
+    else:
+        insort(found, var, key=_line)
+    return False
+
+
+def _discard(index: dict[str, Indexed], key: str, var: Variable) -> bool:
+    """Remove the variable from `key`, return True if the key is gone."""
+    found = index[key]
+    if found.__class__ is not list:
+        del index[key]
+        return True
+    found.remove(var)
+    if len(found) == 1:
+        index[key] = found[0]
+    return False
+
+
+class Document:
+    """The parsed documentation, variables indexed for lookup and completion.
+
+    `entries` is the table of variables, one per heading ordered by line. The
+    indexes map each key to its variable, case folded: the full path and the
+    name in `_paths`, the last segment of the path in `_names`. Keys declared
+    more than once keep their variables in a list and the last occurrence wins.
+    The patterns of the variables are indexed on a path trie to resolve the
+    keys of config files, see `resolve`.
+    """
 
-class Document(BaseModel):
-    variables: dict[lookup_path, Variable]
+    __slots__ = (
+        "entries",
+        "tree",
+        "revision",
+        "source",
+        "_paths",
+        "_names",
+        "_prefix_keys",
+        "_trie",
+    )
+
+    def __init__(self, entries: list[Variable], tree: Optional["HeaderTree"] = None):
+        self.entries = entries
+        self.tree = tree  # The HeaderTree the entries came from, for `reparse_document`
+        self.revision = 0  # bumped by each `patch`
+        self.source = (
+            None  # what the lazy docs are read from, see `parse_document_lazy`
+        )
+        # full path and name -> variable(s) declaring it
+        self._paths: dict[str, Indexed] = {}
+        # last segment of the path -> variable(s)
+        self._names: dict[str, Indexed] = {}
+        self._trie: Optional[PathNode] = None  # built by the first `resolve`
+        for var in entries:
+            for index, key in self._keys(var):
+                _add(index, key, var)
+        # Sorted paths for prefix lookups
+        self._prefix_keys: list[str] = sorted(self._paths)
+
+    def __repr__(self) -> str:
+        return f"Document(entries={len(self.entries)})"
+
+    @property
+    def variables(self) -> dict[lookup_path, Variable]:
+        """The variables keyed by both the full path and the name."""
+        variables = {}
+        for var in self.entries:
+            # Re-inserting keeps the dict ordered by last occurrence
+            for key in (var.path, var.name):
+                variables.pop(key, None)
+                variables[key] = var
+        return variables
+
+    def _keys(self, var: Variable) -> list[tuple[dict[str, Indexed], str]]:
+        """The (index, key) pairs of the variable, sharing the equal key strings."""
+        path = normalize_path(var.path)
+        name = normalize_path(var.name)
+        last = path.rsplit(".", 1)[-1]
+        if name == path:
+            return [(self._paths, path), (self._names, last)]
+        if last == name:
+            last = name
+        return [(self._paths, name), (self._paths, path), (self._names, last)]
+
+    def _index(self, var: Variable) -> list[str]:
+        """Add the variable to the indexes, return the paths that are new."""
+        new = [
+            key
+            for index, key in self._keys(var)
+            if _add(index, key, var) and index is self._paths
+        ]
+        if self._trie is not None:
+            self._trie.insert(pattern_segments(var.pattern), var)
+        return new
+
+    def _unindex(self, var: Variable) -> list[str]:
+        """Remove the variable from the indexes, return the paths that are gone."""
+        gone = [
+            key
+            for index, key in self._keys(var)
+            if _discard(index, key, var) and index is self._paths
+        ]
+        if self._trie is not None:
+            self._trie.remove(pattern_segments(var.pattern), var)
+        return gone
+
+    def patch(
+        self,
+        first_line: int,
+        stop_line: Optional[int],
+        delta: int,
+        variables: list[Variable],
+    ) -> None:
+        """Replace the variables declared from `first_line` up to `stop_line` (exclusive).
+
+        Lines are the ones before the edit, variables after `stop_line` are moved
+        by `delta` lines and only the replaced variables touch the indexes.
+        """
+        entries = self.entries
+        lo = bisect_left(entries, first_line, key=_line)
+        hi = (
+            len(entries)
+            if stop_line is None
+            else bisect_left(entries, stop_line, key=_line)
+        )
+
+        gone = set()
+        for var in entries[lo:hi]:
+            gone.update(self._unindex(var))
+        for i in range(hi, len(entries)):
+            entries[i].line += delta
+        entries[lo:hi] = variables
+
+        new = set()
+        for var in variables:
+            new.update(self._index(var))
+
+        keys = self._prefix_keys
+        for key in gone - new:
+            del keys[bisect_left(keys, key)]
+        for key in new - gone:
+            insort(keys, key)
+        self.revision += 1
 
     def get_variable(self, path: lookup_path) -> Variable | None:
         """Get the variable from the document.
@@ -188,37 +543,112 @@ class Document(BaseModel):
         so it must be able to handle `SERVER.HOST` and `SERVER__HOST` and `SERVER__HOST__OPTIONS`
         the lookup_path can be a simple str to match or a specific AST path for instant lookup.
         """
+        path = normalize_path(path)
+
         # Try exact match first (case insensitive)
-        path_lower = path.lower()
-        for key, var in self.variables.items():
-            if key.lower() == path_lower:
-                return var
+        found = self._paths.get(path)
+        if found is not None:
+            return _last(found)
 
         # Try matching just the variable name (last part)
-        parts = path.replace("__", ".").split(".")
-        target = parts[-1].lower()
-
-        for key, var in self.variables.items():
-            var_name = key.split(".")[-1].lower()
-            if var_name == target:
-                return var
-
-        return None
+        found = self._names.get(path.rsplit(".", 1)[-1])
+        return _last(found) if found is not None else None
 
+    def resolve(self, key_path: Sequence[str]) -> Variable | None:
+        """Get the variable documenting the key at `key_path` of a config file.
 
-class Header(BaseModel):
+        `key_path` is the full path of the key, e.g. `DATABASES.default.OPTIONS.TIMEOUT`
+        or `authors.0.email` split in segments, it is matched against the variable
+        patterns on the path trie, `{key}` and `[item]` placeholders match any key.
+        When the full path is not documented its suffixes are tried, so documenting
+        a nested section alone works, then the last variable with the same name.
+        """
+        trie = self._path_trie()
+        keys = normalize_path(".".join(key_path)).split(".")
+        for start in range(len(keys)):
+            found = trie.match(keys, start)
+            if found:
+                return found[-1]
+
+        candidates = self._names.get(keys[-1])
+        return _last(candidates) if candidates is not None else None
+
+    def documents(self, key_path: Sequence[str]) -> bool:
+        """True if the key at `key_path` of a config file is documented.
+
+        The key either has a variable (see `resolve`) or is the parent of
+        documented keys, e.g. `DATABASES.default` of a `DATABASES.{db}.NAME`
+        heading, placeholders can not be documented alone.
+        """
+        if self.resolve(key_path) is not None:
+            return True
+        trie = self._path_trie()
+        keys = normalize_path(".".join(key_path)).split(".")
+        return any(trie.match(keys, start, below=True) for start in range(len(keys)))
+
+    def _path_trie(self) -> PathNode:
+        trie = self._trie
+        if trie is None:
+            # Documents only used for completion never need it, built on demand
+            trie = self._trie = PathNode()
+            for var in self.entries:
+                trie.insert(pattern_segments(var.pattern), var)
+        return trie
+
+    def complete(self, prefix: str, limit: int | None = None) -> list[Variable]:
+        """Get the variables whose path starts with the given prefix.
+
+        Matching is case insensitive and variables are deduplicated by name,
+        as they are indexed with both the full path and the name.
+        The cost is proportional to the number of matches, `limit` caps the result.
+        """
+        prefix = normalize_path(prefix)
+        keys = self._prefix_keys
+        seen = set()
+        matches = []
+
+        i = bisect_left(keys, prefix)
+        while i < len(keys) and keys[i].startswith(prefix):
+            var = _last(self._paths[keys[i]])
+            i += 1
+            if var.name in seen:
+                continue
+            seen.add(var.name)
+            matches.append(var)
+            if limit is not None and len(matches) >= limit:
+                break
+
+        return matches
+
+
+class Header:
     """
-    The block model, this is the model for a block.
+    The block node, this is the node for a block.
     """
 
-    level: int
-    title: str
-    content: str
-    parent: Optional["Header"] = None
-    children: list["Header"] = []
-
-
-class HeaderTree(BaseModel):
+    __slots__ = ("level", "title", "content", "line", "parent", "children")
+
+    def __init__(
+        self,
+        level: int,
+        title: str,
+        content: str,
+        parent: Optional["Header"] = None,
+        children: Optional[list["Header"]] = None,
+        line: int = 0,
+    ):
+        self.level = level
+        self.title = title
+        self.content = content
+        self.line = line  # line of the heading in the markdown file
+        self.parent = parent
+        self.children = children if children is not None else []
+
+    def __repr__(self) -> str:
+        return f"Header(level={self.level}, title={self.title!r}, line={self.line})"
+
+
+class HeaderTree:
     """Stores all headers parsed from the markdown file
 
     taken from the document start to the document end.
@@ -227,81 +657,138 @@ class HeaderTree(BaseModel):
     Document end == First `<!-- doc-end -->` or `EOF`
     """
 
-    headers: list[Header] = []
+    __slots__ = ("headers", "start", "end")
 
+    def __init__(
+        self,
+        headers: Optional[list[Header]] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ):
+        self.headers = headers if headers is not None else []
+        self.start = start  # first line after the doc start, None if not found
+        self.end = end  # line of the doc-end marker, None for EOF
 
-def parse_header_tree(markdown: str) -> HeaderTree:
-    """Parse the markdown file and return the parsed markdown."""
-    lines = markdown.split("\n")
-    headers = []
-    stack = []  # Stack to keep track of parent headers
+    def __repr__(self) -> str:
+        return f"HeaderTree(headers={len(self.headers)})"
 
-    # Find document start
-    doc_started = False
-    doc_start_idx = 0
-    doc_end_idx = len(lines)
 
-    for i, line in enumerate(lines):
-        if "<!-- doc-start -->" in line:
-            doc_started = True
-            doc_start_idx = i + 1
-            break
-        elif line.startswith("## "):
-            doc_started = True
-            doc_start_idx = i
-            break
+DOC_START = "<!-- doc-start -->"
+DOC_END = "<!-- doc-end -->"
 
-    if not doc_started:
-        return HeaderTree(headers=[])
 
-    # Find document end
-    for i, line in enumerate(lines[doc_start_idx:], doc_start_idx):
-        if "<!-- doc-end -->" in line:
-            doc_end_idx = i
-            break
+def heading_level(line: str) -> int:
+    """Return the level of a `##` to `######` heading line (## = 1), 0 if not a heading."""
+    if not line.startswith("##"):
+        return 0
+    n = 2
+    while n < len(line) and line[n] == "#":
+        n += 1
+    if n > 6 or n == len(line) or line[n] != " ":
+        return 0
+    return n - 1
 
-    i = doc_start_idx
-    while i < doc_end_idx:
-        line = lines[i]
 
-        # Check if it's a header
-        if re.match(r"^#{2,6} ", line):
-            # Count the level (## = level 1, ### = level 2, etc.)
-            level = len(re.match(r"^(#{2,6}) ", line).group(1)) - 1
+class HeaderScanner:
+    """Scan markdown lines in a single pass, see `scan`.
+
+    After scanning `start` and `end` hold the doc start/end lines that were found
+    and `stopped` the line where `stop` interrupted the scan.
+    """
+
+    __slots__ = ("start", "end", "stopped")
+
+    def __init__(self):
+        self.start: Optional[int] = None
+        self.end: Optional[int] = None
+        self.stopped: Optional[int] = None
+
+    def scan(
+        self,
+        lines: Iterable[str],
+        first_line: int = 0,
+        started: bool = False,
+        link: bool = True,
+        stop: Optional[Callable[[int], bool]] = None,
+    ) -> Iterator[Header]:
+        """Yield each header found on `lines`, numbered from `first_line`.
+
+        Doc markers, headings and blockquotes are recognized in the same sweep,
+        a header is yielded once its blockquote (if any) is complete and, when
+        `link` is set, it is already linked to its parent.
+        `started` skips the lookup for the doc start and `stop` is called with the
+        line of each heading, returning True ends the scan before that heading.
+        """
+        stack = []  # Stack to keep track of parent headers
+        header = None  # Header still looking for its blockquote
+        quote = None  # Blockquote lines being collected for `header`
+        fenced = False  # True if `quote` is a `>>>` blockquote
+
+        for n, line in enumerate(lines, first_line):
+            if not started:
+                if DOC_START in line:
+                    started = True
+                    self.start = n + 1
+                    continue
+                if not line.startswith("## "):
+                    continue
+                started = True
+                self.start = n
+
+            if DOC_END in line:
+                self.end = n
+                break
+
+            if quote is not None:
+                if fenced:
+                    if line.strip() != ">>>":
+                        quote.append(line)
+                        continue
+                    header.content = "\n".join(quote).strip()
+                    quote = None
+                    yield header
+                    header = None
+                    continue
+                if line.startswith(">"):
+                    quote.append(line[1:].strip())
+                    continue
+                header.content = "\n".join(quote)
+                quote = None
+                yield header
+                header = None
+            elif header is not None:
+                # Skip empty lines, then only a blockquote is taken as content
+                stripped = line.strip()
+                if not stripped:
+                    continue
+                if stripped == ">>>":
+                    quote = []
+                    fenced = True
+                    continue
+                if line.startswith(">"):
+                    quote = [line[1:].strip()]
+                    fenced = False
+                    continue
+                yield header
+                header = None
+
+            level = heading_level(line)
+            if not level:
+                continue
+
+            if stop is not None and stop(n):
+                self.stopped = n
+                return
 
             # Extract title (remove # and everything after =)
-            title = re.sub(r"^#{2,6} ", "", line)
+            title = line[level + 2 :]
             if "=" in title:
                 title = title.split("=")[0].strip()
 
-            # Extract content (blockquote immediately after)
-            content = ""
-            j = i + 1
-
-            # Skip empty lines
-            while j < doc_end_idx and not lines[j].strip():
-                j += 1
-
-            # Check for >>> style blockquote
-            if j < doc_end_idx and lines[j].strip() == ">>>":
-                j += 1
-                content_lines = []
-                while j < doc_end_idx and lines[j].strip() != ">>>":
-                    content_lines.append(lines[j])
-                    j += 1
-                content = "\n".join(content_lines).strip()
-                i = j
-            # Check for > style blockquote
-            elif j < doc_end_idx and lines[j].startswith(">"):
-                content_lines = []
-                while j < doc_end_idx and lines[j].startswith(">"):
-                    content_lines.append(lines[j][1:].strip())
-                    j += 1
-                content = "\n".join(content_lines)
-                i = j - 1
-
-            # Create header object
-            header = Header(level=level, title=title, content=content)
+            header = Header(level=level, title=title, content="", line=n)
+
+            if not link:
+                continue
 
             # Manage parent-child relationships based on level
             while stack and stack[-1].level >= level:
@@ -311,12 +798,415 @@ def parse_header_tree(markdown: str) -> HeaderTree:
                 header.parent = stack[-1]
                 stack[-1].children.append(header)
 
-            headers.append(header)
             stack.append(header)
 
-        i += 1
+        if header is not None:
+            if quote is not None:
+                content = "\n".join(quote)
+                header.content = content.strip() if fenced else content
+            yield header
+
+
+def iter_headers(lines: Iterable[str]) -> Iterator[Header]:
+    """Scan the markdown lines in a single pass and yield each header.
+
+    Doc markers, headings and blockquotes are recognized in the same sweep,
+    a header is yielded once its blockquote (if any) is complete and it is
+    already linked to its parent.
+    """
+    return HeaderScanner().scan(lines)
+
+
+# Size of the reads of `read_lines`
+READ_CHUNK = 1 << 16
+
 
-    return HeaderTree(headers=headers)
+def _decode_lines(data: bytes) -> Iterable[str]:
+    try:
+        return data.decode("utf-8").split("\n")
+    except UnicodeDecodeError:
+        # Only raise if the scan gets to the invalid line, it may be after the doc end
+        return (line.decode("utf-8") for line in data.split(b"\n"))
+
+
+def read_lines(source: Union[IO, "mmap"]) -> Iterator[str]:
+    """Yield the lines of a text or binary file object or an mmap, without line ends.
+
+    The source is read in chunks of `READ_CHUNK`, binary ones are decoded as
+    UTF-8 and can have Windows line ends, so only a chunk is in memory and
+    reading stops shortly after the caller stops iterating (e.g. at the
+    doc-end marker). The lines are the same as `text.split("\\n")`.
+    """
+    chunk = source.read(READ_CHUNK)
+    binary = isinstance(chunk, bytes)
+    newline = b"\n" if binary else "\n"
+    rest = chunk[:0]  # Start of a line that continues on the next chunk
+    while chunk:
+        chunk = rest + chunk
+        if binary and b"\r" in chunk:
+            chunk = chunk.replace(b"\r\n", b"\n")
+        end = chunk.rfind(newline) + 1
+        rest = chunk[end:]
+        if end:
+            # Split at the last line end, a line or a character is never cut
+            lines = chunk[: end - 1]
+            yield from _decode_lines(lines) if binary else lines.split("\n")
+        chunk = source.read(READ_CHUNK)
+    yield from _decode_lines(rest) if binary else (rest,)
+
+
+def iter_file_headers(source: Union[IO, "mmap"]) -> Iterator[Header]:
+    """Like `iter_headers`, reading the lines from a file object or mmap as needed."""
+    return HeaderScanner().scan(read_lines(source))
+
+
+def _scan_header_tree(lines: Iterable[str]) -> HeaderTree:
+    scanner = HeaderScanner()
+    headers = list(scanner.scan(lines))
+    return HeaderTree(headers=headers, start=scanner.start, end=scanner.end)
+
+
+def parse_header_tree(markdown: str) -> HeaderTree:
+    """Parse the markdown file and return the parsed markdown."""
+    return _scan_header_tree(markdown.split("\n"))
+
+
+def parse_header_tree_file(source: Union[IO, "mmap"]) -> HeaderTree:
+    """Parse the markdown from a file object or mmap, see `read_lines`.
+
+    The content after `<!-- doc-end -->` is not read.
+    """
+    return _scan_header_tree(read_lines(source))
+
+
+# Markers and headings of the lazy parse, matched on the bytes of the file
+DOC_START_BYTES = DOC_START.encode()
+DOC_END_BYTES = DOC_END.encode()
+FIRST_HEADING_RE = re.compile(rb"^## ", re.M)
+LAZY_HEADER_RE = re.compile(
+    rb"""
+    (\#{2,6})\ ([^\n]*)                          # heading: level and title
+    (?:\n(?:[^\S\n]*\n)*                        # blank lines, then a blockquote
+      (?:([^\S\n]*>>>[^\S\n]*(?:\n|\Z))          # `>>>` blockquote start
+        |(>[^\n]*(?:\n>[^\n]*)*)                   # `>` blockquote
+      )
+    )?
+    """,
+    re.X,
+)
+
+
+def _fence_end(buffer, pos: int, stop: int) -> tuple[int, int]:
+    """Start and end of the line closing the `>>>` blockquote opened before `pos`."""
+    while True:
+        fence = buffer.find(b">>>", pos, stop)
+        if fence == -1:
+            return stop, stop
+        line_start = buffer.rfind(b"\n", pos, fence) + 1 or pos
+        line_end = buffer.find(b"\n", fence, stop)
+        if line_end == -1:
+            line_end = stop
+        if buffer[line_start:line_end].strip() == b">>>":
+            return line_start, line_end
+        pos = fence + 3
+
+
+def _scan_lazy_headers(buffer, source) -> list[Header]:
+    """The headers of the markdown in `buffer` (bytes or mmap), linked to their
+    parents, with a `LazyDoc` reading `source` as content.
+
+    Same headers as `HeaderScanner.scan`, but only the lines starting with `#`
+    and the blockquotes after the headings are looked at, the bytes between
+    them are only copied to count the lines.
+    """
+    # Doc start, the line after the marker or the first `##` before it
+    first = FIRST_HEADING_RE.search(buffer)
+    marker = buffer.find(DOC_START_BYTES)
+    if marker != -1 and (first is None or marker < first.start()):
+        pos = buffer.find(b"\n", marker) + 1 or len(buffer)
+    elif first is not None:
+        pos = first.start()
+    else:
+        return []
+
+    # Doc end, at the start of the line with the marker
+    stop = buffer.find(DOC_END_BYTES, pos)
+    stop = len(buffer) if stop == -1 else buffer.rfind(b"\n", pos, stop) + 1 or pos
+
+    headers = []
+    stack = []
+    line = 0
+    counted = 0  # offset `line` was counted to
+    match_heading = LAZY_HEADER_RE.match
+    find = buffer.find
+    # Headings are found from the line end before them, except on the first line
+    match = match_heading(buffer, 0, stop) if pos == 0 else None
+    pos = pos - 1 if pos else 0
+    while True:
+        if match is None:
+            pos = find(b"\n#", pos, stop)
+            if pos == -1:
+                break
+            match = match_heading(buffer, pos + 1, stop)
+            if match is None:
+                pos += 2
+                continue
+
+        start = match.start()
+        line += buffer[counted:start].count(b"\n")
+        counted = start
+        marks, title, fence, quote = match.group(1, 2, 3, 4)
+        level = len(marks) - 1
+        if title.endswith(b"\r"):
+            title = title[:-1]
+        title = title.decode("utf-8")
+        if "=" in title:
+            title = title.split("=")[0].strip()
+
+        content = ""
+        pos = match.end()
+        if fence is not None:
+            end, next_pos = _fence_end(buffer, pos, stop)
+            content = LazyDoc(source, pos, end, True)
+            pos = next_pos
+        elif quote is not None:
+            content = LazyDoc(source, pos - len(quote), pos, False)
+        match = None
+
+        header = Header(level, title, content, line=line)
+        while stack and stack[-1].level >= level:
+            stack.pop()
+        if stack:
+            header.parent = stack[-1]
+            stack[-1].children.append(header)
+        stack.append(header)
+        headers.append(header)
+
+    return headers
+
+
+def _patch_header_tree(
+    tree: HeaderTree,
+    lines: list[str],
+    start_line: int,
+    end_line: int,
+    new_end_line: int,
+) -> Optional[tuple[int, Optional[int], int, list[Header]]]:
+    """Update the tree in place after lines `start_line` to `end_line` became
+    `start_line` to `new_end_line` (inclusive).
+
+    Only the headings around the edit are scanned again, until a heading that
+    was already in the tree is found after the edit. Headings that follow and
+    are nested under the changed ones are linked again as their parent may be gone.
+
+    Returns `(first_line, stop_line, delta, headers)` where `headers` replaced the
+    ones from `first_line` to `stop_line` (old lines, None for the end) and the
+    headers after were moved by `delta` lines, or None if a full parse is needed.
+    """
+    headers = tree.headers
+    delta = new_end_line - end_line
+
+    # Edits on or before the doc start may move it
+    if tree.start is None or start_line <= tree.start:
+        return None
+    if tree.end is not None:
+        # Edits after the doc end change nothing
+        if start_line > tree.end:
+            return start_line, start_line, 0, []
+        if end_line >= tree.end:
+            return None
+    if any(DOC_END in line for line in lines[start_line : new_end_line + 1]):
+        return None
+
+    # Scan again from the last heading before the edit, a heading line is
+    # always a clean state for the scanner
+    first = bisect_left(headers, start_line, key=_line) - 1
+    if first >= 0:
+        first_line = headers[first].line
+    else:
+        first, first_line = 0, tree.start
+
+    def resync(n: int) -> bool:
+        """Check if the heading at line `n`, after the edit, was already there."""
+        if n <= new_end_line:
+            return False
+        i = bisect_left(headers, n - delta, lo=first, key=_line)
+        return i < len(headers) and headers[i].line == n - delta
+
+    scanner = HeaderScanner()
+    new = list(
+        scanner.scan(
+            islice(lines, first_line, None),
+            first_line=first_line,
+            started=True,
+            link=False,
+            stop=resync,
+        )
+    )
+    if scanner.stopped is not None:
+        resumed = bisect_left(headers, scanner.stopped - delta, lo=first, key=_line)
+        if tree.end is not None:
+            tree.end += delta
+    else:
+        resumed = len(headers)
+        tree.end = scanner.end
+
+    # Headings after the edit nested deeper than any changed heading may have
+    # lost (or gained) a parent, they are linked again together with the new ones
+    removed = headers[first:resumed]
+    threshold = min((h.level for h in chain(removed, new)), default=0)
+    stop = resumed
+    while stop < len(headers) and headers[stop].level > threshold:
+        stop += 1
+    followers = headers[resumed:stop]
+    stop_line = headers[stop].line if stop < len(headers) else None
+
+    for i in range(resumed, len(headers)):
+        headers[i].line += delta
+
+    # The parents of the first changed heading, as left by the scanner
+    parents = []
+    parent = headers[first - 1] if first > 0 else None
+    while parent is not None:
+        parents.append(parent)
+        parent = parent.parent
+    parents.reverse()
+
+    # Detach the changed headings from their parents, keeping the children after them
+    dropped = {id(h) for h in chain(removed, followers)}
+    kept = []
+    for parent in parents:
+        i = bisect_left(parent.children, first_line, key=_line)
+        kept.append([h for h in parent.children[i:] if id(h) not in dropped])
+        del parent.children[i:]
+
+    stack = parents[:]
+    for header in chain(new, followers):
+        header.children = []
+        while stack and stack[-1].level >= header.level:
+            stack.pop()
+        header.parent = stack[-1] if stack else None
+        if stack:
+            stack[-1].children.append(header)
+        stack.append(header)
+
+    for parent, children in zip(parents, kept):
+        parent.children.extend(children)
+
+    changed = new + followers
+    headers[first:stop] = changed
+    return first_line, stop_line, delta, changed
+
+
+def reparse_header_tree(
+    tree: HeaderTree,
+    markdown: str,
+    start_line: int,
+    end_line: int,
+    new_end_line: int,
+) -> HeaderTree:
+    """Update the HeaderTree after an edit of the markdown file.
+
+    The edit replaced the lines `start_line` to `end_line` of the previous
+    markdown with the lines `start_line` to `new_end_line` of `markdown`,
+    as in a `textDocument/didChange` range.
+    The tree is updated in place re-parsing only the affected heading sections,
+    if the edit moves the doc start or end a new tree is parsed instead.
+    """
+    lines = markdown.split("\n")
+    if _patch_header_tree(tree, lines, start_line, end_line, new_end_line) is None:
+        return parse_header_tree(markdown)
+    return tree
+
+
+KEY_PLACEHOLDER_RE = re.compile(r"\{[^}]+\}")
+ITEM_PLACEHOLDER_RE = re.compile(r"\[[^\]]+\]")
+
+
+def _variable_name(title: str) -> str:
+    """Clean the header title to get the variable name."""
+    # Remove placeholders like {key} or [item]
+    if "{" in title or "[" in title:
+        title = KEY_PLACEHOLDER_RE.sub("", title)
+        title = ITEM_PLACEHOLDER_RE.sub("", title)
+
+    # Remove parent path prefix if present
+    return title.split(".")[-1].strip()
+
+
+def _join_path(parent: str, name: str) -> str:
+    return f"{parent}.{name}" if parent and name else parent or name
+
+
+def _header_pattern(title: str, name: str, parent: str) -> str:
+    """The pattern of a header named `name` nested under the `parent` pattern.
+
+    Like the variable name, leading segments of the title that repeat the end of
+    the parent (`{key}.OPTIONS` under `{key}`) or are not placeholders are left
+    out, the placeholders are kept (`[item].url`, `authors[item].name` under
+    `authors`).
+    """
+    if "{" not in title and "[" not in title:
+        return _join_path(parent, name)
+
+    segments = [s.strip() for s in PATH_SEGMENT_RE.findall(title)]
+    segments = [s for s in segments if s]
+    canonical = [_canonical_segment(s.lower()) for s in segments]
+    parent_segments = PATH_SEGMENT_RE.findall(parent)[-len(segments) :]
+    parent_canonical = [_canonical_segment(s.strip().lower()) for s in parent_segments]
+
+    overlap = 0
+    for k in range(min(len(segments) - 1, len(parent_canonical)), 0, -1):
+        if canonical[:k] == parent_canonical[-k:]:
+            overlap = k
+            break
+
+    rest = segments[overlap:]
+    name_index = max((i for i, s in enumerate(rest) if s[0] not in "{["), default=None)
+    kept = [s for i, s in enumerate(rest) if i == name_index or s[0] in "{["]
+    return _join_path(parent, ".".join(kept))
+
+
+def _header_variables(headers: list[Header]) -> list[Variable]:
+    """Create the variables for the headers, in the same order.
+
+    Headers without a variable name (e.g. a `{key}` placeholder) do not create
+    a variable but still are part of the path of the nested ones.
+    """
+    paths = {}  # header -> (path, pattern) for its children
+
+    def parent_path(header: Optional[Header]) -> tuple[str, str]:
+        if header is None:
+            return "", ""
+        if header not in paths:
+            name = _variable_name(header.title)
+            path, pattern = parent_path(header.parent)
+            paths[header] = (
+                _join_path(path, name),
+                _header_pattern(header.title, name, pattern),
+            )
+        return paths[header]
+
+    variables = []
+    for header in headers:
+        name = _variable_name(header.title)
+        path, pattern = parent_path(header.parent)
+        full_path = _join_path(path, name)
+        full_pattern = _header_pattern(header.title, name, pattern)
+        paths[header] = (full_path, full_pattern)
+
+        if name:  # Only add if name is not empty
+            variables.append(
+                Variable(
+                    name=name,
+                    doc=header.content,
+                    path=full_path,
+                    line=header.line,
+                    pattern=full_pattern,
+                )
+            )
+
+    return variables
 
 
 def parse_document(markdown: str) -> Document:
@@ -326,40 +1216,58 @@ def parse_document(markdown: str) -> Document:
     parses the tree to create a Document object.
     """
     header_tree = parse_header_tree(markdown)
-    variables = {}
-
-    def process_header(header: Header, parent_path: str = ""):
-        # Clean the title to get the variable name
-        title = header.title
+    return Document(_header_variables(header_tree.headers), tree=header_tree)
 
-        # Remove placeholders like {key} or [item]
-        title = re.sub(r"\{[^}]+\}", "", title)
-        title = re.sub(r"\[[^\]]+\]", "", title)
 
-        # Remove parent path prefix if present
-        title = title.split(".")[-1].strip()
+def parse_document_file(source: Union[IO, "mmap"]) -> Document:
+    """Parse the document from a file object or mmap without reading it whole.
 
-        # Build the full path
-        if parent_path:
-            full_path = f"{parent_path}.{title}"
-        else:
-            full_path = title
-
-        # Create variable
-        var = Variable(name=title, doc=header.content)
-
-        # Store with both the full path and just the name
-        if title:  # Only add if title is not empty
-            variables[full_path] = var
-            variables[title] = var
+    Same as `parse_document(source.read())` but the file is streamed line by
+    line and only read up to `<!-- doc-end -->`, so big generated files are
+    parsed without holding their text in memory.
+    """
+    header_tree = parse_header_tree_file(source)
+    return Document(_header_variables(header_tree.headers), tree=header_tree)
 
-        # Process children
-        for child in header.children:
-            process_header(child, full_path if title else parent_path)
 
-    # Process all top-level headers
-    for header in header_tree.headers:
-        if header.parent is None:
-            process_header(header)
+def parse_document_lazy(buffer, source=None) -> Document:
+    """Parse the document from the bytes of the file, e.g. an mmap of it.
 
-    return Document(variables=variables)
+    Only the headings are read, the docs are `LazyDoc` spans of `source`
+    (`buffer` by default) read on the first access to `Variable.doc`.
+    The document has no header tree, it can not be re-parsed incrementally.
+    """
+    source = buffer if source is None else source
+    document = Document(_header_variables(_scan_lazy_headers(buffer, source)))
+    document.source = source
+    return document
+
+
+def reparse_document(
+    document: Document,
+    markdown: str,
+    start_line: int,
+    end_line: int,
+    new_end_line: int,
+    full_parse: bool = True,
+) -> Optional[Document]:
+    """Update the Document after an edit of the markdown file.
+
+    Same as `reparse_header_tree`, the variables of the re-parsed headings are
+    replaced in the document indexes in place, when a full parse is needed
+    (or the document has no tree) a new Document is returned, or None if
+    `full_parse` is False so the caller can parse it somewhere else.
+    """
+    edit = None
+    if document.tree is not None:
+        lines = markdown.split("\n")
+        edit = _patch_header_tree(
+            document.tree, lines, start_line, end_line, new_end_line
+        )
+
+    if edit is None:
+        return parse_document(markdown) if full_parse else None
+
+    first_line, stop_line, delta, headers = edit
+    document.patch(first_line, stop_line, delta, _header_variables(headers))
+    return document
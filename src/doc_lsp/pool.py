@@ -0,0 +1,180 @@
+"""
+Reading and parsing documentation files outside of the server thread.
+
+`read_documentation` parses a documentation file, or loads the parse stored
+on the disk cache. With `--parse-workers N` it runs on a pool of N processes
+(`ParsePool`) so a huge file does not stall the requests that are served
+from the cache meanwhile.
+
+Workers send the document back as columns (see `dump_document`), lists of
+plain strings and ints are much cheaper to pickle than the Variable nodes.
+
+With `--lazy-docs` the file is mapped in memory (`MappedFile`) and only the
+headings are parsed, the docs are read from the mapping when first shown.
+Not on Windows, where a mapped file can not be truncated or replaced: the
+editor could not save a documentation file while its document is cached.
+"""
+
+import mmap
+import os
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
+
+from .disk_cache import DiskCache, dump_document, load_document
+from .parser import Document, parse_document_file, parse_document_lazy
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+
+# Do not keep a file descriptor open per mapping (Python 3.13+)
+_MMAP_OPTIONS = {"trackfd": False} if sys.version_info >= (3, 13) else {}
+
+# Mapped files can not be saved on Windows, `lazy` is ignored there
+LAZY_DOCS_SUPPORTED = os.name != "nt"
+
+
+class MappedFile:
+    """A documentation file mapped in memory, sliced by the lazy docs of its document.
+
+    Reading a mapping past the end of a file truncated since then crashes
+    with SIGBUS, so the mapping is only read while the file is not modified in
+    place, OSError is raised otherwise. A file replaced (editors usually save
+    to a new file and rename it) or deleted keeps the mapped content.
+    """
+
+    __slots__ = ("path", "stat", "buffer")
+
+    def __init__(self, path: Path, stat: os.stat_result, buffer: mmap.mmap):
+        self.path = path
+        self.stat = stat
+        self.buffer = buffer
+
+    def __getitem__(self, span: slice) -> bytes:
+        try:
+            current = os.stat(self.path)
+        except OSError:
+            return self.buffer[span]
+        if current.st_ino == self.stat.st_ino and (
+            current.st_size != self.stat.st_size
+            or current.st_mtime_ns != self.stat.st_mtime_ns
+        ):
+            raise OSError(f"{self.path} was modified since it was mapped")
+        return self.buffer[span]
+
+
+def read_documentation(
+    doc_file: Path,
+    stat: os.stat_result,
+    disk_cache: Optional[DiskCache] = None,
+    lazy: bool = False,
+) -> Document:
+    """Parse the documentation file, or load the parse stored by a previous run.
+
+    `lazy` maps the file and leaves the docs on the mapping, unless the parse
+    is stored on the disk cache, which needs all of them, or on Windows.
+    Safe to call from any thread or process, it does not touch the memory caches.
+    """
+    if disk_cache is not None:
+        document = disk_cache.load(doc_file, stat)
+        if document is not None:
+            return document
+
+    # Streamed or mapped, the text of the file is never held in memory whole
+    with open(doc_file, "rb") as f:
+        if lazy and disk_cache is None and LAZY_DOCS_SUPPORTED:
+            file_stat = os.fstat(f.fileno())
+            if file_stat.st_size:
+                buffer = mmap.mmap(
+                    f.fileno(), 0, access=mmap.ACCESS_READ, **_MMAP_OPTIONS
+                )
+                return parse_document_lazy(
+                    buffer, MappedFile(doc_file, file_stat, buffer)
+                )
+        document = parse_document_file(f)
+    if disk_cache is not None:
+        disk_cache.store(doc_file, stat, None, document)
+    return document
+
+
+def _read_columns(doc_file: str, cache_dir: Optional[str]) -> tuple[float, tuple]:
+    """Run on a worker process, return the mtime and the columns of the document."""
+    path = Path(doc_file)
+    stat = path.stat()
+    disk_cache = DiskCache(Path(cache_dir)) if cache_dir else None
+    return stat.st_mtime, dump_document(read_documentation(path, stat, disk_cache))
+
+
+def map_files(
+    func: Callable[[str], object], paths: list[Path], workers: int
+) -> Iterator[tuple[Path, object]]:
+    """Yield each path with `func(str(path))`, run on `workers` processes, in order.
+
+    The result is the exception raised when `func` failed. With one worker or
+    one path `func` runs on this process. Used by the batch commands.
+    """
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            try:
+                yield path, func(str(path))
+            except Exception as e:
+                yield path, e
+        return
+
+    # Imported here, the workers import this module and do not need them
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # fork() is not safe if the caller runs threads
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(paths)),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        futures = [executor.submit(func, str(path)) for path in paths]
+        for path, future in zip(paths, futures):
+            try:
+                yield path, future.result()
+            except Exception as e:
+                yield path, e
+
+
+class ParsePool:
+    """Pool of `workers` processes reading documentation files."""
+
+    def __init__(self, workers: int):
+        # Imported here, the workers import this module and do not need them
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.workers = workers
+        # The server runs threads, fork() could copy a held lock into the workers
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def submit(
+        self, doc_file: Path, disk_cache: Optional[DiskCache] = None
+    ) -> "Future[tuple[float, tuple]]":
+        """Read the file on a worker, the result is (mtime, columns)."""
+        cache_dir = str(disk_cache.cache_dir) if disk_cache is not None else None
+        return self._executor.submit(_read_columns, str(doc_file), cache_dir)
+
+    def read(
+        self, doc_file: Path, disk_cache: Optional[DiskCache] = None
+    ) -> tuple[float, Document]:
+        """Read the file on a worker, blocking until done."""
+        mtime, columns = self.submit(doc_file, disk_cache).result()
+        return mtime, load_document(columns)
+
+    async def read_async(
+        self, doc_file: Path, disk_cache: Optional[DiskCache] = None
+    ) -> tuple[float, Document]:
+        """Read the file on a worker without blocking the event loop."""
+        import asyncio
+
+        mtime, columns = await asyncio.wrap_future(self.submit(doc_file, disk_cache))
+        return mtime, load_document(columns)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,173 @@
+"""
+Prebuilt index of the documentation files of a tree.
+
+`doc-lsp index DIR...` parses the companion docs under the directories on all
+the cores and writes them to a single index file, the server loads it with
+`--index-file` and serves the documentation of the indexed files without
+parsing them, e.g. an index built on CI for a big repository.
+
+The index is JSON lines, so it can be read by any Python version (unlike the
+marshaled disk cache entries). The first line is the table of contents, each
+other line the columns of a document (see `dump_document`):
+
+    {"format": ["doc-lsp-index", 1, PARSER_VERSION],
+     "files": {"app/settings.py.md": [size, content_hash, offset, length], ...}}
+    [names, docs, paths, lines, patterns]
+
+File paths are relative to the directory of the index file, offsets to the
+end of the first line. Opening the index only reads the table of contents, a
+document is read when its file is first loaded, and only used if the size
+and content hash of the file match.
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .disk_cache import dump_document, file_hash, load_document
+from .docfiles import SUPPORTED_EXTENSIONS, canonical_path, find_doc_files
+from .parser import PARSER_VERSION, Document
+from .pool import map_files, read_documentation
+
+INDEX_FORMAT = ["doc-lsp-index", 1, PARSER_VERSION]
+
+DEFAULT_INDEX_FILE = "doc-lsp-index.jsonl"
+
+
+def _index_entry(doc_file: str) -> tuple[int, str, bytes]:
+    """Run on a worker process, return the size, content hash and line of the file."""
+    path = Path(doc_file)
+    stat = path.stat()
+    columns = dump_document(read_documentation(path, stat))
+    line = json.dumps(columns, ensure_ascii=False, separators=(",", ":"))
+    return stat.st_size, file_hash(path).hex(), line.encode("utf-8") + b"\n"
+
+
+def _relative_name(doc_file: Path, base: Path) -> str:
+    # Resolved like the paths the server looks the documents up with
+    doc_file = canonical_path(doc_file.absolute())
+    try:
+        return Path(os.path.relpath(doc_file, os.path.realpath(base))).as_posix()
+    except ValueError:
+        # On another drive (Windows)
+        return doc_file.as_posix()
+
+
+def write_index(
+    roots: Iterable[Path], output: Path, workers: Optional[int] = None
+) -> tuple[int, list[tuple[Path, Exception]]]:
+    """Parse the documentation files under `roots` on `workers` processes (all
+    the cores by default) and write them to the index file `output`.
+
+    Return the number of files indexed and the (file, error) of the ones that
+    could not be read, which are left out of the index.
+    """
+    output = Path(output).absolute()
+    base = output.parent
+    doc_files = find_doc_files(roots, SUPPORTED_EXTENSIONS)
+
+    files = {}
+    errors = []
+    # The documents are spooled to a temporary file while the table of
+    # contents, written first, is not complete
+    with tempfile.TemporaryFile(dir=base) as body:
+        offset = 0
+        results = map_files(_index_entry, doc_files, workers or os.cpu_count() or 1)
+        for doc_file, result in results:
+            if isinstance(result, Exception):
+                logging.error(f"Error parsing {doc_file}: {result}")
+                errors.append((doc_file, result))
+                continue
+            size, digest, line = result
+            files[_relative_name(doc_file, base)] = [size, digest, offset, len(line)]
+            body.write(line)
+            offset += len(line)
+
+        header = json.dumps(
+            {"format": INDEX_FORMAT, "files": files}, ensure_ascii=False
+        )
+        # Write to a temporary file and rename, a running server keeps the old one
+        tmp_path = output.with_name(f"{output.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(header.encode("utf-8") + b"\n")
+                body.seek(0)
+                shutil.copyfileobj(body, f)
+            os.replace(tmp_path, output)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+    return len(files), errors
+
+
+class PrebuiltIndex:
+    """The documents of an index file written by `write_index`.
+
+    Raises OSError if the file can not be read and ValueError if it is not an
+    index of this version. The file is kept open, replacing it does not affect
+    an index already loaded.
+    """
+
+    def __init__(self, index_file: Path):
+        self.index_file = Path(index_file).absolute()
+        self.hits = 0
+        self.misses = 0
+        self._file = open(self.index_file, "rb")
+        self._lock = threading.Lock()
+        # mtime of the files whose content hash matched, not hashed again
+        self._verified: dict[str, float] = {}
+        try:
+            header = json.loads(self._file.readline())
+            if not isinstance(header, dict) or header.get("format") != INDEX_FORMAT:
+                raise ValueError(
+                    f"{self.index_file} is not an index of this doc-lsp version, build it again"
+                )
+            base = Path(os.path.realpath(self.index_file.parent))
+            self._files: dict[str, list] = {
+                os.path.normpath(base / name): entry
+                for name, entry in header["files"].items()
+            }
+        except Exception:
+            self._file.close()
+            raise
+        self._start = self._file.tell()
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def load(self, doc_file: Path, stat: os.stat_result) -> Optional[Document]:
+        """Get the indexed document if it was parsed from the same file content."""
+        key = os.path.normpath(doc_file)
+        entry = self._files.get(key)
+        if entry is None or entry[0] != stat.st_size:
+            self.misses += 1
+            return None
+
+        _, digest, offset, length = entry
+        try:
+            if self._verified.get(key) != stat.st_mtime:
+                if file_hash(doc_file).hex() != digest:
+                    self.misses += 1
+                    return None
+                self._verified[key] = stat.st_mtime
+            with self._lock:
+                self._file.seek(self._start + offset)
+                line = self._file.read(length)
+            columns = json.loads(line)
+        except (OSError, ValueError) as e:
+            logging.debug(f"Ignoring the index entry of {doc_file}: {e}")
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return load_document(columns)
+
+    def stats(self) -> dict[str, int]:
+        return {"files": len(self._files), "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        self._file.close()
@@ -0,0 +1,89 @@
+"""
+Profiling of a running server, enabled from the command line.
+
+`--profile-out FILE` runs the server under cProfile and `--trace-memory FILE`
+traces the memory allocations with tracemalloc. Both are written on shutdown
+or when the client sends the `docLsp/dumpProfile` request, so a profile can be
+taken from a real editor session:
+
+```python
+pstats.Stats("doc-lsp.prof").sort_stats("cumulative").print_stats(30)
+for stat in tracemalloc.Snapshot.load("doc-lsp.mem").statistics("lineno")[:20]:
+    print(stat)
+```
+
+cProfile only sees the thread that enabled it, the one running the event loop
+and the request handlers. Parses on the thread or process pool are not in the
+profile, their durations are in `docLsp/stats`.
+"""
+
+import logging
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import cProfile
+
+# Frames kept per allocation traceback
+TRACE_MEMORY_FRAMES = 10
+
+
+class Profiler:
+    """cProfile and tracemalloc, each one enabled when its output file is set."""
+
+    def __init__(
+        self, profile_out: Optional[Path] = None, trace_memory: Optional[Path] = None
+    ):
+        self.profile_out = profile_out
+        self.trace_memory = trace_memory
+        self._profile: Optional["cProfile.Profile"] = None
+
+    @property
+    def enabled(self) -> bool:
+        # tracemalloc is only imported when tracing
+        tracing = (
+            "tracemalloc" in sys.modules and sys.modules["tracemalloc"].is_tracing()
+        )
+        return self._profile is not None or tracing
+
+    def start(self) -> None:
+        # Imported only when enabled, they are not needed to serve
+        if self.trace_memory is not None:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACE_MEMORY_FRAMES)
+        if self.profile_out is not None and self._profile is None:
+            import cProfile
+
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def dump(self) -> dict[str, Optional[str]]:
+        """Write the profile and memory snapshot so far, return the files written."""
+        import tracemalloc
+
+        written: dict[str, Optional[str]] = {"profile": None, "memory": None}
+        if self._profile is not None:
+            # dump_stats() disables the profiler, the profile keeps accumulating
+            self._profile.dump_stats(self.profile_out)
+            self._profile.enable()
+            written["profile"] = str(self.profile_out)
+        if self.trace_memory is not None and tracemalloc.is_tracing():
+            tracemalloc.take_snapshot().dump(str(self.trace_memory))
+            written["memory"] = str(self.trace_memory)
+        if any(written.values()):
+            logging.info(f"Profile written: {written}")
+        return written
+
+    def stop(self) -> None:
+        """Write the files and stop profiling."""
+        self.dump()
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile = None
+        if self.trace_memory is not None:
+            import tracemalloc
+
+            tracemalloc.stop()
@@ -0,0 +1,596 @@
+"""
+Full path of the key under the cursor on the config files.
+
+The word under the cursor is not enough to find the documentation, `NAME`
+can be `DATABASES.default.NAME` or `CACHES.default.NAME`. The resolvers find
+the keys enclosing the one under the cursor, per language:
+
+- YAML: the previous keys with less indentation.
+- JSON and Python: the keys owning the enclosing `{`, `[` and `(`.
+- TOML and INI: the `[table]` or `[section]` the key is in.
+
+Text inside multi-line strings has no keys: the content of YAML `|` and `>`
+block scalars, and of Python and TOML triple-quoted strings.
+
+Each line is scanned once into a small summary, and the line enclosing each
+line is memoized, so once warm resolving a key only walks up its parents.
+The triple quote open at the start of each line is memoized the same way.
+Resolvers are kept for the open documents, `changed` forgets the scans of
+the edited lines and the memo from the first edited line on. `keys` lists
+the keys of the whole document, for `doc-lsp check`.
+"""
+
+import keyword
+import re
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional
+
+KeyPath = list[str]
+
+_UNKNOWN = object()
+
+
+class KeyResolver(ABC):
+    """Resolve the key paths on the lines of a document, base of each language."""
+
+    # The language has triple-quoted strings spanning lines, see `string_end`
+    multiline_strings = False
+
+    def __init__(self, lines: list[str]):
+        self.lines = lines  # the list kept up to date by `apply_change`
+        self._scans: list = [_UNKNOWN] * len(lines)
+        self._parents: list = []  # `find_parent` of the first lines
+        self._strings: list[Optional[str]] = []  # `string_at` of the first lines
+
+    def changed(self, start_line: int, end_line: int, new_end_line: int) -> None:
+        """Forget what the edit may have changed, `lines` is already edited."""
+        self._scans[start_line : end_line + 1] = [_UNKNOWN] * (
+            new_end_line - start_line + 1
+        )
+        del self._parents[start_line:]
+        del self._strings[start_line:]
+
+    def scan(self, index: int):
+        if self.multiline_strings:
+            quote = self.string_at(index)
+            if quote is not None:
+                # Scans of the lines starting in a string are not kept, they are few
+                return self.scan_line(self.lines[index], quote)
+        scan = self._scans[index]
+        if scan is _UNKNOWN:
+            scan = self._scans[index] = self.scan_line(self.lines[index])
+        return scan
+
+    def string_at(self, index: int) -> Optional[str]:
+        """The triple quote of the string the line starts in, None if it starts in code."""
+        if not self.multiline_strings:
+            return None
+        strings = self._strings
+        for i in range(len(strings), index + 1):
+            quote = strings[i - 1] if i else None
+            if i:
+                text = self.lines[i - 1]
+                if '"""' in text or "'''" in text:
+                    quote = self.string_end(text, quote)
+            strings.append(quote)
+        return strings[index]
+
+    def parent(self, index: int):
+        """Memoized `find_parent`, lines before `index` are computed first."""
+        parents = self._parents
+        for i in range(len(parents), index + 1):
+            parents.append(self.find_parent(i))
+        return parents[index]
+
+    @property
+    def warm(self) -> bool:
+        """True when the parents of all the lines are known."""
+        return len(self._parents) >= len(self.lines)
+
+    def warm_up(self, count: int) -> bool:
+        """Compute the parents of the next `count` lines, return `warm`."""
+        known = len(self._parents)
+        if known < len(self.lines):
+            self.parent(min(known + count, len(self.lines)) - 1)
+        return self.warm
+
+    @abstractmethod
+    def scan_line(self, text: str, quote: Optional[str] = None):
+        """Summary of the line used to find parents, `quote` is `string_at` the line."""
+
+    @abstractmethod
+    def string_end(self, text: str, quote: Optional[str]) -> Optional[str]:
+        """The triple quote still open at the end of the line, `quote` the one
+        open at its start, only used when `multiline_strings`."""
+
+    @abstractmethod
+    def find_parent(self, index: int):
+        """What encloses the start of the line, `parent` of previous lines is known."""
+
+    @abstractmethod
+    def resolve(self, line: int, character: int) -> Optional[KeyPath]:
+        """Path of the key at the position, None if the cursor is not on a key."""
+
+    @abstractmethod
+    def key_columns(self, line: int) -> list[int]:
+        """Columns of the keys on the line."""
+
+    def line_keys(self, line: int) -> list[tuple[int, KeyPath]]:
+        """(column, path) of each key of the line."""
+        keys = []
+        for column in self.key_columns(line):
+            path = self.resolve(line, column)
+            if path:
+                keys.append((column, path))
+        return keys
+
+    def keys(self) -> Iterator[tuple[int, int, KeyPath]]:
+        """(line, column, path) of each key of the document, in order."""
+        for line in range(len(self.lines)):
+            for column, path in self.line_keys(line):
+                yield line, column, path
+
+    def enclosing(self, line: int) -> Optional[tuple[int, int]]:
+        """What the key paths of the line depend on besides its text, as (line,
+        position on that line): an earlier line keeps its keys while its own
+        text and enclosing stay the same."""
+        if self.string_at(line) is not None:
+            # Lines starting in a string depend on the lines before
+            return line - 1, -1
+        parent = self.parent(line)
+        return None if parent is None else (parent, 0)
+
+    def settles(self, line: int) -> bool:
+        """True when the lines after it depend on the lines before only through
+        the line and its `enclosing`: past an edit, the keys of the following
+        lines do not change once such a line keeps its own."""
+        # The parent of the next line is found from the line and its parent
+        return True
+
+
+def _unquote(key: str) -> str:
+    if len(key) > 1 and key[0] == key[-1] and key[0] in "\"'":
+        return key[1:-1]
+    return key
+
+
+YAML_QUOTED_KEY_RE = re.compile(
+    r"""("(?:[^"\\]|\\.)*"|'(?:[^']|'')*')[ \t]*:(?:[ \t]|$)"""
+)
+# `|` or `>` with the chomping and indentation indicators, e.g. `|-` or `>2`
+YAML_BLOCK_SCALAR_RE = re.compile(r"[ \t]*[|>][-+0-9]*[ \t]*(?:#.*)?$")
+
+
+class YamlResolver(KeyResolver):
+    """Keys are nested by indentation, list items (`- `) add no segment.
+
+    Scans are (start, column, key, key_end, block), `start` is the column of
+    the first `-` of a list item, `column` the column of the key and `block`
+    the column the content of a block scalar (`key: |`) must be indented more
+    than, or None. The parent of the content lines is the line of the block.
+    """
+
+    def scan_line(self, text: str, quote: Optional[str] = None):
+        column = len(text) - len(text.lstrip(" "))
+        if column == len(text) or text[column] == "#":
+            return None
+        if column == 0 and text.rstrip() in ("---", "..."):
+            return None
+
+        start = column
+        while text[column] == "-":
+            rest = text[column + 1 :].lstrip(" \t")
+            if rest and len(rest) == len(text) - column - 1:
+                break  # `-key: value` is not a list item
+            column = len(text) - len(rest)
+            if not rest:
+                return start, column, None, column, None
+
+        if text[column] in "\"'":
+            match = YAML_QUOTED_KEY_RE.match(text, column)
+            if match is None:
+                return start, column, None, column, None
+            block = column if YAML_BLOCK_SCALAR_RE.match(text, match.end()) else None
+            return start, column, match.group(1)[1:-1], match.end(1), block
+        if text[column] in "{[":
+            return start, column, None, column, None
+
+        # Plain keys end at the first `: ` (or `:` at the end of the line)
+        colon = text.find(":", column)
+        while colon != -1 and colon + 1 < len(text) and text[colon + 1] not in " \t":
+            colon = text.find(":", colon + 1)
+        key = text[column:colon].rstrip() if colon != -1 else ""
+        if not key or "#" in key:
+            # `- |` list item
+            block = start if YAML_BLOCK_SCALAR_RE.match(text, column) else None
+            return start, column, None, column, block
+        block = column if YAML_BLOCK_SCALAR_RE.match(text, colon + 1) else None
+        return start, column, key, column + len(key), block
+
+    def string_end(self, text: str, quote: Optional[str]) -> Optional[str]:
+        return None  # block scalars are found by indentation, see `in_block`
+
+    def find_parent(self, index: int) -> Optional[int]:
+        """The nearest previous line with a key less indented than the line."""
+        scan = self.scan(index)
+        if scan is None:
+            return None
+        start = scan[0]
+
+        k = index - 1
+        while k >= 0:
+            previous = self.scan(k)
+            if previous is None:
+                k -= 1
+            elif (previous[2] is not None and previous[1] < start) or (
+                previous[4] is not None and previous[4] < start
+            ):
+                if not self.in_block(k):
+                    return k
+                k = self.parent(k)
+            elif previous[0] >= start:
+                # Lines between k and its parent are indented at least as k
+                parent = self.parent(k)
+                k = -1 if parent is None else parent
+            else:
+                k -= 1
+        return None
+
+    def in_block(self, line: int) -> bool:
+        """True when the line is the content of a block scalar."""
+        parent = self.parent(line)
+        return parent is not None and self.scan(parent)[4] is not None
+
+    def resolve(self, line: int, character: int) -> Optional[KeyPath]:
+        scan = self.scan(line)
+        if scan is None or scan[2] is None or not scan[1] <= character <= scan[3]:
+            return None
+        if self.in_block(line):
+            return None
+        return self._path(line, scan[2])
+
+    def _path(self, line: int, key: str) -> KeyPath:
+        path = [key]
+        parent = self.parent(line)
+        while parent is not None:
+            path.append(self.scan(parent)[2])
+            parent = self.parent(parent)
+        path.reverse()
+        return path
+
+    def key_columns(self, line: int) -> list[int]:
+        scan = self.scan(line)
+        if scan is None or scan[2] is None or self.in_block(line):
+            return []
+        return [scan[1]]
+
+    def line_keys(self, line: int) -> list[tuple[int, KeyPath]]:
+        # Not `resolve` on each of `key_columns`, the line has one key
+        scan = self.scan(line)
+        if scan is None or scan[2] is None or self.in_block(line):
+            return []
+        return [(scan[1], self._path(line, scan[2]))]
+
+    def settles(self, line: int) -> bool:
+        # `find_parent` steps over blank lines and list items to the lines
+        # before, a key that is not a list item leads it to its parents only
+        scan = self.scan(line)
+        return scan is not None and scan[2] is not None and scan[0] == scan[1]
+
+
+# The rest of a triple-quoted string, up to its closing quotes
+TRIPLE_QUOTED_RE = {
+    '"""': re.compile(r'(?:[^"\\]|\\.|"(?!""))*"""'),
+    "'''": re.compile(r"(?:[^'\\]|\\.|'(?!''))*'''"),
+}
+
+JSON_TOKEN_RE = re.compile(
+    r"""(?P<string>"(?:[^"\\]|\\.)*")(?P<colon>[ \t]*:)?|(?P<open>[\[{])|(?P<close>[\]}])"""
+)
+
+PYTHON_TOKEN_RE = re.compile(
+    r"""
+    (?P<comment>\#)
+    | [rRbBuUfF]{0,2}(?P<triple>\"\"\"|\'\'\')
+    | [rRbBuUfF]{0,2}(?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')(?P<colon>[ \t]*:)?
+    | (?P<name>[A-Za-z_]\w*)(?P<assign>[ \t]*(?:=(?!=)|:))?
+    | (?P<open>[\[{(])
+    | (?P<close>[\]})])
+    """,
+    re.VERBOSE,
+)
+
+# (kind, key, start, end), kind is "key", "open", "close" or "string", a
+# triple-quoted string left open at the end of the line, its key the quote
+Token = tuple[str, Optional[str], int, int]
+
+
+class JsonResolver(KeyResolver):
+    """Keys are nested by the brackets, the key before a bracket owns it.
+
+    Scans are (closers, openers): the brackets of the line not matched on
+    the same line, with the key owning each opener (None for list items).
+    Parents are the enclosing opener as (line, index in the openers).
+    """
+
+    brackets = frozenset("{}[]")
+
+    def tokens(self, text: str, quote: Optional[str] = None) -> list[Token]:
+        tokens = []
+        for match in JSON_TOKEN_RE.finditer(text):
+            if match["open"]:
+                tokens.append(("open", None, match.start(), match.end()))
+            elif match["close"]:
+                tokens.append(("close", None, match.start(), match.end()))
+            elif match["colon"]:
+                start, end = match.span("string")
+                tokens.append(("key", text[start + 1 : end - 1], start, end))
+        return tokens
+
+    def scan_line(self, text: str, quote: Optional[str] = None):
+        if self.brackets.isdisjoint(text):
+            return 0, ()
+
+        closers = 0
+        openers = []
+        previous = None
+        for token in self.tokens(text, quote):
+            if token[0] == "open":
+                owner = previous[1] if previous and previous[0] == "key" else None
+                openers.append(owner)
+            elif token[0] == "close":
+                if openers:
+                    openers.pop()
+                else:
+                    closers += 1
+            previous = token
+        return closers, tuple(openers)
+
+    def string_end(self, text: str, quote: Optional[str]) -> Optional[str]:
+        return None  # JSON strings do not span lines
+
+    def find_parent(self, index: int) -> Optional[tuple[int, int]]:
+        if index == 0:
+            return None
+        closers, openers = self.scan(index - 1)
+        if openers:
+            return index - 1, len(openers) - 1
+        return self._close(self.parent(index - 1), closers)
+
+    def _close(self, opener: Optional[tuple[int, int]], count: int):
+        """The opener enclosing `opener`, `count` levels up."""
+        for _ in range(count):
+            if opener is None:
+                break
+            line, index = opener
+            opener = (line, index - 1) if index > 0 else self.parent(line)
+        return opener
+
+    def resolve(self, line: int, character: int) -> Optional[KeyPath]:
+        tokens = self.tokens(self.lines[line], self.string_at(line))
+        for position, token in enumerate(tokens):
+            if token[0] == "key" and token[2] <= character <= token[3]:
+                return self._path(line, tokens, position)
+        return None
+
+    def _path(self, line: int, tokens: list[Token], position: int) -> KeyPath:
+        """Path of the key `tokens[position]` of the line."""
+        token = tokens[position]
+
+        # Brackets before the key on the same line
+        owners = []
+        closers = 0
+        previous = None
+        for before in tokens[:position]:
+            if before[0] == "open":
+                owners.append(
+                    previous[1] if previous and previous[0] == "key" else None
+                )
+            elif before[0] == "close":
+                if owners:
+                    owners.pop()
+                else:
+                    closers += 1
+            previous = before
+
+        path = [token[1]]
+        path.extend(owner for owner in reversed(owners) if owner is not None)
+        opener = self._close(self.parent(line), closers)
+        while opener is not None:
+            owner = self.scan(opener[0])[1][opener[1]]
+            if owner is not None:
+                path.append(owner)
+            opener = self._close(opener, 1)
+        path.reverse()
+        return path
+
+    def key_columns(self, line: int) -> list[int]:
+        tokens = self.tokens(self.lines[line], self.string_at(line))
+        return [token[2] for token in tokens if token[0] == "key"]
+
+    def line_keys(self, line: int) -> list[tuple[int, KeyPath]]:
+        # The line is tokenized once, not once per key
+        tokens = self.tokens(self.lines[line], self.string_at(line))
+        return [
+            (token[2], self._path(line, tokens, position))
+            for position, token in enumerate(tokens)
+            if token[0] == "key"
+        ]
+
+    def enclosing(self, line: int) -> Optional[tuple[int, int]]:
+        if self.string_at(line) is not None:
+            return line - 1, -1
+        return self.parent(line)
+
+
+class PythonResolver(JsonResolver):
+    """Dict literals like JSON, plus `NAME = ...` assignments and `NAME=` keyword arguments."""
+
+    brackets = frozenset("{}[]()")
+    multiline_strings = True
+
+    def tokens(self, text: str, quote: Optional[str] = None) -> list[Token]:
+        tokens = []
+        position: Optional[int] = 0
+        if quote is not None:
+            # The line starts in a triple-quoted string
+            match = TRIPLE_QUOTED_RE[quote].match(text)
+            if match is None:
+                return [("string", quote, 0, len(text))]
+            position = match.end()
+        while position is not None:
+            position = self._tokens(text, position, tokens)
+        return tokens
+
+    def _tokens(self, text: str, position: int, tokens: list[Token]) -> Optional[int]:
+        """Add the tokens from `position` on, stop after a triple-quoted string
+        and return where it ends, None at the end of the line."""
+        for match in PYTHON_TOKEN_RE.finditer(text, position):
+            if match["comment"]:
+                break
+            if match["triple"]:
+                quote = match["triple"]
+                closing = TRIPLE_QUOTED_RE[quote].match(text, match.end())
+                if closing is None:
+                    tokens.append(("string", quote, match.start("triple"), len(text)))
+                    break
+                return closing.end()
+            if match["open"]:
+                tokens.append(("open", None, match.start(), match.end()))
+            elif match["close"]:
+                tokens.append(("close", None, match.start(), match.end()))
+            elif match["string"] and match["colon"]:
+                start, end = match.span("string")
+                tokens.append(("key", text[start + 1 : end - 1], start, end))
+            elif match["assign"] and not keyword.iskeyword(match["name"]):
+                # `NAME: type = value` annotations only at the top level
+                if match["assign"].strip() == ":" and match.start() != 0:
+                    continue
+                start, end = match.span("name")
+                tokens.append(("key", match["name"], start, end))
+        return None
+
+    def string_end(self, text: str, quote: Optional[str]) -> Optional[str]:
+        tokens = self.tokens(text, quote)
+        return tokens[-1][1] if tokens and tokens[-1][0] == "string" else None
+
+
+TABLE_KEY = r"""(?:[A-Za-z0-9_-]+|"(?:[^"\\]|\\.)*"|'[^']*')"""
+TOML_SEGMENT_RE = re.compile(TABLE_KEY)
+TOML_TABLE_RE = re.compile(
+    rf"""^[ \t]*\[\[?[ \t]*({TABLE_KEY}(?:[ \t]*\.[ \t]*{TABLE_KEY})*)[ \t]*\]\]?[ \t]*(?:\#.*)?$"""
+)
+TOML_KEY_RE = re.compile(
+    rf"""^[ \t]*({TABLE_KEY}(?:[ \t]*\.[ \t]*{TABLE_KEY})*)[ \t]*="""
+)
+# Literal strings have no escapes
+TOML_TRIPLE_QUOTED_RE = {
+    '"""': TRIPLE_QUOTED_RE['"""'],
+    "'''": re.compile(r"(?:[^']|'(?!''))*'''"),
+}
+TOML_STRING_RE = re.compile(
+    r"""\#|(?P<triple>\"\"\"|\'\'\')|"(?:[^"\\]|\\.)*"|'[^']*'"""
+)
+
+INI_SECTION_RE = re.compile(r"^[ \t]*\[([^\]]+)\]")
+INI_KEY_RE = re.compile(r"^[ \t]*([^\s=:#;\[][^=:]*?)[ \t]*[=:]")
+
+
+class TomlResolver(KeyResolver):
+    """Keys are nested in the last `[table]` (or `[[array]]`) and by dotted keys.
+
+    Scans are (is_table, segments), segments are (key, start, end) and the
+    parent of a line is the line of its table.
+    """
+
+    table_re = TOML_TABLE_RE
+    key_re = TOML_KEY_RE
+    multiline_strings = True
+
+    def segments(self, text: str, start: int, end: int) -> list[tuple[str, int, int]]:
+        return [
+            (_unquote(match.group()), match.start(), match.end())
+            for match in TOML_SEGMENT_RE.finditer(text, start, end)
+        ]
+
+    def scan_line(self, text: str, quote: Optional[str] = None):
+        if quote is not None:
+            # The rest of a multi-line string value
+            return None
+        for is_table, regex in ((True, self.table_re), (False, self.key_re)):
+            match = regex.match(text)
+            if match is not None:
+                return is_table, self.segments(text, *match.span(1))
+        return None
+
+    def string_end(self, text: str, quote: Optional[str]) -> Optional[str]:
+        position = 0
+        while True:
+            if quote is not None:
+                match = TOML_TRIPLE_QUOTED_RE[quote].match(text, position)
+                if match is None:
+                    return quote
+                position = match.end()
+                quote = None
+            for match in TOML_STRING_RE.finditer(text, position):
+                if match["triple"]:
+                    quote = match["triple"]
+                    position = match.end()
+                    break
+                if match.group() == "#":
+                    return None
+            if quote is None:
+                return None
+
+    def find_parent(self, index: int) -> Optional[int]:
+        if index == 0:
+            return None
+        scan = self.scan(index - 1)
+        if scan is not None and scan[0]:
+            return index - 1
+        return self.parent(index - 1)
+
+    def resolve(self, line: int, character: int) -> Optional[KeyPath]:
+        scan = self.scan(line)
+        if scan is None:
+            return None
+
+        is_table, segments = scan
+        for position, (_, start, end) in enumerate(segments):
+            if start <= character <= end:
+                break
+        else:
+            return None
+
+        path = []
+        table = None if is_table else self.parent(line)
+        if table is not None:
+            path.extend(key for key, _, _ in self.scan(table)[1])
+        path.extend(key for key, _, _ in segments[: position + 1])
+        return path
+
+    def key_columns(self, line: int) -> list[int]:
+        # Each segment of a dotted key or table is a key, `a.b = 1` defines `a`
+        scan = self.scan(line)
+        return [start for _, start, _ in scan[1]] if scan is not None else []
+
+
+class IniResolver(TomlResolver):
+    """Keys are nested in the last `[section]`, keys and sections are not dotted."""
+
+    table_re = INI_SECTION_RE
+    key_re = INI_KEY_RE
+    multiline_strings = False
+
+    def segments(self, text: str, start: int, end: int) -> list[tuple[str, int, int]]:
+        return [(text[start:end].strip(), start, end)]
+
+
+RESOLVERS: dict[str, type[KeyResolver]] = {
+    ".py": PythonResolver,
+    ".json": JsonResolver,
+    ".yaml": YamlResolver,
+    ".yml": YamlResolver,
+    ".toml": TomlResolver,
+    ".ini": IniResolver,
+}
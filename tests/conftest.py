@@ -14,6 +14,11 @@ from pytest_lsp import (
     ),
 )
 async def client(lsp_client: LanguageClient):
+    # Accept dynamic registrations (e.g. file watchers) as an editor would
+    @lsp_client.feature(types.CLIENT_REGISTER_CAPABILITY)
+    def register_capability(params: types.RegistrationParams):
+        lsp_client.registrations = params.registrations
+
     # Setup - Initialize the LSP session
     response = await lsp_client.initialize_session(
         types.InitializeParams(
@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 from lsprotocol import types
 from pytest_lsp import LanguageClient
@@ -90,3 +92,16 @@ async def test_completion_without_documentation(client: LanguageClient):
 
     # Should return empty list when no documentation file exists
     assert completion_response == []
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_watches_documentation_files(client: LanguageClient):
+    """Test that the server asks the client to watch the markdown files."""
+    for _ in range(50):
+        if getattr(client, "registrations", None):
+            break
+        await asyncio.sleep(0.1)
+
+    registration = client.registrations[0]
+    assert registration.method == types.WORKSPACE_DID_CHANGE_WATCHED_FILES
+    assert registration.register_options["watchers"][0]["globPattern"] == "**/*.md"
@@ -0,0 +1,127 @@
+import pytest
+
+from doc_lsp import cache as cache_module
+from doc_lsp.cache import DocCache, StatCache, estimate_size
+from doc_lsp.parser import parse_document
+
+
+def make_document(name: str):
+    return parse_document(f"## {name}\n> Documentation for {name}\n")
+
+
+def test_cache_hit_and_miss():
+    """Test that documents are only returned for the mtime they were parsed from."""
+    cache = DocCache()
+    document = make_document("FOO")
+    cache.put("foo.py.md", 1.0, document)
+
+    assert cache.get("foo.py.md", 1.0) is document
+    assert cache.get("foo.py.md", 2.0) is None
+    assert cache.get("bar.py.md", 1.0) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_cache_evicts_least_recently_used():
+    """Test LRU eviction by number of entries."""
+    cache = DocCache(max_entries=2)
+    cache.put("a", 1.0, make_document("A"))
+    cache.put("b", 1.0, make_document("B"))
+    cache.get("a", 1.0)  # b is now the least recently used
+    cache.put("c", 1.0, make_document("C"))
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_evicts_by_size():
+    """Test eviction by the approximate memory used."""
+    document = make_document("A")
+    size = estimate_size(document)
+    cache = DocCache(max_entries=None, max_bytes=size * 2)
+    for key in "abc":
+        cache.put(key, 1.0, make_document(key.upper()))
+
+    assert len(cache) == 2
+    assert cache.size <= size * 2
+
+    assert cache.invalidate("c")
+    assert not cache.invalidate("c")
+    assert len(cache) == 1
+
+
+def test_cache_evicts_mapped():
+    """Test that only the documents keeping a file mapped count for `max_mapped`."""
+    cache = DocCache(max_entries=None, max_bytes=None, max_mapped=1)
+    for key in "abc":
+        document = make_document(key.upper())
+        if key != "b":
+            document.source = object()  # a mapped file
+        cache.put(key, 1.0, document)
+
+    assert "a" not in cache
+    assert "b" in cache
+    assert "c" in cache
+    assert cache.stats()["mapped"] == 1
+
+    assert cache.invalidate("c")
+    assert cache.stats()["mapped"] == 0
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """The time seen by StatCache, set with `clock[0] = ...`."""
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_stat_cache_polls_every_interval(tmp_path, clock):
+    """Test that a missing companion doc is remembered until the interval passes."""
+    stat_cache = StatCache(interval=1.0)
+    doc_file = tmp_path / "settings.py.md"
+    assert stat_cache.stat(doc_file) is None
+
+    doc_file.write_text("## A\n> A\n", encoding="utf-8")
+    clock[0] = 100.5
+    assert stat_cache.stat(doc_file) is None
+    clock[0] = 101.0
+    assert stat_cache.stat(doc_file).st_size == 9
+    assert stat_cache.stats() == {"entries": 1, "hits": 1, "misses": 2}
+
+
+def test_stat_cache_interval_zero(tmp_path, clock):
+    """Test that an interval of 0 checks the file on every call."""
+    stat_cache = StatCache(interval=0)
+    doc_file = tmp_path / "settings.py.md"
+    assert stat_cache.stat(doc_file) is None
+
+    doc_file.write_text("## A\n> A\n", encoding="utf-8")
+    assert stat_cache.stat(doc_file).st_size == 9
+    doc_file.unlink()
+    assert stat_cache.stat(doc_file) is None
+    assert stat_cache.stats()["misses"] == 3
+
+
+def test_stat_cache_watching(tmp_path, clock):
+    """Test that results are trusted until invalidated when the client watches the files."""
+    stat_cache = StatCache(interval=1.0)
+    stat_cache.watching = True
+    doc_file = tmp_path / "settings.py.md"
+    assert stat_cache.stat(doc_file) is None
+
+    doc_file.write_text("## A\n> A\n", encoding="utf-8")
+    clock[0] = 1000.0
+    assert stat_cache.stat(doc_file) is None
+
+    # workspace/didChangeWatchedFiles
+    stat_cache.invalidate(str(doc_file))
+    assert stat_cache.stat(doc_file).st_size == 9
+
+    doc_file.write_text("## AB\n> AB\n", encoding="utf-8")
+    assert stat_cache.stat(doc_file).st_size == 9
+    stat_cache.invalidate(str(doc_file))
+    assert stat_cache.stat(doc_file).st_size == 11
+    assert stat_cache.stats() == {"entries": 1, "hits": 2, "misses": 3}
@@ -0,0 +1,134 @@
+import subprocess
+import sys
+
+import pytest
+
+from doc_lsp.check import check_document, check_file, check_tree, format_problem
+from doc_lsp.parser import parse_document
+
+SETTINGS = """\
+DEBUG = True
+DATABASES = {
+    "default": {
+        "NAME": "db",
+        "TIMEOUT": 3,
+    }
+}
+"""
+
+SETTINGS_DOC = """\
+## DEBUG
+> Debug mode
+
+## DATABASES
+> The databases
+
+### DATABASES.{db}
+> A database
+
+#### NAME
+> The database name
+
+## OLD_SETTING
+> Removed
+"""
+
+
+def write_tree(root):
+    (root / "app").mkdir()
+    (root / "app" / "settings.py").write_text(SETTINGS, encoding="utf-8")
+    (root / "app" / "settings.py.md").write_text(SETTINGS_DOC, encoding="utf-8")
+    (root / "config.yaml").write_text("server:\n  port: 80\n", encoding="utf-8")
+    (root / "config.yaml.md").write_text(
+        "## server\n> S\n\n### port\n> P\n", encoding="utf-8"
+    )
+
+
+def test_check_document(tmp_path):
+    """Test that keys without documentation and headings without keys are reported."""
+    problems = check_document(
+        tmp_path / "settings.py", SETTINGS.split("\n"), parse_document(SETTINGS_DOC)
+    )
+    assert [format_problem(problem) for problem in problems] == [
+        f"{tmp_path}/settings.py:5:9: undocumented key DATABASES.default.TIMEOUT",
+        f"{tmp_path}/settings.py.md:13:1: heading OLD_SETTING documents no key of settings.py",
+    ]
+
+
+def test_check_document_without_orphans(tmp_path):
+    problems = check_document(
+        tmp_path / "settings.py",
+        SETTINGS.split("\n"),
+        parse_document(SETTINGS_DOC),
+        orphans=False,
+    )
+    assert [message for _, _, _, message in problems] == [
+        "undocumented key DATABASES.default.TIMEOUT"
+    ]
+
+
+@pytest.mark.parametrize(
+    "name, config, doc, expected",
+    [
+        ("c.yaml", "a:\n  b: 1\n", "## a\n> A\n", ["undocumented key a.b"]),
+        ("c.json", '{"a": {"b": 1}}', "## a.b\n> B\n", ["undocumented key a"]),
+        ("c.toml", "[a]\nb = 1\n", "## a\n> A\n\n### b\n> B\n", []),
+        ("c.properties", "a.b = 1\nc: 2\n", "## a.b\n> A\n", ["undocumented key c"]),
+        ("c.yaml", "a: |\n  export PATH: /usr/bin\n  echo: hi\n", "## a\n> A\n", []),
+        ("c.py", 'A = """\nfoo = bar\n"""\n', "## A\n> A\n", []),
+        ("c.toml", '[a]\nb = """\nfoo = bar\n"""\n', "## a\n> A\n\n### b\n> B\n", []),
+    ],
+)
+def test_check_languages(tmp_path, name, config, doc, expected):
+    """Test that keys are found with the resolver of the language."""
+    problems = check_document(tmp_path / name, config.split("\n"), parse_document(doc))
+    assert [message for _, _, _, message in problems] == expected
+
+
+def test_check_file_without_config(tmp_path):
+    doc_file = tmp_path / "missing.toml.md"
+    doc_file.write_text("## X\n> X\n", encoding="utf-8")
+    assert check_file(str(doc_file)) == [
+        (str(doc_file), 1, 1, "no missing.toml to document")
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_check_tree(tmp_path, workers):
+    """Test that the problems of all the files are reported, in the order of the files."""
+    write_tree(tmp_path)
+    (tmp_path / "broken.py").write_text("X = 1\n", encoding="utf-8")
+    (tmp_path / "broken.py.md").write_bytes(b"## X\n> \xff\n")
+
+    problems = list(check_tree([tmp_path], workers))
+    assert [
+        (path.removeprefix(str(tmp_path)), line) for path, line, _, _ in problems
+    ] == [
+        ("/broken.py.md", 1),
+        ("/app/settings.py", 5),
+        ("/app/settings.py.md", 13),
+    ]
+    assert problems[0][3].startswith("could not be checked")
+
+
+def test_check_command(tmp_path):
+    """Test `doc-lsp check` output and exit status."""
+    write_tree(tmp_path)
+    command = [sys.executable, "-c", "from doc_lsp import main; main()", "check"]
+    result = subprocess.run(
+        [*command, "app"], cwd=tmp_path, capture_output=True, text=True
+    )
+    assert result.returncode == 1
+    assert result.stdout.splitlines() == [
+        "app/settings.py:5:9: undocumented key DATABASES.default.TIMEOUT",
+        "app/settings.py.md:13:1: heading OLD_SETTING documents no key of settings.py",
+    ]
+
+    (tmp_path / "app" / "settings.py.md").write_text(
+        SETTINGS_DOC.replace("#### NAME", "#### TIMEOUT\n> T\n\n#### NAME"),
+        encoding="utf-8",
+    )
+    result = subprocess.run(
+        [*command, "--no-orphans", "app"], cwd=tmp_path, capture_output=True, text=True
+    )
+    assert (result.returncode, result.stdout) == (0, "")
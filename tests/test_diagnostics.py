@@ -0,0 +1,293 @@
+import asyncio
+import random
+
+import pytest
+import pytest_lsp
+from lsprotocol import types
+from pygls.workspace import PositionCodec
+from pytest_lsp import ClientServerConfig, LanguageClient, client_capabilities
+
+from doc_lsp.diagnostics import KeyDiagnostics
+from doc_lsp.lines import apply_change, split_lines
+from doc_lsp.parser import parse_document, reparse_document
+from doc_lsp.resolvers import JsonResolver, PythonResolver, TomlResolver, YamlResolver
+
+YAML = """\
+databases:
+  default:
+    name: foo
+    options:
+      timeout: 30
+cache:
+  size: 10
+"""
+
+DOC = """\
+## databases
+> The databases
+
+### {key}
+> A database
+
+#### name
+> The database name
+"""
+
+
+def check(resolver_class, text, doc=DOC):
+    return KeyDiagnostics(resolver_class(split_lines(text))).check(parse_document(doc))
+
+
+def test_check():
+    """Test that the keys without documentation are found with their range."""
+    assert check(YamlResolver, YAML) == [
+        (3, 4, 11, ("databases", "default", "options")),
+        (4, 6, 13, ("databases", "default", "options", "timeout")),
+        (5, 0, 5, ("cache",)),
+        (6, 2, 6, ("cache", "size")),
+    ]
+    assert check(JsonResolver, '{"databases": {"x": {"name": 1, "port": 2}}}') == [
+        (0, 32, 38, ("databases", "x", "port")),
+    ]
+
+
+def test_edit_resolves_changed_lines():
+    """Test that only the edited lines and the keys nested under them are resolved again."""
+    lines = split_lines(YAML)
+    diagnostics = KeyDiagnostics(YamlResolver(lines))
+    document = parse_document(DOC)
+    diagnostics.check(document)
+
+    def edit(line, text):
+        lines[line] = text
+        diagnostics.resolver.changed(line, line, line)
+        diagnostics.changed(line, line, line)
+        return diagnostics.check(document)
+
+    # A value
+    assert len(edit(2, "    name: bar")) == 4
+    assert diagnostics.resolved == 1
+
+    # A parent key, the keys under it change path, `name` is documented by name
+    assert edit(0, "databasez:") == [
+        (0, 0, 9, ("databasez",)),
+        (1, 2, 9, ("databasez", "default")),
+        (3, 4, 11, ("databasez", "default", "options")),
+        (4, 6, 13, ("databasez", "default", "options", "timeout")),
+        (5, 0, 5, ("cache",)),
+        (6, 2, 6, ("cache", "size")),
+    ]
+    assert diagnostics.resolved == 5
+
+
+def test_document_change():
+    """Test that the kept keys are tested again on the new documentation."""
+    lines = split_lines(YAML)
+    diagnostics = KeyDiagnostics(YamlResolver(lines))
+    assert len(diagnostics.check(parse_document(DOC))) == 4
+    assert diagnostics.check(
+        parse_document(DOC + "\n## cache\n> C\n### size\n> S\n")
+    ) == [
+        (3, 4, 11, ("databases", "default", "options")),
+        (4, 6, 13, ("databases", "default", "options", "timeout")),
+    ]
+    assert diagnostics.resolved == 0
+
+
+def test_document_edited_in_place():
+    """Test that the keys are tested again when the document is patched by an edit."""
+    markdown = "## databases\n> d\n\n### name\n> n\n"
+    document = parse_document(markdown)
+    diagnostics = KeyDiagnostics(YamlResolver(split_lines("cache: 2")))
+    assert diagnostics.check(document) == [(0, 0, 5, ("cache",))]
+
+    edited = reparse_document(document, markdown + "## cache\n> c\n", 5, 5, 7)
+    assert edited is document
+    assert diagnostics.check(document) == []
+
+
+@pytest.mark.parametrize("resolver_class", [YamlResolver, PythonResolver])
+def test_edit_stops_where_structure_converges(resolver_class):
+    """Test that the lines after an edit are not all visited again."""
+    if resolver_class is YamlResolver:
+        text = "".join(f"cache{i}:\n  size: {i}\n  name: x\n" for i in range(200))
+    else:
+        text = "".join(
+            f"CACHE{i} = {{\n    'size': {i},\n    'name': 'x',\n}}\n"
+            for i in range(200)
+        )
+    lines = split_lines(text)
+    resolver = resolver_class(lines)
+    diagnostics = KeyDiagnostics(resolver)
+    document = parse_document("## name\n> The name\n")
+    assert len(diagnostics.check(document)) == 400
+    assert resolver.warm
+
+    lines[1] = lines[1].replace("size", "sized")
+    resolver.changed(1, 1, 1)
+    diagnostics.changed(1, 1, 1)
+    problems = diagnostics.check(document)
+    assert diagnostics.resolved == 1
+    assert not resolver.warm  # the parents of the last lines were not needed
+    assert problems == check(resolver_class, "\n".join(lines), "## name\n> The name\n")
+
+
+def test_edit_after_partial_update():
+    """Test that the lines a partial update did not reach are not kept as converged."""
+    lines = split_lines("A = 1\nB = 1\nC = 1\nD = 1\nE = 1\n")
+    resolver = PythonResolver(lines)
+    diagnostics = KeyDiagnostics(resolver)
+    document = parse_document(DOC)
+    diagnostics.check(document)
+
+    def edit(line, text):
+        lines[line] = text
+        resolver.changed(line, line, line)
+        diagnostics.changed(line, line, line)
+
+    edit(0, "A = (")  # the next lines are now nested
+    assert not diagnostics.update(document, 3)
+    edit(1, "B = 2")
+    assert diagnostics.check(document) == check(PythonResolver, "\n".join(lines))
+
+
+@pytest.mark.parametrize(
+    "resolver_class, text",
+    [
+        (YamlResolver, YAML),
+        (
+            JsonResolver,
+            '{\n"databases": {\n"default": {"name": 1},\n"x": [{"name": 2}]\n}\n}\n',
+        ),
+        (PythonResolver, 'databases = {\n    "default": dict(name=1),\n}\ncache = 1\n'),
+        (TomlResolver, "[databases.default]\nname = 1\n[cache]\nsize = 10\n"),
+    ],
+)
+def test_edits_match_fresh_check(resolver_class, text):
+    """Test that diagnostics kept across random edits are the ones of a new check."""
+    codec = PositionCodec()
+    rng = random.Random(0)
+    lines = split_lines(text)
+    resolver = resolver_class(lines)
+    diagnostics = KeyDiagnostics(resolver)
+    document = parse_document(DOC)
+    snippets = [
+        "\n",
+        "  ",
+        "{",
+        "}",
+        "[",
+        "]",
+        "name: ",
+        '"databases": ',
+        "name = ",
+        "[t]\n",
+        "- ",
+    ]
+    snippets += ['"""', "x: |\n"]
+
+    for step in range(100):
+        # A few edits, some lines are updated in between
+        for _ in range(rng.randint(1, 3)):
+            start_line = rng.randrange(len(lines))
+            end_line = rng.randrange(start_line, len(lines))
+            change = types.TextDocumentContentChangePartial(
+                range=types.Range(
+                    start=types.Position(
+                        start_line, rng.randint(0, len(lines[start_line]))
+                    ),
+                    end=types.Position(end_line, len(lines[end_line])),
+                ),
+                text="".join(rng.choice(snippets) for _ in range(rng.randint(0, 4))),
+            )
+            edit = apply_change(lines, change, codec)
+            resolver.changed(*edit)
+            diagnostics.changed(*edit)
+            if rng.random() < 0.3:
+                diagnostics.update(document, 1)
+
+        # Updated in steps every other edit
+        if step % 2:
+            while not diagnostics.update(document, 2):
+                pass
+            problems = diagnostics.problems()
+        else:
+            problems = diagnostics.check(document)
+        assert problems == check(resolver_class, "\n".join(lines))
+
+
+@pytest_lsp.fixture(
+    scope="module",
+    config=ClientServerConfig(server_command=["uv", "run", "doc-lsp", "--diagnostics"]),
+)
+async def diagnostics_client(lsp_client: LanguageClient):
+    @lsp_client.feature(types.CLIENT_REGISTER_CAPABILITY)
+    def register_capability(params: types.RegistrationParams):
+        pass
+
+    await lsp_client.initialize_session(
+        types.InitializeParams(capabilities=client_capabilities("visual-studio-code"))
+    )
+    yield lsp_client
+    await lsp_client.shutdown_session()
+
+
+async def wait_for_diagnostics(client: LanguageClient, uri: str):
+    for _ in range(50):
+        if uri in client.diagnostics:
+            return client.diagnostics.pop(uri)
+        await asyncio.sleep(0.1)
+    raise AssertionError(f"no diagnostics published for {uri}")
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_publish_diagnostics(diagnostics_client: LanguageClient, tmp_path):
+    """Test that undocumented keys are published, and again after an edit."""
+    config_file = tmp_path / "config.yaml"
+    (tmp_path / "config.yaml.md").write_text(DOC, encoding="utf-8")
+    uri = config_file.as_uri()
+
+    diagnostics_client.text_document_did_open(
+        types.DidOpenTextDocumentParams(
+            text_document=types.TextDocumentItem(
+                uri=uri, language_id="yaml", version=1, text=YAML
+            )
+        )
+    )
+    diagnostics = await wait_for_diagnostics(diagnostics_client, uri)
+    assert [d.message for d in diagnostics] == [
+        "Undocumented key databases.default.options",
+        "Undocumented key databases.default.options.timeout",
+        "Undocumented key cache",
+        "Undocumented key cache.size",
+    ]
+    assert diagnostics[2].range == types.Range(
+        start=types.Position(line=5, character=0),
+        end=types.Position(line=5, character=5),
+    )
+    assert diagnostics[0].severity == types.DiagnosticSeverity.Warning
+
+    # Remove the cache section
+    diagnostics_client.text_document_did_change(
+        types.DidChangeTextDocumentParams(
+            text_document=types.VersionedTextDocumentIdentifier(uri=uri, version=2),
+            content_changes=[
+                types.TextDocumentContentChangePartial(
+                    range=types.Range(
+                        start=types.Position(line=5, character=0),
+                        end=types.Position(line=7, character=0),
+                    ),
+                    text="",
+                )
+            ],
+        )
+    )
+    diagnostics = await wait_for_diagnostics(diagnostics_client, uri)
+    assert len(diagnostics) == 2
+
+    diagnostics_client.text_document_did_close(
+        types.DidCloseTextDocumentParams(
+            text_document=types.TextDocumentIdentifier(uri=uri)
+        )
+    )
+    assert list(await wait_for_diagnostics(diagnostics_client, uri)) == []
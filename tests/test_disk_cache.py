@@ -0,0 +1,89 @@
+import marshal
+import os
+
+from doc_lsp import disk_cache
+from doc_lsp.disk_cache import DiskCache
+from doc_lsp.parser import parse_document
+
+MARKDOWN = """\
+## SERVER
+> The server settings
+
+### PORT
+> The port to listen on
+"""
+
+
+def write_doc(tmp_path, content=MARKDOWN):
+    doc_file = tmp_path / "settings.py.md"
+    doc_file.write_text(content, encoding="utf-8")
+    return doc_file
+
+
+def test_store_and_load(tmp_path):
+    """Test that a stored document loads with the same variables."""
+    cache = DiskCache(tmp_path / "cache")
+    doc_file = write_doc(tmp_path)
+    document = parse_document(MARKDOWN)
+    cache.store(doc_file, doc_file.stat(), MARKDOWN, document)
+
+    loaded = cache.load(doc_file, doc_file.stat())
+    assert loaded is not None
+    assert loaded.get_variable("server.port").doc == "The port to listen on"
+    assert [(v.path, v.line) for v in loaded.entries] == [
+        (v.path, v.line) for v in document.entries
+    ]
+
+
+def test_load_missing_entry(tmp_path):
+    cache = DiskCache(tmp_path / "cache")
+    doc_file = write_doc(tmp_path)
+    assert cache.load(doc_file, doc_file.stat()) is None
+
+
+def test_content_change_invalidates(tmp_path):
+    """Test that a stored document is not used after the file changes."""
+    cache = DiskCache(tmp_path / "cache")
+    doc_file = write_doc(tmp_path)
+    cache.store(doc_file, doc_file.stat(), MARKDOWN, parse_document(MARKDOWN))
+
+    # Same size, different content and mtime
+    changed = MARKDOWN.replace("listen", "LISTEN")
+    doc_file.write_text(changed, encoding="utf-8")
+    stat = doc_file.stat()
+    os.utime(doc_file, (stat.st_atime, stat.st_mtime + 10))
+    assert cache.load(doc_file, doc_file.stat()) is None
+
+
+def test_mtime_change_same_content(tmp_path):
+    """Test that a touched file with the same content keeps using the entry."""
+    cache = DiskCache(tmp_path / "cache")
+    doc_file = write_doc(tmp_path)
+    cache.store(doc_file, doc_file.stat(), MARKDOWN, parse_document(MARKDOWN))
+
+    stat = doc_file.stat()
+    os.utime(doc_file, (stat.st_atime, stat.st_mtime + 10))
+    assert cache.load(doc_file, doc_file.stat()) is not None
+
+    # The entry was updated with the new mtime
+    entry = marshal.loads(cache._entry_path(doc_file).read_bytes())
+    assert entry[3] == doc_file.stat().st_mtime
+
+
+def test_format_change_invalidates(tmp_path, monkeypatch):
+    """Test that entries of another parser version are ignored."""
+    cache = DiskCache(tmp_path / "cache")
+    doc_file = write_doc(tmp_path)
+    cache.store(doc_file, doc_file.stat(), MARKDOWN, parse_document(MARKDOWN))
+
+    monkeypatch.setattr(disk_cache, "FORMAT", ("doc-lsp", 1, -1, (0, 0)))
+    assert cache.load(doc_file, doc_file.stat()) is None
+
+
+def test_corrupted_entry_is_ignored(tmp_path):
+    cache = DiskCache(tmp_path / "cache")
+    doc_file = write_doc(tmp_path)
+    cache.store(doc_file, doc_file.stat(), MARKDOWN, parse_document(MARKDOWN))
+
+    cache._entry_path(doc_file).write_bytes(b"not marshal data")
+    assert cache.load(doc_file, doc_file.stat()) is None
@@ -0,0 +1,91 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+from lsprotocol import types
+
+from doc_lsp.cache import DocCache
+from doc_lsp.indexer import WorkspaceIndexer, find_doc_files
+from doc_lsp.parser import parse_document
+
+
+def make_tree(tmp_path):
+    (tmp_path / "app").mkdir()
+    (tmp_path / "app" / "settings.py.md").write_text("## DEBUG\n> Debug mode\n")
+    (tmp_path / "config.yaml.md").write_text("## server\n> The server\n")
+    (tmp_path / "README.md").write_text("# Readme\n")
+    (tmp_path / "notes.txt.md").write_text("## NOTE\n")
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "hidden.py.md").write_text("## HIDDEN\n")
+
+
+def test_find_doc_files(tmp_path):
+    """Test that only companion docs of supported extensions are found."""
+    make_tree(tmp_path)
+    doc_files = find_doc_files([tmp_path], [".py", ".yaml"])
+
+    assert sorted(path.relative_to(tmp_path).as_posix() for path in doc_files) == [
+        "app/settings.py.md",
+        "config.yaml.md",
+    ]
+
+
+def read(doc_file):
+    return doc_file.stat().st_mtime, parse_document(doc_file.read_text())
+
+
+@pytest.mark.asyncio
+async def test_index_workspace(tmp_path):
+    """Test that indexed documents are cached and stop when the cache is full."""
+    make_tree(tmp_path)
+    ls = SimpleNamespace(client_capabilities=types.ClientCapabilities())
+
+    cache = DocCache()
+    indexer = WorkspaceIndexer(cache, read)
+    assert await indexer.run(ls, [tmp_path], [".py", ".yaml"]) == 2
+    assert str(tmp_path / "app" / "settings.py.md") in cache
+    assert str(tmp_path / "config.yaml.md") in cache
+
+    # Already cached files are not parsed again
+    assert await indexer.run(ls, [tmp_path], [".py", ".yaml"]) == 0
+
+    cache = DocCache(max_entries=1)
+    indexer = WorkspaceIndexer(cache, read)
+    assert await indexer.run(ls, [tmp_path], [".py", ".yaml"]) == 2
+    assert len(cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_index_skips_pending_parses(tmp_path):
+    """Test that the files a request is parsing are not read again."""
+    make_tree(tmp_path)
+    ls = SimpleNamespace(client_capabilities=types.ClientCapabilities())
+    pending = {str(tmp_path / "config.yaml.md"): None}
+
+    cache = DocCache()
+    indexer = WorkspaceIndexer(cache, read, pending)
+    assert await indexer.run(ls, [tmp_path], [".py", ".yaml"]) == 1
+    assert str(tmp_path / "config.yaml.md") not in cache
+
+
+@pytest.mark.asyncio
+async def test_index_keys_match_hover(tmp_path):
+    """Test that documents indexed from a symlinked or non-normalised root are
+    cached under the path hover looks them up with."""
+    from doc_lsp.lsp import get_doc_file_path
+
+    (tmp_path / "real").mkdir()
+    make_tree(tmp_path / "real")
+    try:
+        os.symlink(tmp_path / "real", tmp_path / "link", target_is_directory=True)
+    except OSError:
+        pytest.skip("symlinks not supported")
+    ls = SimpleNamespace(client_capabilities=types.ClientCapabilities())
+
+    for root in (tmp_path / "link", tmp_path / "real" / "app" / ".."):
+        cache = DocCache()
+        indexer = WorkspaceIndexer(cache, read)
+        assert await indexer.run(ls, [root], [".py", ".yaml"]) == 2
+        for folder in (tmp_path / "link", tmp_path / "real"):
+            doc_file = get_doc_file_path((folder / "app" / "settings.py").as_uri())
+            assert str(doc_file) in cache
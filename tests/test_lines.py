@@ -0,0 +1,47 @@
+from lsprotocol import types
+from pygls.workspace import PositionCodec, TextDocument
+
+from doc_lsp import get_prefix_at_position, get_word_at_position
+from doc_lsp.lines import apply_change, split_lines
+
+
+def change(start, end, text):
+    return types.TextDocumentContentChangePartial(
+        range=types.Range(start=types.Position(*start), end=types.Position(*end)),
+        text=text,
+    )
+
+
+def test_apply_change_matches_pygls():
+    """Test that the lines stay in sync with the document pygls keeps."""
+    codec = PositionCodec()
+    text = 'name: "😋"\nserver:\n  port: 8080\n  host: localhost\n'
+    document = TextDocument(
+        "file:///config.yaml",
+        text,
+        sync_kind=types.TextDocumentSyncKind.Incremental,
+        position_codec=codec,
+    )
+    lines = split_lines(text)
+
+    changes = [
+        change((0, 9), (0, 9), "!"),  # after the emoji, in UTF-16 units
+        change((2, 8), (2, 12), "9090"),
+        change((1, 7), (3, 2), "\n  debug: true\n  "),  # join and split lines
+        change((4, 0), (4, 0), "other: 1\n"),  # at the end of the file
+        types.TextDocumentContentChangeWholeDocument(text="a: 1\nb: 2"),
+    ]
+    for content_change in changes:
+        document.apply_change(content_change)
+        apply_change(lines, content_change, codec)
+        assert "\n".join(lines) == document.source
+
+
+def test_word_at_position_text_or_lines():
+    """Test that the word and prefix are found in the text as in its lines."""
+    text = "DATABASES = {\n    'default': DATABASES.default.NAME\n}\n"
+    for document in (text, split_lines(text)):
+        assert get_word_at_position(document, 1, 30) == "DATABASES.default.NAME"
+        assert get_prefix_at_position(document, 1, 30) == "DATABASES.defau"
+        assert get_word_at_position(document, 5, 0) is None
+        assert get_prefix_at_position(document, 0, 40) is None
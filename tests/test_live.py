@@ -0,0 +1,110 @@
+import asyncio
+import os
+import tempfile
+
+import pytest
+from lsprotocol import types
+from pytest_lsp import LanguageClient
+
+from doc_lsp.live import FULL_EDIT, merge_edits
+
+# The files are never written, the documentation comes from the open buffer
+DOC_DIR = os.path.join(tempfile.gettempdir(), "doc_lsp_live")
+
+
+def file_uri(name: str) -> str:
+    path = os.path.join(DOC_DIR, name)
+    if os.name == "nt":  # Windows
+        return "file:///" + path.replace("\\", "/")
+    return "file://" + path
+
+
+async def hover_until(client: LanguageClient, uri: str, text: str):
+    """Hover the first line until the documentation contains `text`."""
+    for _ in range(50):
+        hover_response = await client.text_document_hover_async(
+            types.HoverParams(
+                text_document=types.TextDocumentIdentifier(uri=uri),
+                position=types.Position(line=0, character=2),
+            )
+        )
+        if hover_response is not None and text in hover_response.contents.value:
+            return hover_response
+        await asyncio.sleep(0.1)
+    return hover_response
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_hover_uses_unsaved_documentation(client: LanguageClient):
+    """Test that hover reflects the documentation buffer before it is saved."""
+
+    doc_uri = file_uri("app.conf.md")
+    conf_uri = file_uri("app.conf")
+
+    client.text_document_did_open(
+        types.DidOpenTextDocumentParams(
+            text_document=types.TextDocumentItem(
+                uri=conf_uri, language_id="ini", version=1, text="font_size 18\n"
+            )
+        )
+    )
+    client.text_document_did_open(
+        types.DidOpenTextDocumentParams(
+            text_document=types.TextDocumentItem(
+                uri=doc_uri,
+                language_id="markdown",
+                version=1,
+                text="## font_size\n> Size of the font\n",
+            )
+        )
+    )
+
+    hover_response = await hover_until(client, conf_uri, "Size of the font")
+    assert hover_response is not None
+    assert "Size of the font" in hover_response.contents.value
+
+    # Edit the blockquote without saving
+    client.text_document_did_change(
+        types.DidChangeTextDocumentParams(
+            text_document=types.VersionedTextDocumentIdentifier(uri=doc_uri, version=2),
+            content_changes=[
+                types.TextDocumentContentChangePartial(
+                    range=types.Range(
+                        start=types.Position(line=1, character=2),
+                        end=types.Position(line=1, character=6),
+                    ),
+                    text="Default size",
+                )
+            ],
+        )
+    )
+
+    hover_response = await hover_until(client, conf_uri, "Default size of the font")
+    assert "Default size of the font" in hover_response.contents.value
+
+    # Once closed, the documentation comes from the file, that does not exist
+    client.text_document_did_close(
+        types.DidCloseTextDocumentParams(
+            text_document=types.TextDocumentIdentifier(uri=doc_uri)
+        )
+    )
+
+    hover_response = await client.text_document_hover_async(
+        types.HoverParams(
+            text_document=types.TextDocumentIdentifier(uri=conf_uri),
+            position=types.Position(line=0, character=2),
+        )
+    )
+    assert hover_response is None
+
+
+def test_merge_edits():
+    """Test that consecutive changes are merged into a single line range."""
+    # Line 5 became 5-6, then line 10 (9 before) was removed
+    assert merge_edits((5, 5, 6), (10, 11, 10)) == (5, 10, 10)
+    # Line 5 became 5-6, then line 2 became 2-4, moving the first edit
+    assert merge_edits((5, 5, 6), (2, 2, 4)) == (2, 5, 8)
+    # A change inside the edited lines
+    assert merge_edits((5, 8, 10), (6, 7, 6)) == (5, 8, 9)
+    assert merge_edits(None, (1, 1, 1)) == (1, 1, 1)
+    assert merge_edits((1, 1, 1), FULL_EDIT) == FULL_EDIT
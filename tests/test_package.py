@@ -0,0 +1,47 @@
+import importlib.util
+import subprocess
+import sys
+from pathlib import Path
+
+from pygls.lsp.server import LanguageServer
+
+import doc_lsp
+
+STARTUP = Path(__file__).parent.parent / "benchmarks" / "startup.py"
+
+
+def test_server_names():
+    """Test that the server names are still exported by the package."""
+    from doc_lsp import server
+
+    assert isinstance(server, LanguageServer)
+    assert doc_lsp.hover is doc_lsp.lsp.hover
+    assert isinstance(doc_lsp.__version__, str)
+
+
+def test_import_is_lazy():
+    """Test that the package, the parser and the pool do not import the server."""
+    code = (
+        "import sys, doc_lsp, doc_lsp.parser, doc_lsp.pool; "
+        "print(sorted(m for m in sys.modules "
+        "if m == 'doc_lsp.lsp' or m.split('.')[0] in ('pygls', 'lsprotocol')))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_startup_benchmark():
+    """Test that the startup benchmark finds the modules imported by a mode."""
+    spec = importlib.util.spec_from_file_location("startup", STARTUP)
+    startup = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(startup)
+
+    total, modules = startup.import_times("doc_lsp.parser")
+    names = [name for _, name in modules]
+    assert total > 0
+    assert names[-1] == "doc_lsp.parser"
+    assert "doc_lsp" in names
+    assert not any(name.startswith("pygls") for name in names)
+    assert startup.version_time() > 0
@@ -0,0 +1,374 @@
+import io
+import mmap
+import os
+import random
+
+import pytest
+
+from doc_lsp.parser import (
+    READ_CHUNK,
+    iter_file_headers,
+    parse_document,
+    parse_document_file,
+    parse_document_lazy,
+    reparse_document,
+)
+
+SETTINGS_MD = os.path.join(
+    os.path.dirname(__file__), "..", "examples", "settings.py.md"
+)
+
+
+def load_example() -> str:
+    with open(SETTINGS_MD, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_get_variable_is_case_insensitive():
+    """Test that full paths and names are looked up case insensitive."""
+    doc = parse_document(load_example())
+
+    assert doc.get_variable("server").name == "SERVER"
+    assert doc.get_variable("Databases.Options.Timeout").name == "TIMEOUT"
+
+
+def test_get_variable_normalizes_separators():
+    """Test that `__` and `.` separators are interchangeable."""
+    doc = parse_document(load_example())
+
+    assert doc.get_variable("DATABASES__OPTIONS__TIMEOUT").name == "TIMEOUT"
+    assert doc.get_variable("DATABASES.default.NAME").name == "NAME"
+    assert doc.get_variable("UNKNOWN") is None
+
+
+def test_get_variable_last_occurrence_wins():
+    """Test that the last heading wins when a variable is documented twice."""
+    doc = parse_document(
+        "## FOO\n> first\n\n## BAR\n### FOO\n> nested\n\n## foo\n> last\n"
+    )
+
+    assert doc.get_variable("FOO").doc == "last"
+    assert doc.get_variable("BAR.FOO").doc == "nested"
+
+
+def test_resolve_duplicate_names():
+    """Test that the full key path picks the right variable among duplicated names."""
+    doc = parse_document(
+        "## DATABASES\n### {key}\n#### NAME\n> database name\n\n"
+        "## CACHES\n### {key}\n#### NAME\n> cache name\n\n"
+        "## NAME\n> app name\n"
+    )
+
+    assert doc.resolve(["DATABASES", "default", "NAME"]).doc == "database name"
+    assert doc.resolve(["CACHES", "default", "NAME"]).doc == "cache name"
+    assert doc.resolve(["NAME"]).doc == "app name"
+    # Unknown parents fall back to the last one, as get_variable
+    assert doc.resolve(["OTHER", "NAME"]).doc == "app name"
+    assert doc.resolve(["UNKNOWN"]) is None
+
+
+@pytest.mark.parametrize(
+    "key_path,doc",
+    [
+        (["DATABASES", "default", "OPTIONS", "TIMEOUT"], "database timeout"),
+        (["DATABASES", "default", "TIMEOUT"], "timeout"),
+        (["authors", "0", "email"], "author email"),
+        (["authors", "email"], "author email"),  # list items without index
+        (["authors", "1", "url"], "author url"),
+        (["tags", "2"], "tag"),
+        (["other", "authors", "0", "email"], "author email"),  # documented suffix
+    ],
+)
+def test_resolve_placeholders(key_path, doc):
+    """Test that `{key}` and `[item]` placeholders match the keys of the path."""
+    document = parse_document(
+        "## DATABASES\n### {key}\n#### {key}.OPTIONS\n##### TIMEOUT\n> database timeout\n\n"
+        "## TIMEOUT\n> timeout\n\n"
+        "## authors\n### authors[item].email\n> author email\n\n"
+        "### [item].url\n> author url\n\n"
+        "## tags[item]\n> tag\n"
+    )
+
+    assert document.resolve(key_path).doc == doc
+
+
+@pytest.mark.parametrize(
+    "key_path, documented",
+    [
+        (["DATABASES"], True),
+        (["DATABASES", "default"], True),
+        (["DATABASES", "default", "OPTIONS", "TIMEOUT"], True),
+        (["DATABASES", "default", "NAME"], False),
+        (["authors", "0"], True),
+        (["CACHES"], False),
+    ],
+)
+def test_documents(key_path, documented):
+    """Test that the parents of documented keys are documented, placeholders included."""
+    document = parse_document(
+        "## DATABASES\n### {key}\n#### {key}.OPTIONS\n##### TIMEOUT\n> database timeout\n\n"
+        "## authors\n### authors[item].email\n> author email\n"
+    )
+
+    assert document.documents(key_path) is documented
+
+
+def test_variable_patterns():
+    """Test that the patterns keep the placeholders the paths leave out."""
+    document = parse_document(
+        "## DATABASES\n### {key}\n#### {key}.OPTIONS\n"
+        "## authors\n### authors[item].email\n### Other.url\n"
+    )
+
+    assert [(v.path, v.pattern) for v in document.entries] == [
+        ("DATABASES", "DATABASES"),
+        ("DATABASES.OPTIONS", "DATABASES.{key}.OPTIONS"),
+        ("authors", "authors"),
+        ("authors.email", "authors.[item].email"),
+        ("authors.url", "authors.url"),
+    ]
+
+
+def test_complete_prefix():
+    """Test that completion candidates are deduplicated by name."""
+    doc = parse_document(load_example())
+
+    names = [var.name for var in doc.complete("de")]
+    assert sorted(names) == ["DEBUG", "DEFAULT_ORG"]
+
+    names = [var.name for var in doc.complete("DATABASES__OPTIONS.T")]
+    assert sorted(names) == ["TIMEOUT", "TLS_VERIFICATION"]
+
+    assert doc.complete("nope") == []
+
+
+def test_complete_limit():
+    """Test that the number of completion candidates can be capped."""
+    doc = parse_document(load_example())
+
+    assert len(doc.complete("d", limit=2)) == 2
+
+
+def test_export_models():
+    """Test the pydantic export view of the parsed documentation."""
+    from doc_lsp.models import DocumentModel, HeaderTreeModel
+    from doc_lsp.parser import parse_header_tree
+
+    model = DocumentModel.from_document(parse_document(load_example()))
+    assert model.variables["SERVER"].name == "SERVER"
+    assert "Port used" in model.model_dump()["variables"]["PORT"]["doc"]
+
+    tree = HeaderTreeModel.from_header_tree(parse_header_tree(load_example()))
+    databases = [h for h in tree.headers if h.title == "DATABASES"][0]
+    assert databases.children[0].title == "{key}"
+
+
+def dump_document(doc):
+    """Everything the incremental parser must keep equal to a full parse."""
+    headers = [
+        (h.level, h.title, h.content, h.line, h.parent and h.parent.line)
+        + tuple(c.line for c in h.children)
+        for h in doc.tree.headers
+    ]
+    variables = [(v.path, v.pattern, v.name, v.doc, v.line) for v in doc.entries]
+    lookups = {key: doc.get_variable(key).line for key in doc.variables}
+    resolved = {v.pattern: doc.resolve(v.pattern.split(".")).line for v in doc.entries}
+    return headers, doc.tree.start, doc.tree.end, variables, lookups, resolved
+
+
+def apply_edit(lines, start, end, new_lines):
+    """Replace lines `start` to `end` (inclusive) and reparse both ways."""
+    edited = lines[:start] + new_lines + lines[end + 1 :]
+    return edited, "\n".join(edited), start + len(new_lines) - 1
+
+
+DUPLICATES_MD = """\
+## A
+> a1
+
+### NAME
+> a name
+
+## B
+> b
+
+### NAME
+> b name
+
+## A
+> a2
+"""
+
+
+def lookups(doc):
+    """Docs found by each kind of lookup on DUPLICATES_MD."""
+    return (
+        [doc.get_variable(key).doc for key in ("A", "NAME", "A.NAME", "B__NAME")],
+        [
+            doc.resolve(path).doc
+            for path in (["A", "NAME"], ["B", "NAME"], ["C", "NAME"])
+        ],
+        [(var.name, var.doc) for var in doc.complete("a")],
+        [(var.name, var.doc) for var in doc.complete("n")],
+    )
+
+
+def test_index_duplicates():
+    """Test lookups with duplicate paths and names, once built and after edits."""
+    lines = DUPLICATES_MD.split("\n")
+    doc = parse_document(DUPLICATES_MD)
+    assert lookups(doc) == (
+        ["a2", "b name", "a name", "b name"],
+        ["a name", "b name", "b name"],
+        [("A", "a2"), ("NAME", "a name")],
+        [("NAME", "b name")],
+    )
+
+    # Remove the last `## A`, the first one wins again
+    lines, markdown, new_end = apply_edit(lines, 12, 13, [])
+    assert reparse_document(doc, markdown, 12, 13, new_end) is doc
+    assert lookups(doc) == lookups(parse_document(markdown))
+    assert lookups(doc)[0][:2] == ["a1", "b name"]
+
+    # Add a `NAME` before the others, the last one still wins
+    lines, markdown, new_end = apply_edit(lines, 2, 2, ["", "## NAME", "> top", ""])
+    assert reparse_document(doc, markdown, 2, 2, new_end) is doc
+    assert lookups(doc) == lookups(parse_document(markdown))
+    assert lookups(doc)[0][:2] == ["a1", "b name"]
+
+    # Rename `B.NAME`, `NAME` is now `A.NAME`
+    lines, markdown, new_end = apply_edit(lines, 12, 12, ["### OTHER"])
+    assert reparse_document(doc, markdown, 12, 12, new_end) is doc
+    assert lookups(doc) == lookups(parse_document(markdown))
+    assert lookups(doc)[0][:2] == ["a1", "a name"]
+
+
+@pytest.mark.parametrize(
+    "start,end,new_lines",
+    [
+        (16, 16, ["> Port used to connect to the server"]),  # blockquote text
+        (15, 15, ["## PORT_NUMBER = 1234"]),  # heading title
+        (15, 16, []),  # remove a heading
+        (27, 27, ["## NEW_SETTING", "> New setting", ""]),  # add a heading
+        (51, 51, ["## {key}"]),  # change the nesting of the following headings
+        (48, 48, [">>>", "## Not a heading"]),  # open a blockquote
+        (70, 70, ["<!-- doc-end -->"]),  # move the doc end
+    ],
+)
+def test_reparse_document_matches_full_parse(start, end, new_lines):
+    """Test that re-parsing an edit gives the same document as a full parse."""
+    lines = load_example().split("\n")
+    doc = parse_document("\n".join(lines))
+
+    lines, markdown, new_end = apply_edit(lines, start, end, new_lines)
+    doc = reparse_document(doc, markdown, start, end, new_end)
+
+    assert dump_document(doc) == dump_document(parse_document(markdown))
+
+
+def test_reparse_document_random_edits():
+    """Test a sequence of random edits against a full parse after each one."""
+    pieces = ["## A", "### A.B = 1", "#### {key}", "##### C", "### [item].D", "## E__F"]
+    pieces += ["> doc", ">>>", "", "text", "<!-- doc-end -->"]
+    rnd = random.Random(42)
+    lines = [rnd.choice(pieces) for _ in range(30)]
+    doc = parse_document("\n".join(lines))
+
+    for _ in range(300):
+        start = rnd.randrange(len(lines))
+        end = rnd.randrange(start, len(lines))
+        new_lines = [rnd.choice(pieces) for _ in range(rnd.randint(1, 4))]
+
+        lines, markdown, new_end = apply_edit(lines, start, end, new_lines)
+        doc = reparse_document(doc, markdown, start, end, new_end)
+
+        assert dump_document(doc) == dump_document(parse_document(markdown))
+
+
+@pytest.mark.parametrize("mode", ["text", "binary", "mmap"])
+def test_parse_document_file_matches_parse_document(mode):
+    """Test that streaming a file gives the same document as parsing its text."""
+    with open(SETTINGS_MD, "r" if mode == "text" else "rb") as f:
+        if mode == "mmap":
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                doc = parse_document_file(mm)
+        else:
+            doc = parse_document_file(f)
+
+    assert dump_document(doc) == dump_document(parse_document(load_example()))
+
+
+def test_parse_document_file_crlf():
+    """Test that `\\r\\n` line ends are handled as on a text file."""
+    markdown = "## FOO\n> doc\n>>>\n\n## BAR = 1\n>>>\nfenced\n>>>\n"
+    doc = parse_document_file(io.BytesIO(markdown.replace("\n", "\r\n").encode()))
+
+    assert dump_document(doc) == dump_document(parse_document(markdown))
+
+
+def test_parse_document_file_stops_at_doc_end():
+    """Test that the content after the doc-end marker is not read."""
+    head = b"## FOO\n> doc\n<!-- doc-end -->\n\xff\xfe not utf-8\n"
+    source = io.BytesIO(head + b"## BAR\n" * READ_CHUNK)
+
+    headers = iter_file_headers(source)
+    assert [h.title for h in headers] == ["FOO"]
+    assert source.tell() == READ_CHUNK
+
+
+def dump_variables(doc):
+    """The variables and lookups of a document, for documents without a tree."""
+    variables = [(v.path, v.pattern, v.name, v.doc, v.line) for v in doc.entries]
+    lookups = {key: doc.get_variable(key).line for key in doc.variables}
+    return variables, lookups
+
+
+def test_parse_document_lazy_matches_parse_document():
+    """Test that the lazy parse finds the same variables and docs on random markdown."""
+    pieces = [
+        "## A",
+        "### A.B = 1",
+        "#### {key}",
+        "##### C",
+        "### [item].D",
+        "####### G",
+    ]
+    pieces += ["## ", "> doc", ">  x ", ">>>", " >>> ", ">>> x", "", "   ", "text"]
+    pieces += [
+        "<!-- doc-start -->",
+        "<!-- doc-end -->",
+        "> a <!-- doc-end -->",
+        "## é = 1",
+    ]
+    rnd = random.Random(42)
+    markdowns = [load_example()]
+    for _ in range(500):
+        lines = [rnd.choice(pieces) for _ in range(rnd.randint(0, 14))]
+        markdowns.append("\n".join(lines) + rnd.choice(["", "\n"]))
+
+    for markdown in markdowns:
+        expected = dump_variables(parse_document(markdown))
+        assert dump_variables(parse_document_lazy(markdown.encode())) == expected
+        crlf = markdown.replace("\n", "\r\n").encode()
+        assert dump_variables(parse_document_lazy(crlf)) == expected
+
+
+def test_parse_document_lazy_reads_docs_on_access():
+    """Test that each doc is read from the source when first accessed, once."""
+    data = load_example().encode()
+    reads = []
+
+    class Source:
+        def __getitem__(self, span):
+            reads.append(span)
+            return data[span]
+
+    doc = parse_document_lazy(data, Source())
+    assert reads == []
+
+    variable = doc.get_variable("SERVER")
+    assert variable.doc_size > 0
+    assert reads == []
+    assert variable.doc == parse_document(load_example()).get_variable("SERVER").doc
+    assert variable.doc
+    assert len(reads) == 1
@@ -0,0 +1,186 @@
+"""The parser against the implementation it replaced, kept here as the reference.
+
+The headers and the variables must be the same, the reference is the
+regex-based parser of the first release, with plain objects for its models.
+"""
+
+import os
+import random
+import re
+
+import pytest
+
+from doc_lsp.parser import parse_document, parse_header_tree
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "examples")
+
+
+class ReferenceHeader:
+    def __init__(self, level, title, content):
+        self.level = level
+        self.title = title
+        self.content = content
+        self.parent = None
+        self.children = []
+
+
+def reference_header_tree(markdown: str) -> list[ReferenceHeader]:
+    """The regex-based `parse_header_tree`."""
+    lines = markdown.split("\n")
+    headers = []
+    stack = []
+
+    doc_started = False
+    doc_start_idx = 0
+    doc_end_idx = len(lines)
+
+    for i, line in enumerate(lines):
+        if "<!-- doc-start -->" in line:
+            doc_started = True
+            doc_start_idx = i + 1
+            break
+        elif line.startswith("## "):
+            doc_started = True
+            doc_start_idx = i
+            break
+
+    if not doc_started:
+        return []
+
+    for i, line in enumerate(lines[doc_start_idx:], doc_start_idx):
+        if "<!-- doc-end -->" in line:
+            doc_end_idx = i
+            break
+
+    i = doc_start_idx
+    while i < doc_end_idx:
+        line = lines[i]
+        if re.match(r"^#{2,6} ", line):
+            level = len(re.match(r"^(#{2,6}) ", line).group(1)) - 1
+            title = re.sub(r"^#{2,6} ", "", line)
+            if "=" in title:
+                title = title.split("=")[0].strip()
+
+            content = ""
+            j = i + 1
+            while j < doc_end_idx and not lines[j].strip():
+                j += 1
+            if j < doc_end_idx and lines[j].strip() == ">>>":
+                j += 1
+                content_lines = []
+                while j < doc_end_idx and lines[j].strip() != ">>>":
+                    content_lines.append(lines[j])
+                    j += 1
+                content = "\n".join(content_lines).strip()
+                i = j
+            elif j < doc_end_idx and lines[j].startswith(">"):
+                content_lines = []
+                while j < doc_end_idx and lines[j].startswith(">"):
+                    content_lines.append(lines[j][1:].strip())
+                    j += 1
+                content = "\n".join(content_lines)
+                i = j - 1
+
+            header = ReferenceHeader(level, title, content)
+            while stack and stack[-1].level >= level:
+                stack.pop()
+            if stack:
+                header.parent = stack[-1]
+                stack[-1].children.append(header)
+            headers.append(header)
+            stack.append(header)
+        i += 1
+    return headers
+
+
+def reference_variables(markdown: str) -> dict[str, tuple[str, str]]:
+    """The `parse_document(...).variables` of the reference, as {key: (name, doc)}."""
+    variables = {}
+
+    def process_header(header, parent_path=""):
+        title = re.sub(r"\{[^}]+\}", "", header.title)
+        title = re.sub(r"\[[^\]]+\]", "", title)
+        title = title.split(".")[-1].strip()
+        full_path = f"{parent_path}.{title}" if parent_path else title
+        if title:
+            variables[full_path] = (title, header.content)
+            variables[title] = (title, header.content)
+        for child in header.children:
+            process_header(child, full_path if title else parent_path)
+
+    for header in reference_header_tree(markdown):
+        if header.parent is None:
+            process_header(header)
+    return variables
+
+
+def dump_tree(headers) -> list[tuple]:
+    return [
+        (
+            h.level,
+            h.title,
+            h.content,
+            None if h.parent is None else headers.index(h.parent),
+        )
+        for h in headers
+    ]
+
+
+def assert_same_output(markdown: str):
+    assert dump_tree(parse_header_tree(markdown).headers) == dump_tree(
+        reference_header_tree(markdown)
+    )
+    variables = parse_document(markdown).variables
+    assert {key: (var.name, var.doc) for key, var in variables.items()} == (
+        reference_variables(markdown)
+    )
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+@pytest.mark.parametrize("name", ["settings.py.md", "marmite.yaml.md", "README.md"])
+def test_examples(name, newline):
+    with open(os.path.join(EXAMPLES, name), encoding="utf-8", newline="") as f:
+        markdown = f.read()
+    assert_same_output(markdown.replace("\r\n", "\n").replace("\n", newline))
+
+
+@pytest.mark.parametrize(
+    "markdown",
+    [
+        # CRLF
+        "## A\r\n> a\r\n\r\n### B = 1\r\n>>>\r\nb\r\n>>>\r\n",
+        # Fenced code with `#` lines, in a `>>>` blockquote and outside of it
+        "## A\n>>>\n```python\n# comment\n## not a heading\n```\n>>>\n\n## B\n> b\n",
+        "## A\n> a\n```\n# comment\n## C\n```\n### D\n> d\n",
+        # Headers without bodies
+        "## A\n## B\n\n### C\ntext\n> not the doc of C\n## D",
+        # Duplicate and nested headers
+        "## A\n> a1\n### NAME\n> n1\n## B\n### NAME\n> n2\n#### {key}\n##### NAME\n> n3\n"
+        "## A\n> a2\n### a.NAME = 1\n> n4\n",
+        # Doc markers
+        "# Title\ntext\n<!-- doc-start -->\n## A\n> a\n<!-- doc-end -->\n## B\n",
+        "intro\n<!-- doc-start -->\n#### Deep\n> d\n## A\n> a\n",
+    ],
+)
+def test_cases(markdown):
+    assert_same_output(markdown)
+
+
+def test_random_markdown():
+    """Test random markdown made of the lines the parsers handle differently."""
+    pieces = ["## A", "### B", "#### {key}", "##### C = 1", "### [item].D", "## E__F"]
+    pieces += [
+        "###### G",
+        "####### H",
+        "##nospace",
+        "# Title",
+        "## a.b.c",
+        "### x.{key}.y",
+    ]
+    pieces += ["> doc", "> ", "  > indented", ">>>", " >>> ", "", "   ", "text"]
+    pieces += ["```", "# comment in code", "<!-- doc-start -->", "<!-- doc-end -->"]
+    rnd = random.Random(3)
+    for _ in range(500):
+        lines = [rnd.choice(pieces) for _ in range(rnd.randint(0, 40))]
+        assert_same_output("\n".join(lines))
+        assert_same_output("\r\n".join(lines))
@@ -0,0 +1,121 @@
+import os
+
+import pytest
+
+from doc_lsp import pool as pool_module
+from doc_lsp.cache import DocCache, StatCache
+from doc_lsp.disk_cache import DiskCache
+from doc_lsp.pool import ParsePool, read_documentation
+
+MARKDOWN = """\
+## SERVER
+> The server settings
+
+### PORT
+> The port to listen on
+"""
+
+
+@pytest.fixture
+def pool():
+    pool = ParsePool(workers=1)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_read_on_pool(tmp_path, pool):
+    """Test that documents parsed on a worker process come back complete."""
+    doc_file = tmp_path / "settings.py.md"
+    doc_file.write_text(MARKDOWN, encoding="utf-8")
+
+    mtime, document = await pool.read_async(doc_file)
+    assert mtime == doc_file.stat().st_mtime
+    assert document.get_variable("server.port").doc == "The port to listen on"
+    assert document.get_variable("PORT").line == 3
+
+
+def test_read_on_pool_stores_disk_cache(tmp_path, pool):
+    """Test that workers store their parse on the disk cache."""
+    doc_file = tmp_path / "settings.py.md"
+    doc_file.write_text(MARKDOWN, encoding="utf-8")
+    disk_cache = DiskCache(tmp_path / "cache")
+
+    _, document = pool.read(doc_file, disk_cache)
+    cached = disk_cache.load(doc_file, doc_file.stat())
+    assert cached is not None
+    assert [v.path for v in cached.entries] == [v.path for v in document.entries]
+
+
+def test_read_missing_file(tmp_path, pool):
+    with pytest.raises(FileNotFoundError):
+        pool.read(tmp_path / "missing.py.md")
+
+
+@pytest.mark.skipif(
+    not pool_module.LAZY_DOCS_SUPPORTED, reason="no lazy docs on Windows"
+)
+def test_read_lazy(tmp_path):
+    """Test that lazy docs are read from the mapping until the file is modified in place."""
+    doc_file = tmp_path / "settings.py.md"
+    doc_file.write_text(MARKDOWN, encoding="utf-8")
+
+    document = read_documentation(doc_file, doc_file.stat(), lazy=True)
+    assert document.tree is None
+    assert document.get_variable("SERVER").doc == "The server settings"
+
+    # Saved to a new file and renamed, the mapping is the old file
+    new_file = tmp_path / "new.md"
+    new_file.write_text("## SERVER\n> Changed\n", encoding="utf-8")
+    os.replace(new_file, doc_file)
+    assert document.get_variable("PORT").doc == "The port to listen on"
+
+    # Truncated in place, the mapping is not read and nothing is kept
+    doc_file.write_text(MARKDOWN, encoding="utf-8")
+    document = read_documentation(doc_file, doc_file.stat(), lazy=True)
+    assert document.get_variable("PORT").doc == "The port to listen on"
+    with open(doc_file, "w", encoding="utf-8") as f:
+        f.write("## SERVER\n")
+    variable = document.get_variable("SERVER")
+    for _ in range(2):
+        with pytest.raises(OSError):
+            variable.doc
+    assert document.get_variable("PORT").doc == "The port to listen on"
+
+
+def test_read_lazy_unsupported(tmp_path, monkeypatch):
+    """Test that the file is parsed whole, not kept mapped, where lazy docs are not supported."""
+    monkeypatch.setattr(pool_module, "LAZY_DOCS_SUPPORTED", False)
+    doc_file = tmp_path / "settings.py.md"
+    doc_file.write_text(MARKDOWN, encoding="utf-8")
+
+    document = read_documentation(doc_file, doc_file.stat(), lazy=True)
+    assert document.tree is not None
+    assert document.get_variable("SERVER").doc == "The server settings"
+
+
+@pytest.mark.skipif(
+    not pool_module.LAZY_DOCS_SUPPORTED, reason="no lazy docs on Windows"
+)
+@pytest.mark.asyncio
+async def test_reload_modified_mapping(tmp_path, monkeypatch):
+    """Test that a document whose mapping was truncated is loaded again."""
+    from doc_lsp import lsp
+
+    monkeypatch.setattr(lsp, "lazy_docs", True)
+    monkeypatch.setattr(lsp, "_stat_cache", StatCache(interval=3600))
+    monkeypatch.setattr(lsp, "_doc_cache", DocCache())
+    doc_file = tmp_path / "settings.py.md"
+    doc_file.write_text(MARKDOWN, encoding="utf-8")
+
+    document = await lsp.load_documentation(doc_file)
+    with open(doc_file, "w", encoding="utf-8") as f:
+        f.write("## SERVER\n> Changed\n")
+
+    # The stat() is still cached, the truncated mapping is served until reloaded
+    assert await lsp.load_documentation(doc_file) is document
+    with pytest.raises(OSError):
+        document.get_variable("SERVER").doc
+    document = await lsp.reload_documentation(doc_file)
+    assert document.get_variable("SERVER").doc == "Changed"
+    assert document.get_variable("PORT") is None
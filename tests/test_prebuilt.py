@@ -0,0 +1,160 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from doc_lsp.parser import parse_document
+from doc_lsp.prebuilt import INDEX_FORMAT, PrebuiltIndex, write_index
+
+MARKDOWN = """\
+## SERVER
+> The server settings
+
+### PORT
+> The port to listen on
+"""
+
+OTHER = """\
+## DEBUG
+> Enable the debug mode ✓
+"""
+
+
+def write_tree(root):
+    (root / "app").mkdir(parents=True)
+    (root / "app" / "settings.py.md").write_text(MARKDOWN, encoding="utf-8")
+    (root / "config.yaml.md").write_text(OTHER, encoding="utf-8")
+    (root / "README.md").write_text("# Not a companion doc", encoding="utf-8")
+    return [root / "app" / "settings.py.md", root / "config.yaml.md"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_write_and_load(tmp_path, workers):
+    """Test that the indexed documents load with the same variables."""
+    doc_files = write_tree(tmp_path)
+    index_file = tmp_path / "doc-lsp-index.jsonl"
+    count, errors = write_index([tmp_path], index_file, workers)
+    assert (count, errors) == (2, [])
+
+    index = PrebuiltIndex(index_file)
+    assert len(index) == 2
+    for doc_file, content in zip(doc_files, (MARKDOWN, OTHER)):
+        document = index.load(doc_file, doc_file.stat())
+        assert document is not None
+        expected = parse_document(content)
+        assert [(v.path, v.doc, v.line) for v in document.entries] == [
+            (v.path, v.doc, v.line) for v in expected.entries
+        ]
+    assert index.stats() == {"files": 2, "hits": 2, "misses": 0}
+    index.close()
+
+
+def test_index_format(tmp_path):
+    """Test that the paths are relative to the index file, one document per line."""
+    write_tree(tmp_path)
+    index_file = tmp_path / "index.jsonl"
+    write_index([tmp_path], index_file, 1)
+
+    lines = index_file.read_bytes().split(b"\n")
+    header = json.loads(lines[0])
+    assert header["format"] == INDEX_FORMAT
+    assert sorted(header["files"]) == ["app/settings.py.md", "config.yaml.md"]
+    size, _, offset, length = header["files"]["config.yaml.md"]
+    assert size == len(OTHER.encode("utf-8"))
+    body = index_file.read_bytes()[len(lines[0]) + 1 :]
+    names, docs, paths, line_numbers, patterns = json.loads(
+        body[offset : offset + length]
+    )
+    assert names == ["DEBUG"]
+    assert docs == ["Enable the debug mode ✓"]
+
+
+def test_moved_tree(tmp_path):
+    """Test that an index built elsewhere (e.g. on CI) is used for the same files."""
+    write_tree(tmp_path / "ci")
+    write_index([tmp_path / "ci"], tmp_path / "ci" / "index.jsonl", 1)
+    shutil.copytree(tmp_path / "ci", tmp_path / "checkout")
+
+    index = PrebuiltIndex(tmp_path / "checkout" / "index.jsonl")
+    doc_file = tmp_path / "checkout" / "config.yaml.md"
+    document = index.load(doc_file, doc_file.stat())
+    assert document is not None
+    assert document.get_variable("DEBUG").doc == "Enable the debug mode ✓"
+
+
+def test_symlinked_tree(tmp_path):
+    """Test that the documents are found through a symlinked directory."""
+    write_tree(tmp_path / "real")
+    try:
+        os.symlink(tmp_path / "real", tmp_path / "link", target_is_directory=True)
+    except OSError:
+        pytest.skip("symlinks not supported")
+    write_index([tmp_path / "link"], tmp_path / "link" / "index.jsonl", 1)
+
+    index = PrebuiltIndex(tmp_path / "link" / "index.jsonl")
+    doc_file = tmp_path / "real" / "config.yaml.md"  # the path the server looks up
+    assert index.load(doc_file, doc_file.stat()) is not None
+
+
+def test_changed_file_not_used(tmp_path):
+    """Test that a file changed since it was indexed is not loaded from the index."""
+    doc_files = write_tree(tmp_path)
+    index_file = tmp_path / "index.jsonl"
+    write_index([tmp_path], index_file, 1)
+
+    # Same size, different content
+    doc_files[1].write_text(OTHER.replace("debug", "DEBUG"), encoding="utf-8")
+    # Different size
+    doc_files[0].write_text(MARKDOWN + "\n", encoding="utf-8")
+
+    index = PrebuiltIndex(index_file)
+    assert index.load(doc_files[0], doc_files[0].stat()) is None
+    assert index.load(doc_files[1], doc_files[1].stat()) is None
+    assert index.load(tmp_path / "other.py.md", doc_files[1].stat()) is None
+    assert index.stats()["misses"] == 3
+
+
+def test_invalid_index(tmp_path):
+    index_file = tmp_path / "index.jsonl"
+    index_file.write_text(
+        json.dumps({"format": ["doc-lsp-index", 0], "files": {}}) + "\n"
+    )
+    with pytest.raises(ValueError):
+        PrebuiltIndex(index_file)
+    index_file.write_text("not json\n")
+    with pytest.raises(ValueError):
+        PrebuiltIndex(index_file)
+
+
+def test_unreadable_file_left_out(tmp_path):
+    """Test that a file that fails to parse is reported and the others indexed."""
+    write_tree(tmp_path)
+    (tmp_path / "broken.py.md").write_bytes(b"## BROKEN\n> \xff\n")
+    count, errors = write_index([tmp_path], tmp_path / "index.jsonl", 1)
+    assert count == 2
+    assert [doc_file.name for doc_file, _ in errors] == ["broken.py.md"]
+
+
+def test_index_command(tmp_path):
+    """Test `doc-lsp index`, which exits with an error if a file was not indexed."""
+    write_tree(tmp_path)
+    command = [sys.executable, "-c", "from doc_lsp import main; main()", "index"]
+    result = subprocess.run(
+        [*command, str(tmp_path), "-o", str(tmp_path / "out.jsonl")],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "Indexed 2 documentation files" in result.stderr
+    assert len(PrebuiltIndex(tmp_path / "out.jsonl")) == 2
+
+    (tmp_path / "broken.py.md").write_bytes(b"## BROKEN\n> \xff\n")
+    result = subprocess.run(
+        [*command, str(tmp_path), "-o", str(tmp_path / "out.jsonl")],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 1
@@ -0,0 +1,34 @@
+import pstats
+import tracemalloc
+
+from doc_lsp.parser import parse_document
+from doc_lsp.profiling import Profiler
+
+
+def test_dump_and_stop(tmp_path):
+    """Test that the profile and memory snapshot are written, then again on stop."""
+    profile_out = tmp_path / "doc-lsp.prof"
+    trace_memory = tmp_path / "doc-lsp.mem"
+    profiler = Profiler(profile_out, trace_memory)
+    profiler.start()
+    try:
+        documents = [parse_document(f"## FOO_{i}\n> foo\n") for i in range(100)]
+
+        written = profiler.dump()
+        assert written == {"profile": str(profile_out), "memory": str(trace_memory)}
+        functions = {func for _, _, func in pstats.Stats(str(profile_out)).stats}
+        assert "parse_document" in functions
+        assert tracemalloc.Snapshot.load(str(trace_memory)).statistics("filename")
+        assert profiler.enabled
+    finally:
+        profiler.stop()
+
+    assert not profiler.enabled
+    assert len(documents) == 100
+
+
+def test_disabled():
+    profiler = Profiler()
+    profiler.start()
+    assert not profiler.enabled
+    assert profiler.dump() == {"profile": None, "memory": None}
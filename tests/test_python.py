@@ -316,3 +316,44 @@ async def test_completion_without_documentation(client: LanguageClient):
 
     # Should return empty list when no documentation file exists
     assert completion_response == []
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_hover_resolves_nested_keys(client: LanguageClient, tmp_path):
+    """Test that hover uses the full key path when names are duplicated."""
+    (tmp_path / "nested.py.md").write_text(
+        "## DATABASES\n### {key}\n#### NAME\n> The database name\n\n"
+        "## CACHES\n### {key}\n#### NAME\n> The cache name\n",
+        encoding="utf-8",
+    )
+    test_path = tmp_path / "nested.py"
+    test_content = (
+        'DATABASES = {"default": {"NAME": "db"}}\n'
+        "CACHES = {\n"
+        '    "default": {\n'
+        '        "NAME": "cache",\n'
+        "    }\n"
+        "}\n"
+    )
+    test_uri = test_path.as_uri()
+
+    client.text_document_did_open(
+        types.DidOpenTextDocumentParams(
+            text_document=types.TextDocumentItem(
+                uri=test_uri, language_id="python", version=1, text=test_content
+            )
+        )
+    )
+
+    for line, character, expected in [
+        (0, 27, "The database name"),
+        (3, 10, "The cache name"),
+    ]:
+        hover_response = await client.text_document_hover_async(
+            types.HoverParams(
+                text_document=types.TextDocumentIdentifier(uri=test_uri),
+                position=types.Position(line=line, character=character),
+            )
+        )
+        assert hover_response is not None
+        assert expected in hover_response.contents.value
@@ -0,0 +1,42 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from doc_lsp import coalesce, superseded
+
+
+def make_params(uri):
+    return SimpleNamespace(text_document=SimpleNamespace(uri=uri))
+
+
+@pytest.mark.asyncio
+async def test_superseded_requests_are_dropped():
+    """Test that only the latest request on a document computes its result."""
+    release = asyncio.Event()
+    computed = []
+
+    @coalesce
+    async def handler(ls, params):
+        await release.wait()  # e.g. waiting for the documentation to be parsed
+        if superseded():
+            return None
+        computed.append(params.position)
+        return params.position
+
+    def request(uri, position):
+        params = make_params(uri)
+        params.position = position
+        return asyncio.ensure_future(handler(None, params))
+
+    first = request("file:///a.py", 1)
+    other = request("file:///b.py", 2)
+    await asyncio.sleep(0)
+    latest = request("file:///a.py", 3)
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await first is None
+    assert await other == 2
+    assert await latest == 3
+    assert sorted(computed) == [2, 3]
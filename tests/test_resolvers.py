@@ -0,0 +1,270 @@
+import random
+
+import pytest
+from lsprotocol import types
+from pygls.workspace import PositionCodec
+
+from doc_lsp.lines import apply_change, split_lines
+from doc_lsp.resolvers import (
+    IniResolver,
+    JsonResolver,
+    KeyResolver,
+    PythonResolver,
+    TomlResolver,
+    YamlResolver,
+)
+
+
+def resolve(resolver_class, text: str, line: int, key: str):
+    """Resolve the key path with the cursor on the first `key` of the line."""
+    lines = split_lines(text)
+    return resolver_class(lines).resolve(line, lines[line].index(key) + 1)
+
+
+PYTHON = """\
+DATABASES = {
+    "default": {
+        "NAME": "foo",  # {
+        "OPTIONS": {"TIMEOUT": 30},
+    },
+    'other': dict(NAME="bar"),
+}
+"""
+
+YAML = """\
+databases:
+  default:
+    name: foo
+    options:
+      timeout: 30
+authors:
+  - name: John
+    email: john@example.com
+"""
+
+JSON = """\
+{
+  "databases": {
+    "default": {"name": "foo", "options": {"timeout": 30}}
+  },
+  "authors": [
+    {"name": "John"}
+  ]
+}
+"""
+
+TOML = """\
+title = "blog"
+
+[databases.default]
+name = "foo"
+options.timeout = 30
+"""
+
+INI = """\
+[server]
+host = localhost
+port: 8080
+"""
+
+
+@pytest.mark.parametrize(
+    "resolver_class, text, line, key, expected",
+    [
+        (PythonResolver, PYTHON, 0, "DATABASES", ["DATABASES"]),
+        (PythonResolver, PYTHON, 2, "NAME", ["DATABASES", "default", "NAME"]),
+        (
+            PythonResolver,
+            PYTHON,
+            3,
+            "TIMEOUT",
+            ["DATABASES", "default", "OPTIONS", "TIMEOUT"],
+        ),
+        (PythonResolver, PYTHON, 5, "NAME", ["DATABASES", "other", "NAME"]),
+        (YamlResolver, YAML, 2, "name", ["databases", "default", "name"]),
+        (
+            YamlResolver,
+            YAML,
+            4,
+            "timeout",
+            ["databases", "default", "options", "timeout"],
+        ),
+        (YamlResolver, YAML, 6, "name", ["authors", "name"]),
+        (YamlResolver, YAML, 7, "email", ["authors", "email"]),
+        (JsonResolver, JSON, 2, "name", ["databases", "default", "name"]),
+        (
+            JsonResolver,
+            JSON,
+            2,
+            "timeout",
+            ["databases", "default", "options", "timeout"],
+        ),
+        (JsonResolver, JSON, 5, "name", ["authors", "name"]),
+        (TomlResolver, TOML, 0, "title", ["title"]),
+        (TomlResolver, TOML, 3, "name", ["databases", "default", "name"]),
+        (
+            TomlResolver,
+            TOML,
+            4,
+            "timeout",
+            ["databases", "default", "options", "timeout"],
+        ),
+        (TomlResolver, TOML, 2, "default", ["databases", "default"]),
+        (IniResolver, INI, 1, "host", ["server", "host"]),
+        (IniResolver, INI, 2, "port", ["server", "port"]),
+    ],
+)
+def test_resolve(resolver_class, text, line, key, expected):
+    assert resolve(resolver_class, text, line, key) == expected
+
+
+def test_incomplete_resolver():
+    """Test that a resolver missing a method of its language fails when created."""
+
+    class NoStrings(KeyResolver):
+        def scan_line(self, text, quote=None):
+            return None
+
+        def find_parent(self, index):
+            return None
+
+        def resolve(self, line, character):
+            return None
+
+        def key_columns(self, line):
+            return []
+
+    with pytest.raises(TypeError, match="string_end"):
+        NoStrings(["a"])
+    for resolver_class in (
+        YamlResolver,
+        JsonResolver,
+        PythonResolver,
+        TomlResolver,
+        IniResolver,
+    ):
+        resolver_class(["a"])
+
+
+def test_resolve_outside_keys():
+    """Test that values and blank lines have no key path."""
+    assert resolve(PythonResolver, PYTHON, 2, '"foo"') is None
+    assert resolve(YamlResolver, YAML, 6, "John") is None
+    assert YamlResolver(split_lines(YAML)).resolve(8, 0) is None
+
+
+@pytest.mark.parametrize(
+    "resolver_class, text",
+    [
+        (PythonResolver, PYTHON),
+        (YamlResolver, YAML),
+        (JsonResolver, JSON),
+        (TomlResolver, TOML),
+    ],
+)
+def test_changed_matches_fresh_resolver(resolver_class, text):
+    """Test that a resolver kept across random edits resolves as a new one."""
+    codec = PositionCodec()
+    rng = random.Random(0)
+    lines = split_lines(text)
+    resolver = resolver_class(lines)
+    snippets = ["\n", "  ", "{", "}", "[", "]", "a: ", '"b": ', "c = ", "[t]\n", "- "]
+    snippets += ['"""', "d: |\n"]
+
+    for _ in range(50):
+        resolver.warm_up(len(lines))
+        start_line = rng.randrange(len(lines))
+        end_line = rng.randrange(start_line, len(lines))
+        change = types.TextDocumentContentChangePartial(
+            range=types.Range(
+                start=types.Position(
+                    start_line, rng.randint(0, len(lines[start_line]))
+                ),
+                end=types.Position(end_line, len(lines[end_line])),
+            ),
+            text="".join(rng.choice(snippets) for _ in range(rng.randint(0, 4))),
+        )
+        resolver.changed(*apply_change(lines, change, codec))
+
+        fresh = resolver_class(list(lines))
+        for line, text_line in enumerate(lines):
+            for character in range(len(text_line) + 1):
+                assert resolver.resolve(line, character) == fresh.resolve(
+                    line, character
+                )
+
+
+@pytest.mark.parametrize(
+    "resolver_class, text",
+    [
+        (PythonResolver, PYTHON),
+        (YamlResolver, YAML),
+        (JsonResolver, JSON),
+        (TomlResolver, TOML),
+        (IniResolver, INI),
+    ],
+)
+def test_keys_match_resolve(resolver_class, text):
+    """Test that `keys` lists the key paths resolved at every position on a key."""
+    lines = split_lines(text)
+    resolver = resolver_class(lines)
+    keys = list(resolver.keys())
+    assert keys
+
+    fresh = resolver_class(lines)
+    for line, column, path in keys:
+        assert fresh.resolve(line, column) == path
+    resolved = {
+        (line, tuple(fresh.resolve(line, character)))
+        for line, text_line in enumerate(lines)
+        for character in range(len(text_line) + 1)
+        if fresh.resolve(line, character)
+    }
+    assert {(line, tuple(path)) for line, _, path in keys} == resolved
+
+
+def test_keys():
+    assert [path for _, _, path in TomlResolver(split_lines(TOML)).keys()] == [
+        ["title"],
+        ["databases"],
+        ["databases", "default"],
+        ["databases", "default", "name"],
+        ["databases", "default", "options"],
+        ["databases", "default", "options", "timeout"],
+    ]
+
+
+@pytest.mark.parametrize(
+    "resolver_class, text, expected",
+    [
+        (
+            YamlResolver,
+            "script: |\n  export PATH: /usr/bin\n  echo: hi\nnext: >-\n  a: 1\nlast: 1\n",
+            [["script"], ["next"], ["last"]],
+        ),
+        (
+            YamlResolver,
+            "items:\n  - |\n    a: 1\n  - b: 1\n",
+            [["items"], ["items", "b"]],
+        ),
+        (
+            PythonResolver,
+            'script = """\nfoo = bar\n"""\nX = {"a": 1, """\n"b": 2""": 3, "c": 4}\n',
+            [["script"], ["X"], ["X", "a"], ["X", "c"]],
+        ),
+        (PythonResolver, "A = '\"\"\"'  # '''\nB = 1\n", [["A"], ["B"]]),
+        (
+            TomlResolver,
+            "[products]\nscript = \"\"\"\nfoo = bar\n\"\"\"\nname = '''C:\\'''\nlast = 1\n",
+            [
+                ["products"],
+                ["products", "script"],
+                ["products", "name"],
+                ["products", "last"],
+            ],
+        ),
+    ],
+)
+def test_keys_skip_multiline_strings(resolver_class, text, expected):
+    """Test that the text of block scalars and triple-quoted strings has no keys."""
+    assert [path for _, _, path in resolver_class(split_lines(text)).keys()] == expected
@@ -0,0 +1,92 @@
+import asyncio
+import os
+
+import pytest
+from lsprotocol import types
+from pytest_lsp import LanguageClient
+
+from doc_lsp.stats import Histogram, Timings
+
+
+def test_histogram_percentiles():
+    """Test that percentiles land on the bucket of the matching duration."""
+    histogram = Histogram()
+    for _ in range(90):
+        histogram.record(0.001)
+    for _ in range(10):
+        histogram.record(0.1)
+
+    # Buckets are ~19% wide, the max caps the last one
+    assert 0.001 <= histogram.percentile(0.5) < 0.0012
+    assert 0.001 <= histogram.percentile(0.9) < 0.0012
+    assert histogram.percentile(0.99) == 0.1
+
+    summary = histogram.summary()
+    assert summary["count"] == 100
+    assert summary["max_ms"] == 100.0
+    assert summary["mean_ms"] == pytest.approx(10.9)
+
+
+def test_timed_functions_and_coroutines():
+    timings = Timings()
+
+    @timings.timed("sync")
+    def sync():
+        return 1
+
+    @timings.timed("async")
+    async def coroutine():
+        return 2
+
+    assert sync() == 1
+    assert asyncio.run(coroutine()) == 2
+    assert sync() == 1
+
+    snapshot = timings.snapshot()
+    assert snapshot["sync"]["count"] == 2
+    assert snapshot["async"]["count"] == 1
+    timings.clear()
+    assert timings.snapshot() == {}
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_stats_request(client: LanguageClient):
+    """Test that `docLsp/stats` reports the timings of the hovers served."""
+    test_path = os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "examples", "settings.py")
+    )
+    # Handle Windows paths correctly
+    if os.name == "nt":  # Windows
+        test_uri = "file:///" + test_path.replace("\\", "/")
+    else:
+        test_uri = "file://" + test_path
+
+    client.text_document_did_open(
+        types.DidOpenTextDocumentParams(
+            text_document=types.TextDocumentItem(
+                uri=test_uri,
+                language_id="python",
+                version=1,
+                text=open(test_path).read(),
+            )
+        )
+    )
+    hover_response = await client.text_document_hover_async(
+        types.HoverParams(
+            text_document=types.TextDocumentIdentifier(uri=test_uri),
+            position=types.Position(line=1, character=3),  # the SERVER variable
+        )
+    )
+    assert hover_response is not None
+
+    # Results of custom requests come as objects
+    stats = await client.protocol.send_request_async("docLsp/stats", {"reset": True})
+    timings = stats.timings
+    for name in ("hover", "get_doc_file_path", "load_documentation", "get_variable"):
+        assert getattr(timings, name).count >= 1
+    assert timings.hover.p50_ms <= timings.hover.p99_ms <= timings.hover.max_ms
+    assert stats.doc_cache.entries >= 1
+
+    # The histograms were reset after reading them
+    stats = await client.protocol.send_request_async("docLsp/stats", {})
+    assert not hasattr(stats.timings, "hover")